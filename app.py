@@ -8,12 +8,23 @@ Depo bazlı bisiklet stoklarını takip eden Flask web uygulaması
 import hashlib
 import os
 import secrets
-from datetime import datetime
+from datetime import datetime, timedelta
 from functools import wraps
 
 # Third-party imports
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
-import sqlite3
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, make_response, Response, stream_with_context
+
+# Local imports
+import csv_export
+import database
+import migrations
+import pagination
+import product_import
+import product_search
+import reference_data
+import result_cache
+import stock_moves
+import write_queue
 
 # Application initialization
 app = Flask(__name__)
@@ -24,12 +35,22 @@ app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
 app.config['TEMPLATES_AUTO_RELOAD'] = True
 
 # Database connection
+database.init_app(app)
+
 def get_db_connection():
-    """SQLite veritabanı bağlantısı oluşturur ve Row factory ayarlar"""
-    db_path = os.path.join(os.path.dirname(__file__), 'stok_takip.db')
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """İsteğe bağlı SQLite bağlantısını döndürür (thread başına havuzlanır, teardown'da bırakılır)"""
+    return database.get_db()
+
+def init_schema():
+    """Şemayı açılışta bir kez doğrular; route'lar tablo varlığını kontrol etmez"""
+    migrations.migrate(verbose=False)
+    database.load_schema()
+    if database.schema.version < migrations.latest_version():
+        raise RuntimeError(
+            f'Veritabanı şeması güncel değil: {database.schema.version} < {migrations.latest_version()}'
+        )
+
+init_schema()
 
 # Authentication decorator
 def login_required(f):
@@ -41,6 +62,47 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Yanıt biçimi değişirse artırılır; eski ETag'ler geçersiz olur
+ETAG_SURUMU = 1
+
+def surum_etagi(*tablolar):
+    """JSON API'leri için tablo sürümlerinden (veri_surumu) güçlü ETag ve koşullu GET
+
+    If-None-Match eşleşirse görünüm çalıştırılmadan 304 döner. Tarayıcı yanıtı
+    saklar ama her kullanımda doğrular (no-cache); yanıt oturuma bağlı olduğu için private.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            damga = result_cache.damga(get_db_connection(), tablolar)
+            etag = '-'.join(map(str, (ETAG_SURUMU, *damga, *kwargs.values())))
+            if request.if_none_match.contains(etag):
+                yanit = Response(status=304)
+            else:
+                yanit = make_response(f(*args, **kwargs))
+                if yanit.status_code != 200:
+                    return yanit
+            yanit.set_etag(etag)
+            yanit.headers['Cache-Control'] = 'private, no-cache'
+            return yanit
+        return decorated_function
+    return decorator
+
+def gun_araligi(baslangic, bitis=None):
+    """'YYYY-MM-DD' günlerini yarı açık [başlangıç, bitiş+1 gün) zaman aralığına çevirir
+
+    tarih sütunu fonksiyona sarılmadan karşılaştırıldığı için tarih index'i kullanılır.
+    """
+    alt = datetime.strptime(baslangic, '%Y-%m-%d').date()
+    ust = datetime.strptime(bitis, '%Y-%m-%d').date() if bitis else alt
+    return alt.isoformat(), (ust + timedelta(days=1)).isoformat()
+
+def urun_fts_kosulu(arama):
+    """urun_fts için (koşul, parametreler); FTS kullanılamıyorsa (None, None)"""
+    if not database.schema.has_table('urun_fts'):
+        return None, None
+    return product_search.fts_kosulu(arama)
+
 # Routes - Main pages
 @app.route('/')
 @login_required
@@ -76,13 +138,11 @@ def login():
                 (datetime.now(), kullanici['id'])
             )
             conn.commit()
-            conn.close()
             
             flash('Başarıyla giriş yaptınız!', 'success')
             return redirect(url_for('index'))
         else:
             flash('Kullanıcı adı veya şifre hatalı!', 'error')
-            conn.close()
     
     return render_template('login.html')
 
@@ -128,7 +188,6 @@ def sifre_degistir():
         
         if not kullanici:
             flash('Mevcut şifre yanlış!', 'error')
-            conn.close()
             return redirect(url_for('sifre_degistir'))
         
         try:
@@ -154,81 +213,128 @@ def sifre_degistir():
             
         except Exception as e:
             flash(f'Şifre değiştirilirken hata oluştu: {str(e)}', 'error')
-        finally:
-            conn.close()
             
         return redirect(url_for('index'))
     
     return render_template('sifre_degistir.html')
 
+# Liste sıralamaları: (keyset sütunları, azalan); hepsi index üzerinden okunur
+STOK_SIRALAMALARI = {
+    'ad': (('u.urun_adi', 'u.id'), False),
+    'ad_azalan': (('u.urun_adi', 'u.id'), True),
+    'yeni': (('u.id',), True),
+    'toplam_azalan': (('o.toplam_stok', 'o.urun_id'), True),
+    'toplam': (('o.toplam_stok', 'o.urun_id'), False),
+}
+
+def liste_anahtari(sutunlar):
+    """Keyset sütunlarından ('u.urun_adi', ...) satırın imleç değerlerini okuyan fonksiyon"""
+    adlar = tuple(sutun.split('.')[1] for sutun in sutunlar)
+    return lambda satir: tuple(satir[ad] for ad in adlar)
+
+def istek_anahtari():
+    """Sonuç önbelleği anahtarı: route ve sıralanmış sorgu parametreleri"""
+    return (request.endpoint, tuple(sorted(request.args.items(multi=True))))
+
+# Seçili depodaki stok durumuna göre filtreler
+STOK_DURUMLARI = {
+    'stokta': 'sd.miktar > 0',
+    'yeterli': 'sd.miktar > 10',
+    'dusuk': 'sd.miktar > 0 AND sd.miktar <= 10',
+    'kritik': 'sd.miktar > 0 AND sd.miktar <= 5',
+    'yok': 'COALESCE(sd.miktar, 0) = 0',
+}
+
 # Stok listesi
 @app.route('/stok')
 @login_required
 def stok_listesi():
     conn = get_db_connection()
     
-    # Depo bilgilerini al
-    depolar = conn.execute('SELECT * FROM depo WHERE aktif = 1').fetchall()
-    
-    # Seçili depo
-    secili_depo_id = request.args.get('depo_id', '1')
-    
-    # Stok bilgilerini al (tüm depolar dahil)
-    stoklar = conn.execute('''
-        SELECT 
-            u.id,
-            u.urun_adi,
-            u.jant_ebati,
-            COALESCE(u.desi, 0.00) as desi,
-            u.barkod,
-            us.miktar as stok_adedi,
-            d.depo_adi,
-            us.depo_id
-        FROM urun u
-        LEFT JOIN urun_stok us ON u.id = us.urun_id AND us.depo_id = ?
-        LEFT JOIN depo d ON us.depo_id = d.id
-        ORDER BY u.urun_adi
-    ''', (secili_depo_id,)).fetchall()
-    
-    # Toplam stok bilgilerini hesapla (tüm depolar)
-    toplam_stoklar = conn.execute('''
-        SELECT 
-            u.id,
-            u.urun_adi,
-            COALESCE(u.desi, 0.00) as desi,
-            SUM(COALESCE(us.miktar, 0)) as toplam_stok,
-            COUNT(us.depo_id) as depo_sayisi,
-            GROUP_CONCAT(d.depo_adi || ': ' || COALESCE(us.miktar, 0)) as depo_detay
-        FROM urun u
-        LEFT JOIN urun_stok us ON u.id = us.urun_id
-        LEFT JOIN depo d ON us.depo_id = d.id
-        GROUP BY u.id, u.urun_adi
-        ORDER BY u.urun_adi
-    ''').fetchall()
-    
+    # Depo bilgileri referans önbelleğinden okunur
+    referans = reference_data.getir(conn)
+    depolar = referans.aktif_depolar
+    
+    # Seçili depo ve filtreler
+    secili_depo_id = request.args.get('depo_id', '1', type=int)
+    arama = request.args.get('arama', '').strip()
+    durum = request.args.get('durum', '')
+    siralama = request.args.get('siralama', 'ad')
+    if siralama not in STOK_SIRALAMALARI:
+        siralama = 'ad'
+    sutunlar, azalan = STOK_SIRALAMALARI[siralama]
+    boyut = pagination.sayfa_boyutu(request.args.get('sayfa_boyutu'))
+
+    # Sadece görünen sayfanın ürünleri seçilir, toplamlar bu ürünler için hesaplanır
+    kosullar, params = ['1'], [secili_depo_id]
+    if arama:
+        fts_kosul, fts_params = urun_fts_kosulu(arama)
+        if fts_kosul:
+            kosullar.append(f'u.id IN (SELECT rowid FROM urun_fts WHERE {fts_kosul})')
+            params.extend(fts_params)
+        else:
+            kosullar.append('(u.urun_adi LIKE ? OR u.barkod LIKE ? OR u.jant_ebati LIKE ?)')
+            params.extend([f'%{arama}%'] * 3)
+    if durum in STOK_DURUMLARI:
+        kosullar.append(STOK_DURUMLARI[durum])
+
+    geri = bool(request.args.get('onceki'))
+    imlec = pagination.imlec_coz(request.args.get('onceki') or request.args.get('sonraki'), len(sutunlar))
+    sorgu_azalan = pagination.yon(azalan, geri)
+    if imlec:
+        keyset, keyset_params = pagination.keyset_kosulu(sutunlar, imlec, sorgu_azalan)
+        kosullar.append(keyset)
+        params.extend(keyset_params)
+
+    def sayfa():
+        # Toplamlar urun_stok_ozet'ten okunur; depo dağılımı sadece sayfadaki ürünler için toplanır
+        stoklar, sonraki, onceki = pagination.sayfa_sonucu(conn.execute(f'''
+            SELECT u.id, o.urun_id, u.urun_adi, u.jant_ebati, COALESCE(u.desi, 0.00) as desi, u.barkod,
+                   sd.miktar as stok_adedi, o.toplam_stok, o.depo_sayisi,
+                   (SELECT GROUP_CONCAT(d.depo_adi || ': ' || COALESCE(us.miktar, 0))
+                    FROM urun_stok us JOIN depo d ON us.depo_id = d.id
+                    WHERE us.urun_id = u.id) as depo_detay
+            FROM urun u
+            JOIN urun_stok_ozet o ON o.urun_id = u.id
+            LEFT JOIN urun_stok sd ON sd.urun_id = u.id AND sd.depo_id = ?
+            WHERE {' AND '.join(kosullar)}
+            ORDER BY {pagination.siralama_ifadesi(sutunlar, sorgu_azalan)}
+            LIMIT ?
+        ''', (*params, boyut + 1)), boyut, liste_anahtari(sutunlar), geri, imlec is not None)
+
+        # Seçili depodaki toplam istatistikler (depo index'i üzerinden, ürün tablosu taranmaz)
+        depo_istatistik = dict(conn.execute('''
+            SELECT 
+                (SELECT COUNT(*) FROM urun) as toplam_urun,
+                COUNT(CASE WHEN miktar > 0 THEN 1 END) as stokta_olan,
+                COUNT(CASE WHEN miktar > 10 THEN 1 END) as yeterli,
+                COUNT(CASE WHEN miktar > 0 AND miktar <= 10 THEN 1 END) as dusuk,
+                COALESCE(SUM(miktar), 0) as toplam_stok_adedi
+            FROM urun_stok
+            WHERE depo_id = ?
+        ''', (secili_depo_id,)).fetchone())
+        depo_istatistik['stokta_olmayan'] = depo_istatistik['toplam_urun'] - depo_istatistik['stokta_olan']
+        return stoklar, sonraki, onceki, depo_istatistik
+
+    # Sonuç, stok veya ürünlere yazılana kadar (hangi worker'da olursa olsun) önbellekten gelir
+    stoklar, sonraki, onceki, depo_istatistik = result_cache.getir(
+        conn, istek_anahtari(), ('urun', 'urun_stok', 'depo'), sayfa)
+
     # Seçili depo bilgisi
-    secili_depo = conn.execute('SELECT * FROM depo WHERE id = ?', (secili_depo_id,)).fetchone()
-    
-    # Seçili depodaki toplam istatistikler
-    depo_istatistik = conn.execute('''
-        SELECT 
-            COUNT(*) as toplam_urun,
-            SUM(CASE WHEN us.miktar > 0 THEN 1 ELSE 0 END) as stokta_olan,
-            SUM(CASE WHEN us.miktar = 0 OR us.miktar IS NULL THEN 1 ELSE 0 END) as stokta_olmayan,
-            SUM(COALESCE(us.miktar, 0)) as toplam_stok_adedi
-        FROM urun u
-        LEFT JOIN urun_stok us ON u.id = us.urun_id AND us.depo_id = ?
-    ''', (secili_depo_id,)).fetchone()
-    
-    conn.close()
+    secili_depo = referans.depo(secili_depo_id)
     
     return render_template('stok_listesi.html', 
                          stoklar=stoklar, 
                          depolar=depolar, 
-                         secili_depo_id=int(secili_depo_id),
+                         secili_depo_id=secili_depo_id,
                          secili_depo=secili_depo,
-                         toplam_stoklar=toplam_stoklar,
-                         depo_istatistik=depo_istatistik)
+                         depo_istatistik=depo_istatistik,
+                         arama=arama,
+                         durum=durum,
+                         siralama=siralama,
+                         sayfa_boyutu=boyut,
+                         sonraki=sonraki,
+                         onceki=onceki)
 
 # Ürün arama (AJAX)
 @app.route('/api/urun_ara')
@@ -241,8 +347,23 @@ def urun_ara():
         return jsonify([])
     
     conn = get_db_connection()
-    
-    if depo_id:
+    urun_idleri = None
+    if database.schema.has_table('urun_fts'):
+        urun_idleri = product_search.eslesen_urun_idleri(conn, arama_terimi, limit=10)
+    
+    if urun_idleri is not None:
+        # Trigram index ile bulunan ürünler, en iyi eşleşmeler önce
+        yer_tutucular = ', '.join('?' * len(urun_idleri))
+        satirlar = conn.execute(f'''
+            SELECT u.id, u.urun_adi, u.barkod, u.jant_ebati, COALESCE(u.desi, 0.00) as desi,
+                   COALESCE(us.miktar, 0) as stok_adedi
+            FROM urun u
+            LEFT JOIN urun_stok us ON u.id = us.urun_id AND us.depo_id = ?
+            WHERE u.id IN ({yer_tutucular})
+        ''', (depo_id, *urun_idleri)).fetchall()
+        sira = {urun_id: i for i, urun_id in enumerate(urun_idleri)}
+        urunler = sorted(satirlar, key=lambda urun: sira[urun['id']])
+    elif depo_id:
         # Depoya göre stok bilgisi ile birlikte ara
         urunler = conn.execute('''
             SELECT u.id, u.urun_adi, u.barkod, u.jant_ebati, COALESCE(u.desi, 0.00) as desi,
@@ -263,13 +384,68 @@ def urun_ara():
             LIMIT 10
         ''', (f'%{arama_terimi}%', f'%{arama_terimi}%')).fetchall()
     
-    conn.close()
-    
     return jsonify([dict(urun) for urun in urunler])
 
+URUN_SECIM_SAYFA_BOYUTU = 20
+
+# Stok işlem sayfasındaki ürün seçicileri (önek araması, sayfalı)
+@app.route('/api/urun_secim')
+@login_required
+def urun_secim():
+    """Ada veya barkoda göre önek araması; (arama_adi, id) üzerinden keyset sayfalama
+
+    Rakamlardan oluşan terim barkod önekiyle, diğerleri Türkçe katlanmış ad
+    önekiyle aranır. Her iki durumda da sorgu index'te aralık taramasıdır.
+    """
+    terim = request.args.get('q', '').strip()
+    depo_id = request.args.get('depo_id') or None
+    boyut = pagination.sayfa_boyutu(request.args.get('sayfa_boyutu'), URUN_SECIM_SAYFA_BOYUTU)
+
+    if terim.isdigit():
+        sutunlar = ('u.barkod', 'u.id')
+        onek = terim
+    else:
+        sutunlar = ('u.arama_adi', 'u.id')
+        onek = product_search.katla(terim)
+
+    kosullar, params = [], []
+    if onek:
+        kosullar.append(f'{sutunlar[0]} >= ? AND {sutunlar[0]} < ? || char(1114111)')
+        params += [onek, onek]
+    imlec = pagination.imlec_coz(request.args.get('sonraki'), len(sutunlar))
+    if imlec:
+        kosul, imlec_params = pagination.keyset_kosulu(sutunlar, imlec, False)
+        kosullar.append(kosul)
+        params += imlec_params
+    where = ' AND '.join(kosullar) or '1'
+
+    conn = get_db_connection()
+    satirlar = conn.execute(f'''
+        SELECT u.id, u.urun_adi, u.arama_adi, u.barkod, u.jant_ebati,
+               COALESCE(us.miktar, 0) as stok_adedi
+        FROM urun u
+        LEFT JOIN urun_stok us ON us.urun_id = u.id AND us.depo_id = ?
+        WHERE {where}
+        ORDER BY {pagination.siralama_ifadesi(sutunlar, False)}
+        LIMIT ?
+    ''', (depo_id, *params, boyut + 1)).fetchall()
+    urunler, sonraki, _ = pagination.sayfa_sonucu(satirlar, boyut, liste_anahtari(sutunlar), False, bool(imlec))
+
+    return jsonify({
+        'urunler': [{
+            'id': urun['id'],
+            'urun_adi': urun['urun_adi'],
+            'barkod': urun['barkod'],
+            'jant_ebati': urun['jant_ebati'],
+            'stok_adedi': urun['stok_adedi'],
+        } for urun in urunler],
+        'sonraki': sonraki,
+    })
+
 # Ürün stok durumu (AJAX)
 @app.route('/api/urun_stok_durumu/<int:urun_id>')
 @login_required
+@surum_etagi('urun_stok', 'depo')
 def urun_stok_durumu(urun_id):
     conn = get_db_connection()
     
@@ -283,11 +459,104 @@ def urun_stok_durumu(urun_id):
         ORDER BY d.depo_adi
     ''', (urun_id,)).fetchall()
     
-    conn.close()
-    
     return jsonify([dict(stok) for stok in stoklar])
 
+# Barkod okutma (el terminalleri)
+BARKOD_OKUTMA_SINIRI = 200
+
+@app.route('/api/barkod_okut', methods=['GET', 'POST'])
+@login_required
+def barkod_okut():
+    """Barkodları tam eşleşme ile bulur, ürün ve depo bazlı stokları tek istekte döndürür
+
+    GET  /api/barkod_okut?barkod=869...&barkod=869...   (virgülle ayrılmış da olabilir)
+    POST /api/barkod_okut  {"barkodlar": ["869...", "869..."]}
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        ham = data.get('barkodlar') or ([data['barkod']] if data.get('barkod') else [])
+    else:
+        ham = [parca for deger in request.args.getlist('barkod') for parca in deger.split(',')]
+
+    # Okuyucuların eklediği boşlukları temizle, sırayı koruyarak tekrarları at
+    barkodlar = list(dict.fromkeys(str(barkod).strip() for barkod in ham if str(barkod).strip()))
+    if not barkodlar:
+        return jsonify({'success': False, 'message': 'Barkod gerekli!'}), 400
+    if len(barkodlar) > BARKOD_OKUTMA_SINIRI:
+        return jsonify({
+            'success': False,
+            'message': f'Tek istekte en fazla {BARKOD_OKUTMA_SINIRI} barkod okutulabilir!'
+        }), 400
+
+    conn = get_db_connection()
+    yer_tutucular = ', '.join('?' * len(barkodlar))
+    satirlar = conn.execute(f'''
+        SELECT u.id, u.urun_adi, u.barkod, u.jant_ebati, COALESCE(u.desi, 0.00) as desi,
+               d.id as depo_id, d.depo_adi, COALESCE(us.miktar, 0) as stok_adedi
+        FROM urun u
+        JOIN depo d ON d.aktif = 1
+        LEFT JOIN urun_stok us ON us.urun_id = u.id AND us.depo_id = d.id
+        WHERE u.barkod IN ({yer_tutucular})
+        ORDER BY u.id, d.depo_adi
+    ''', barkodlar).fetchall()
+
+    urunler = {}
+    for satir in satirlar:
+        urun = urunler.setdefault(satir['barkod'], {
+            'id': satir['id'],
+            'urun_adi': satir['urun_adi'],
+            'barkod': satir['barkod'],
+            'jant_ebati': satir['jant_ebati'],
+            'desi': satir['desi'],
+            'toplam_stok': 0,
+            'stoklar': []
+        })
+        urun['stoklar'].append({
+            'depo_id': satir['depo_id'],
+            'depo_adi': satir['depo_adi'],
+            'stok_adedi': satir['stok_adedi']
+        })
+        urun['toplam_stok'] += satir['stok_adedi']
+
+    return jsonify({
+        'success': True,
+        'urunler': [urunler[barkod] for barkod in barkodlar if barkod in urunler],
+        'bulunamayanlar': [barkod for barkod in barkodlar if barkod not in urunler]
+    })
+
 # Fiş listesi
+FIS_ANAHTARI = ('f.tarih', 'f.id')
+
+def fis_filtreleri(args):
+    """İstekten fiş listesi filtrelerini okur; tarih hatalıysa ValueError"""
+    filtreler = {
+        'depo_id': args.get('depo_id', type=int),
+        'platform_id': args.get('platform_id', type=int),
+        'baslangic': args.get('baslangic', '').strip(),
+        'bitis': args.get('bitis', '').strip(),
+    }
+    for alan in ('baslangic', 'bitis'):
+        if filtreler[alan]:
+            gun_araligi(filtreler[alan])
+    return filtreler
+
+def fis_kosullari(filtreler):
+    """Fiş filtrelerinden WHERE koşulları ve parametreleri (depo/platform, tarih index'leri)"""
+    kosullar, params = [], []
+    if filtreler['depo_id']:
+        kosullar.append('f.depo_id = ?')
+        params.append(filtreler['depo_id'])
+    if filtreler['platform_id']:
+        kosullar.append('f.platform_id = ?')
+        params.append(filtreler['platform_id'])
+    if filtreler['baslangic']:
+        kosullar.append('f.tarih >= ?')
+        params.append(gun_araligi(filtreler['baslangic'])[0])
+    if filtreler['bitis']:
+        kosullar.append('f.tarih < ?')
+        params.append(gun_araligi(filtreler['bitis'])[1])
+    return kosullar, params
+
 @app.route('/fisler')
 @app.route('/fis_listesi')  # Ek route ekleyelim
 @login_required 
@@ -296,70 +565,61 @@ def fis_listesi():
     conn = get_db_connection()
     
     try:
-        # Önce tabloların varlığını kontrol et
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='stok_cikis_fis'")
-        if not cursor.fetchone():
-            # Tablo yoksa oluştur
-            conn.execute('''
-                CREATE TABLE stok_cikis_fis (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    fis_no VARCHAR(50) NOT NULL UNIQUE,
-                    tarih DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    depo_id INTEGER NOT NULL,
-                    aciklama TEXT,
-                    toplam_urun_adedi INTEGER DEFAULT 0,
-                    toplam_adet INTEGER DEFAULT 0,
-                    kullanici_id INTEGER,
-                    kullanici_adi VARCHAR(50),
-                    durum VARCHAR(20) DEFAULT 'TAMAMLANDI',
-                    FOREIGN KEY (depo_id) REFERENCES depo (id),
-                    FOREIGN KEY (kullanici_id) REFERENCES kullanici (id)
-                )
-            ''')
-            conn.commit()
-        
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='stok_cikis_fis_detay'")
-        if not cursor.fetchone():
-            # Detay tablosu yoksa oluştur
-            conn.execute('''
-                CREATE TABLE stok_cikis_fis_detay (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    fis_id INTEGER NOT NULL,
-                    urun_id INTEGER NOT NULL,
-                    urun_adi VARCHAR(200),
-                    cikis_adedi INTEGER NOT NULL,
-                    birim_desi DECIMAL(8,2),
-                    toplam_desi DECIMAL(8,2),
-                    kargo_firmasi_id INTEGER,
-                    FOREIGN KEY (fis_id) REFERENCES stok_cikis_fis (id),
-                    FOREIGN KEY (urun_id) REFERENCES urun (id),
-                    FOREIGN KEY (kargo_firmasi_id) REFERENCES kargo_firmasi (id)
-                )
-            ''')
-            conn.commit()
-        
-        fisler = conn.execute('''
+        filtreler = fis_filtreleri(request.args)
+    except ValueError:
+        flash('Geçersiz tarih formatı! (YYYY-AA-GG)', 'error')
+        return redirect(url_for('fis_listesi', depo_id=request.args.get('depo_id', type=int),
+                                platform_id=request.args.get('platform_id', type=int)))
+    boyut = pagination.sayfa_boyutu(request.args.get('sayfa_boyutu'), 100)
+
+    # Satır sayısı ve toplam desi fiş başlığında; detay tablosu okunmaz
+    kosullar, params = fis_kosullari(filtreler)
+
+    geri = bool(request.args.get('onceki'))
+    imlec = pagination.imlec_coz(request.args.get('onceki') or request.args.get('sonraki'), len(FIS_ANAHTARI))
+    sorgu_azalan = pagination.yon(True, geri)
+    if imlec:
+        keyset, keyset_params = pagination.keyset_kosulu(FIS_ANAHTARI, imlec, sorgu_azalan)
+        kosullar.append(keyset)
+        params.extend(keyset_params)
+
+    def sayfa():
+        return pagination.sayfa_sonucu(conn.execute(f'''
             SELECT 
                 f.*,
                 d.depo_adi,
-                COUNT(fd.id) as urun_cesit_sayisi,
-                SUM(fd.toplam_desi) as toplam_desi
+                p.platform_adi,
+                f.toplam_urun_adedi as urun_cesit_sayisi
             FROM stok_cikis_fis f
             LEFT JOIN depo d ON f.depo_id = d.id
-            LEFT JOIN stok_cikis_fis_detay fd ON f.id = fd.fis_id
-            GROUP BY f.id
-            ORDER BY f.tarih DESC
-            LIMIT 100
-        ''').fetchall()
+            LEFT JOIN platform p ON f.platform_id = p.id
+            WHERE {' AND '.join(kosullar) or '1'}
+            ORDER BY {pagination.siralama_ifadesi(FIS_ANAHTARI, sorgu_azalan)}
+            LIMIT ?
+        ''', (*params, boyut + 1)), boyut, liste_anahtari(FIS_ANAHTARI), geri, imlec is not None)
+
+    try:
+        fisler, sonraki, onceki = result_cache.getir(
+            conn, istek_anahtari(), ('stok_cikis_fis', 'depo', 'platform'), sayfa)
+        referans = reference_data.getir(conn)
+        depolar, platformlar = referans.depolar, referans.platformlar
         
     except Exception as e:
         flash(f'Fiş listesi yüklenirken hata: {str(e)}', 'error')
-        fisler = []
-    finally:
-        conn.close()
+        fisler, sonraki, onceki = [], None, None
+        depolar = platformlar = []
     
-    return render_template('fis_listesi.html', fisler=fisler)
+    return render_template('fis_listesi.html',
+                         fisler=fisler,
+                         depolar=depolar,
+                         platformlar=platformlar,
+                         depo_id=filtreler['depo_id'],
+                         platform_id=filtreler['platform_id'],
+                         baslangic=filtreler['baslangic'],
+                         bitis=filtreler['bitis'],
+                         sayfa_boyutu=boyut,
+                         sonraki=sonraki,
+                         onceki=onceki)
 
 # Fiş detayı
 @app.route('/fis/<int:fis_id>')
@@ -388,29 +648,246 @@ def fis_detay(fis_id):
         ORDER BY fd.urun_adi
     ''', (fis_id,)).fetchall()
     
-    conn.close()
-    
     return render_template('fis_detay.html', fis=fis, detaylar=detaylar)
 
 # İşlem geçmişi
+# İşlem geçmişi filtresindeki tipler; eski kayıtlardaki farklı yazımlar da eşleşir
+GECMIS_ISLEM_TIPLERI = {
+    'STOK_GIRIS': ('Stok Girişi', ('STOK_GIRIS', 'STOK_GIRISI')),
+    'STOK_CIKIS': ('Stok Çıkışı', ('STOK_CIKIS', 'STOK_CIKISI')),
+    'DEPO_TRANSFER': ('Depo Transferi', ('DEPO_TRANSFER', 'TRANSFER')),
+    'URUN_EKLEME': ('Ürün Ekleme', ('URUN_EKLEME',)),
+    'URUN_GUNCELLEME': ('Ürün Güncelleme', ('URUN_GUNCELLEME',)),
+    'URUN_SILME': ('Ürün Silme', ('URUN_SILME',)),
+    'SIFRE_DEGISTIRME': ('Şifre Değiştirme', ('SIFRE_DEGISTIRME',)),
+    'SIFRE_SIFIRLAMA': ('Şifre Sıfırlama', ('SIFRE_SIFIRLAMA',)),
+}
+
+GECMIS_ANAHTARI = ('ig.tarih', 'ig.id')
+GECMIS_SAYFA_BOYUTU = 100
+
+def gecmis_filtreleri(args):
+    """İstekten işlem geçmişi filtrelerini okur; tarih hatalıysa ValueError"""
+    filtreler = {
+        'urun_id': args.get('urun_id', type=int),
+        'depo_id': args.get('depo_id', type=int),
+        'kullanici_id': args.get('kullanici_id', type=int),
+        'islem_tipi': args.get('islem_tipi', ''),
+        'baslangic': args.get('baslangic', '').strip(),
+        'bitis': args.get('bitis', '').strip(),
+    }
+    if filtreler['islem_tipi'] not in GECMIS_ISLEM_TIPLERI:
+        filtreler['islem_tipi'] = ''
+    for alan in ('baslangic', 'bitis'):
+        if filtreler[alan]:
+            gun_araligi(filtreler[alan])
+    return filtreler
+
+def islem_gecmisi_kollari(filtreler, azalan=True, imlec=None):
+    """Filtrelenmiş geçmiş için (sql, params) kolları; her kol (tarih, id) sırasıyla okunur
+
+    İşlem tipinin her yazımı ve depo filtresinin kaynak/hedef sütunları ayrı
+    kollar olarak (filtre sütunu, tarih) index'lerinden sıralı okunur ve
+    çağıranda birleştirilir. OR/IN koşulları bu yüzden tüm eşleşmelerin
+    sıralanmasına yol açmaz.
+    """
+    ortak, ortak_params = [], []
+    for sutun in ('urun_id', 'kullanici_id'):
+        if filtreler[sutun]:
+            ortak.append(f'ig.{sutun} = ?')
+            ortak_params.append(filtreler[sutun])
+    if filtreler['baslangic']:
+        ortak.append('ig.tarih >= ?')
+        ortak_params.append(gun_araligi(filtreler['baslangic'])[0])
+    if filtreler['bitis']:
+        ortak.append('ig.tarih < ?')
+        ortak_params.append(gun_araligi(filtreler['bitis'])[1])
+
+    if imlec:
+        keyset, keyset_params = pagination.keyset_kosulu(GECMIS_ANAHTARI, imlec, azalan)
+        ortak.append(keyset)
+        ortak_params.extend(keyset_params)
+
+    kollar = [([], [])]
+    if filtreler['islem_tipi']:
+        yazimlar = GECMIS_ISLEM_TIPLERI[filtreler['islem_tipi']][1]
+        kollar = [(['ig.islem_tipi = ?'], [yazim]) for yazim in yazimlar]
+    if filtreler['depo_id']:
+        # hedef_depo_id sadece transfer kayıtlarında dolu; diğer tiplerde o kol boş taramadır
+        depo_sutunlari = ('depo_id', 'hedef_depo_id')
+        if filtreler['islem_tipi'] not in ('', 'DEPO_TRANSFER'):
+            depo_sutunlari = ('depo_id',)
+        kollar = [(kosullar + [f'ig.{sutun} = ?'], params + [filtreler['depo_id']])
+                  for kosullar, params in kollar for sutun in depo_sutunlari]
+
+    return [(f'''
+            SELECT ig.*, d.depo_adi, hd.depo_adi as hedef_depo_adi
+            FROM islem_gecmisi ig
+            LEFT JOIN depo d ON ig.depo_id = d.id
+            LEFT JOIN depo hd ON ig.hedef_depo_id = hd.id
+            WHERE {' AND '.join(kosullar + ortak) or '1'}
+            ORDER BY {pagination.siralama_ifadesi(GECMIS_ANAHTARI, azalan)}
+        ''', params + ortak_params) for kosullar, params in kollar]
+
+def islem_gecmisi_sayfasi(conn, filtreler, sonraki=None, onceki=None, boyut=GECMIS_SAYFA_BOYUTU):
+    """Filtrelenmiş geçmişten (tarih, id) azalan sırada bir sayfa: (satırlar, sonraki, önceki)
+
+    Her koldan en fazla boyut + 1 satır alınıp Python'da birleştirilir.
+    """
+    geri = bool(onceki)
+    imlec = pagination.imlec_coz(onceki or sonraki, len(GECMIS_ANAHTARI))
+    sorgu_azalan = pagination.yon(True, geri)
+
+    satirlar = {}
+    for sql, params in islem_gecmisi_kollari(filtreler, sorgu_azalan, imlec):
+        for satir in conn.execute(sql + ' LIMIT ?', (*params, boyut + 1)):
+            satirlar[satir['id']] = satir
+
+    anahtar = liste_anahtari(GECMIS_ANAHTARI)
+    birlesik = sorted(satirlar.values(), key=anahtar, reverse=sorgu_azalan)[:boyut + 1]
+    return pagination.sayfa_sonucu(birlesik, boyut, anahtar, geri, imlec is not None)
+
 @app.route('/gecmis')
 @login_required
 def islem_gecmisi():
     conn = get_db_connection()
-    
-    gecmis = conn.execute('''
-        SELECT 
-            ig.*,
-            d.depo_adi
-        FROM islem_gecmisi ig
-        LEFT JOIN depo d ON ig.depo_id = d.id
-        ORDER BY ig.tarih DESC
-        LIMIT 100
-    ''').fetchall()
-    
-    conn.close()
-    
-    return render_template('islem_gecmisi.html', gecmis=gecmis)
+    try:
+        filtreler = gecmis_filtreleri(request.args)
+    except ValueError:
+        flash('Geçersiz tarih formatı! (YYYY-AA-GG)', 'error')
+        args = request.args.copy()
+        args.pop('baslangic', None)
+        args.pop('bitis', None)
+        filtreler = gecmis_filtreleri(args)
+    boyut = pagination.sayfa_boyutu(request.args.get('sayfa_boyutu'), GECMIS_SAYFA_BOYUTU)
+
+    gecmis, sonraki, onceki = islem_gecmisi_sayfasi(
+        conn, filtreler, request.args.get('sonraki'), request.args.get('onceki'), boyut)
+
+    depolar = reference_data.getir(conn).depolar
+    kullanicilar = conn.execute('SELECT id, kullanici_adi FROM kullanici ORDER BY kullanici_adi').fetchall()
+    secili_urun = None
+    if filtreler['urun_id']:
+        secili_urun = conn.execute('SELECT id, urun_adi FROM urun WHERE id = ?', (filtreler['urun_id'],)).fetchone()
+
+    return render_template('islem_gecmisi.html',
+                         gecmis=gecmis,
+                         filtreler=filtreler,
+                         islem_tipleri=GECMIS_ISLEM_TIPLERI,
+                         depolar=depolar,
+                         kullanicilar=kullanicilar,
+                         secili_urun=secili_urun,
+                         sayfa_boyutu=boyut,
+                         sonraki=sonraki,
+                         onceki=onceki)
+
+@app.route('/api/islem_gecmisi')
+@login_required
+def api_islem_gecmisi():
+    """İşlem geçmişi JSON API'si; /gecmis ile aynı filtreler ve imleçler"""
+    try:
+        filtreler = gecmis_filtreleri(request.args)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Geçersiz tarih formatı! (YYYY-AA-GG)'}), 400
+    boyut = pagination.sayfa_boyutu(request.args.get('sayfa_boyutu'), GECMIS_SAYFA_BOYUTU)
+
+    gecmis, sonraki, onceki = islem_gecmisi_sayfasi(
+        get_db_connection(), filtreler, request.args.get('sonraki'), request.args.get('onceki'), boyut)
+
+    return jsonify({
+        'success': True,
+        'islemler': [dict(islem) for islem in gecmis],
+        'sonraki': sonraki,
+        'onceki': onceki,
+    })
+
+# CSV dışa aktarım: satırlar sorgu imlecinden okundukça akıtılır, dosya bellekte biriktirilmez
+
+def csv_yaniti(dosya_adi, basliklar, satirlar):
+    """Satır üretecini indirilebilir CSV yanıtı olarak akıtır"""
+    dosya_adi = f"{dosya_adi}_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+    return Response(
+        stream_with_context(csv_export.csv_parcalari(basliklar, satirlar)),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{dosya_adi}"'}
+    )
+
+@app.route('/disa_aktar/stok')
+@login_required
+def stok_disa_aktar():
+    """Depo bazında stok; depo_id verilmezse tüm aktif depolar"""
+    conn = get_db_connection()
+    depo_id = request.args.get('depo_id', type=int)
+    if depo_id:
+        depolar = conn.execute('SELECT id, depo_adi FROM depo WHERE id = ?', (depo_id,)).fetchall()
+    else:
+        depolar = conn.execute('SELECT id, depo_adi FROM depo WHERE aktif = 1 ORDER BY depo_adi').fetchall()
+
+    def satirlar():
+        # LEFT JOIN ürünleri rowid sırasıyla tarattırır, stok (urun_id, depo_id) index'inden okunur;
+        # depoda kaydı olmayan ürünler /stok'taki gibi 0 ile yazılır
+        for depo in depolar:
+            for satir in conn.execute('''
+                SELECT u.id, u.urun_adi, u.jant_ebati, u.barkod, u.desi, COALESCE(us.miktar, 0)
+                FROM urun u
+                LEFT JOIN urun_stok us ON us.urun_id = u.id AND us.depo_id = ?
+                ORDER BY u.id
+            ''', (depo['id'],)):
+                yield (depo['depo_adi'], *satir)
+
+    return csv_yaniti('stok', ['Depo', 'Ürün ID', 'Ürün Adı', 'Jant Ebatı', 'Barkod', 'Desi', 'Miktar'],
+                      satirlar())
+
+@app.route('/disa_aktar/islem_gecmisi')
+@login_required
+def islem_gecmisi_disa_aktar():
+    """İşlem geçmişi; /gecmis ile aynı filtreler"""
+    try:
+        filtreler = gecmis_filtreleri(request.args)
+    except ValueError:
+        flash('Geçersiz tarih formatı! (YYYY-AA-GG)', 'error')
+        return redirect(url_for('islem_gecmisi'))
+    conn = get_db_connection()
+
+    # Kollar açık imleçler olarak aynı anda okunur ve sıralı birleştirilir; her kol bir kez taranır
+    imlecler = [conn.execute(sql, params) for sql, params in islem_gecmisi_kollari(filtreler)]
+    satirlar = (
+        (islem['tarih'], islem['islem_tipi'], islem['urun_id'], islem['urun_bilgisi'],
+         islem['depo_adi'], islem['hedef_depo_adi'], islem['eski_deger'], islem['yeni_deger'],
+         islem['kullanici_adi'])
+        for islem in csv_export.sirali_birlestir(imlecler, liste_anahtari(GECMIS_ANAHTARI), azalan=True)
+    )
+    return csv_yaniti('islem_gecmisi', ['Tarih', 'İşlem', 'Ürün ID', 'Ürün', 'Depo', 'Hedef Depo',
+                                        'Eski Değer', 'Yeni Değer', 'Kullanıcı'], satirlar)
+
+@app.route('/disa_aktar/fisler')
+@login_required
+def fis_disa_aktar():
+    """Stok çıkış fişleri, satır başına bir detay; /fisler ile aynı filtreler"""
+    try:
+        filtreler = fis_filtreleri(request.args)
+    except ValueError:
+        flash('Geçersiz tarih formatı! (YYYY-AA-GG)', 'error')
+        return redirect(url_for('fis_listesi'))
+    conn = get_db_connection()
+    kosullar, params = fis_kosullari(filtreler)
+
+    # Fişler tarih index'inden sıralı okunur, detaylar fis_id index'iyle eklenir; sıralama adımı yok
+    satirlar = conn.execute(f'''
+        SELECT f.fis_no, f.tarih, d.depo_adi, p.platform_adi, f.aciklama, f.kullanici_adi,
+               fd.urun_id, fd.urun_adi, fd.cikis_adedi, fd.birim_desi, fd.toplam_desi, k.firma_adi
+        FROM stok_cikis_fis f
+        JOIN stok_cikis_fis_detay fd ON fd.fis_id = f.id
+        LEFT JOIN depo d ON f.depo_id = d.id
+        LEFT JOIN platform p ON f.platform_id = p.id
+        LEFT JOIN kargo_firmasi k ON fd.kargo_firmasi_id = k.id
+        WHERE {' AND '.join(kosullar) or '1'}
+        ORDER BY {pagination.siralama_ifadesi(FIS_ANAHTARI, True)}, fd.id
+    ''', params)
+
+    return csv_yaniti('fisler', ['Fiş No', 'Tarih', 'Depo', 'Platform', 'Açıklama', 'Kullanıcı', 'Ürün ID',
+                                 'Ürün', 'Adet', 'Birim Desi', 'Toplam Desi', 'Kargo Firması'],
+                      satirlar)
 
 # Eski transfer route'u kaldırıldı - /stok_islem kullanılıyor
 
@@ -424,53 +901,16 @@ def stok_islem():
     conn = get_db_connection()
     
     try:
-        # Kargo firmasi tablosunun varlığını kontrol et
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='kargo_firmasi'")
-        if not cursor.fetchone():
-            # Tablo yoksa oluştur
-            conn.execute('''
-                CREATE TABLE kargo_firmasi (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    firma_adi VARCHAR(100) NOT NULL,
-                    kisa_adi VARCHAR(20),
-                    telefon VARCHAR(20),
-                    website VARCHAR(100),
-                    aktif BOOLEAN DEFAULT 1,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Örnek kargo firmalarını ekle
-            kargo_firmalari = [
-                'Aras Kargo', 'MNG Kargo', 'Yurtiçi Kargo', 'PTT Kargo',
-                'UPS Kargo', 'DHL Kargo', 'Sürat Kargo', 'Horoz Lojistik'
-            ]
-            for firma in kargo_firmalari:
-                conn.execute('INSERT INTO kargo_firmasi (firma_adi, kisa_adi) VALUES (?, ?)', 
-                           (firma, firma.split()[0]))
-            conn.commit()
-        
         # Get warehouses for dropdowns
-        depolar = conn.execute('SELECT * FROM depo ORDER BY depo_adi').fetchall()
-        
-        # Get products for suggestions
-        urunler = conn.execute('''
-            SELECT u.id, u.urun_adi, u.barkod 
-            FROM urun u 
-            ORDER BY u.urun_adi
-        ''').fetchall()
+        # Ürünler sayfaya gömülmez; seçiciler /api/urun_secim ile aranır
+        depolar = reference_data.getir(conn).depolar
         
     except Exception as e:
         flash(f'Stok işlem sayfası yüklenirken hata: {str(e)}', 'error')
         depolar = []
-        urunler = []
-    finally:
-        conn.close()
     
     return render_template('stok_islem.html',
-                         depolar=depolar,
-                         urunler=urunler)
+                         depolar=depolar)
 
 # Health check endpoint
 @app.route('/health')
@@ -487,52 +927,72 @@ def health_check():
 def urun_listesi():
     conn = get_db_connection()
     
-    # Arama parametresi
-    arama = request.args.get('arama', '')
-    
+    # Arama, sıralama ve sayfa parametreleri
+    arama = request.args.get('arama', '').strip()
+    siralama = request.args.get('siralama', 'ad')
+    if siralama not in STOK_SIRALAMALARI:
+        siralama = 'ad'
+    sutunlar, azalan = STOK_SIRALAMALARI[siralama]
+    boyut = pagination.sayfa_boyutu(request.args.get('sayfa_boyutu'))
+
+    kosullar, params = ['1'], []
     if arama:
-        urunler = conn.execute('''
+        fts_kosul, fts_params = urun_fts_kosulu(arama)
+        if fts_kosul:
+            kosullar.append(f'u.id IN (SELECT rowid FROM urun_fts WHERE {fts_kosul})')
+            params.extend(fts_params)
+        else:
+            kosullar.append('(u.urun_adi LIKE ? OR u.barkod LIKE ? OR u.jant_ebati LIKE ?)')
+            params.extend([f'%{arama}%'] * 3)
+
+    geri = bool(request.args.get('onceki'))
+    imlec = pagination.imlec_coz(request.args.get('onceki') or request.args.get('sonraki'), len(sutunlar))
+    sorgu_azalan = pagination.yon(azalan, geri)
+    if imlec:
+        keyset, keyset_params = pagination.keyset_kosulu(sutunlar, imlec, sorgu_azalan)
+        kosullar.append(keyset)
+        params.extend(keyset_params)
+
+    def sayfa():
+        # Toplam stok ve depo sayısı urun_stok_ozet'ten; gruplama yapılmaz
+        urunler, sonraki, onceki = pagination.sayfa_sonucu(conn.execute(f'''
             SELECT 
-                MIN(u.id) as id,
+                u.id,
+                o.urun_id,
                 u.urun_adi,
                 u.jant_ebati,
                 u.barkod,
                 u.desi,
                 u.aciklama,
-                SUM(COALESCE(us.miktar, 0)) as toplam_stok,
-                COUNT(DISTINCT us.depo_id) as depo_sayisi,
-                GROUP_CONCAT(DISTINCT d.depo_adi || ': ' || COALESCE(us.miktar, 0)) as depo_detay,
-                MAX(u.updated_at) as updated_at
+                o.toplam_stok,
+                o.depo_sayisi,
+                o.son_hareket,
+                (SELECT GROUP_CONCAT(d.depo_adi || ': ' || COALESCE(us.miktar, 0))
+                 FROM urun_stok us JOIN depo d ON us.depo_id = d.id
+                 WHERE us.urun_id = u.id) as depo_detay,
+                u.updated_at
             FROM urun u
-            LEFT JOIN urun_stok us ON u.id = us.urun_id
-            LEFT JOIN depo d ON us.depo_id = d.id
-            WHERE u.urun_adi LIKE ? OR u.barkod LIKE ? OR u.jant_ebati LIKE ?
-            GROUP BY u.urun_adi, u.jant_ebati, u.barkod, u.desi, u.aciklama
-            ORDER BY u.urun_adi
-        ''', (f'%{arama}%', f'%{arama}%', f'%{arama}%')).fetchall()
-    else:
-        urunler = conn.execute('''
+            JOIN urun_stok_ozet o ON o.urun_id = u.id
+            WHERE {' AND '.join(kosullar)}
+            ORDER BY {pagination.siralama_ifadesi(sutunlar, sorgu_azalan)}
+            LIMIT ?
+        ''', (*params, boyut + 1)), boyut, liste_anahtari(sutunlar), geri, imlec is not None)
+
+        # Katalog özeti (her alt sorgu index üzerinden)
+        katalog = dict(conn.execute('''
             SELECT 
-                MIN(u.id) as id,
-                u.urun_adi,
-                u.jant_ebati,
-                u.barkod,
-                u.desi,
-                u.aciklama,
-                SUM(COALESCE(us.miktar, 0)) as toplam_stok,
-                COUNT(DISTINCT us.depo_id) as depo_sayisi,
-                GROUP_CONCAT(DISTINCT d.depo_adi || ': ' || COALESCE(us.miktar, 0)) as depo_detay,
-                MAX(u.updated_at) as updated_at
-            FROM urun u
-            LEFT JOIN urun_stok us ON u.id = us.urun_id
-            LEFT JOIN depo d ON us.depo_id = d.id
-            GROUP BY u.urun_adi, u.jant_ebati, u.barkod, u.desi, u.aciklama
-            ORDER BY u.urun_adi
-        ''').fetchall()
-    
-    conn.close()
+                (SELECT COUNT(*) FROM urun) as toplam_urun,
+                (SELECT COUNT(*) FROM urun WHERE barkod IS NULL OR barkod IN ('', '00')) as barkodsuz,
+                (SELECT COUNT(DISTINCT jant_ebati) FROM urun) as jant_cesidi
+        ''').fetchone())
+        katalog['barkodlu'] = katalog['toplam_urun'] - katalog['barkodsuz']
+        return urunler, sonraki, onceki, katalog
+
+    urunler, sonraki, onceki, katalog = result_cache.getir(
+        conn, istek_anahtari(), ('urun', 'urun_stok', 'depo'), sayfa)
     
-    return render_template('urun_listesi.html', urunler=urunler, arama=arama)
+    return render_template('urun_listesi.html', urunler=urunler, arama=arama, katalog=katalog,
+                           siralama=siralama, sayfa_boyutu=boyut, sonraki=sonraki, onceki=onceki)
 
 # Ürün ekleme
 @app.route('/urun_ekle', methods=['GET', 'POST'])
@@ -558,7 +1018,6 @@ def urun_ekle():
         ).fetchone()
         if existing_product:
             flash(f'"{urun_adi}" ({jant_ebati}") zaten mevcut! Stok işlemleri için mevcut ürünü kullanın.', 'warning')
-            conn.close()
             return redirect(url_for('urun_listesi'))
         
         # Barkod benzersizlik kontrolü (sadece "00" değilse)
@@ -566,7 +1025,6 @@ def urun_ekle():
             existing_barcode = conn.execute('SELECT id FROM urun WHERE barkod = ?', (barkod,)).fetchone()
             if existing_barcode:
                 flash('Bu barkod zaten kullanılıyor!', 'error')
-                conn.close()
                 return redirect(url_for('urun_ekle'))
         
         try:
@@ -591,13 +1049,39 @@ def urun_ekle():
             
         except Exception as e:
             flash(f'Ürün eklenirken hata oluştu: {str(e)}', 'error')
-        finally:
-            conn.close()
             
         return redirect(url_for('urun_listesi'))
     
     return render_template('urun_ekle.html')
 
+# CSV'den toplu ürün aktarımı
+@app.route('/urun_ice_aktar', methods=['GET', 'POST'])
+@login_required
+def urun_ice_aktar():
+    """Yüklenen CSV dosyası akış olarak okunur, parçalar halinde yazılır"""
+    conn = get_db_connection()
+    depolar = reference_data.getir(conn).depolar
+    sonuc = None
+
+    if request.method == 'POST':
+        dosya = request.files.get('dosya')
+        if not dosya or not dosya.filename:
+            flash('CSV dosyası seçiniz!', 'error')
+            return redirect(url_for('urun_ice_aktar'))
+        try:
+            sonuc = product_import.ice_aktar(
+                conn, product_import.metin_akisi(dosya.stream),
+                request.form.get('depo_id', type=int),
+                session['kullanici_id'], session['kullanici_adi']
+            )
+        except (ValueError, UnicodeDecodeError) as e:
+            flash(f'Dosya okunamadı: {str(e)}', 'error')
+        else:
+            flash(f'{sonuc["eklenen"]} ürün eklendi, {sonuc["hatali"]} satır aktarılmadı.',
+                  'success' if not sonuc['hatali'] else 'warning')
+
+    return render_template('urun_ice_aktar.html', depolar=depolar, sonuc=sonuc)
+
 # Ürün güncelleme
 @app.route('/urun_guncelle/<int:id>', methods=['GET', 'POST'])
 @login_required
@@ -608,7 +1092,6 @@ def urun_guncelle(id):
     urun = conn.execute('SELECT * FROM urun WHERE id = ?', (id,)).fetchone()
     if not urun:
         flash('Ürün bulunamadı!', 'error')
-        conn.close()
         return redirect(url_for('urun_listesi'))
     
     if request.method == 'POST':
@@ -630,7 +1113,6 @@ def urun_guncelle(id):
             ).fetchone()
             if existing_barcode:
                 flash('Bu barkod başka bir ürün tarafından kullanılıyor!', 'error')
-                conn.close()
                 return redirect(url_for('urun_guncelle', id=id))
         
         try:
@@ -659,13 +1141,11 @@ def urun_guncelle(id):
             
         except Exception as e:
             flash(f'Ürün güncellenirken hata oluştu: {str(e)}', 'error')
-        finally:
-            conn.close()
             
         return redirect(url_for('urun_listesi'))
     
     # Depolar ve stok bilgilerini al
-    depolar = conn.execute('SELECT * FROM depo ORDER BY depo_adi').fetchall()
+    depolar = reference_data.getir(conn).depolar
     urun_stoklari = conn.execute('''
         SELECT us.depo_id, us.miktar, d.depo_adi
         FROM urun_stok us
@@ -674,7 +1154,6 @@ def urun_guncelle(id):
         ORDER BY d.depo_adi
     ''', (id,)).fetchall()
     
-    conn.close()
     return render_template('urun_guncelle.html', 
                          urun=urun, 
                          depolar=depolar, 
@@ -694,14 +1173,12 @@ def urun_sil(urun_id):
     urun = conn.execute('SELECT * FROM urun WHERE id = ?', (urun_id,)).fetchone()
     if not urun:
         flash('Ürün bulunamadı!', 'error')
-        conn.close()
         return redirect(url_for('urun_listesi'))
     
     # Stok kontrolü
     stok_var = conn.execute('SELECT COUNT(*) as sayac FROM urun_stok WHERE urun_id = ? AND miktar > 0', (urun_id,)).fetchone()
     if stok_var['sayac'] > 0:
         flash('Bu ürünün stokta kaydı bulunuyor! Önce stokları sıfırlamanız gerekir.', 'error')
-        conn.close()
         return redirect(url_for('urun_listesi'))
     
     try:
@@ -725,8 +1202,6 @@ def urun_sil(urun_id):
         
     except Exception as e:
         flash(f'Ürün silinirken hata oluştu: {str(e)}', 'error')
-    finally:
-        conn.close()
     
     return redirect(url_for('urun_listesi'))
 
@@ -743,7 +1218,6 @@ def kullanici_listesi():
         SELECT id, kullanici_adi, tam_ad, rol, aktif, created_at, last_login
         FROM kullanici ORDER BY kullanici_adi
     ''').fetchall()
-    conn.close()
     
     return render_template('kullanici_listesi.html', kullanicilar=kullanicilar)
 
@@ -766,7 +1240,6 @@ def kullanici_sifre_sifirla(kullanici_id):
     kullanici = conn.execute('SELECT * FROM kullanici WHERE id = ?', (kullanici_id,)).fetchone()
     if not kullanici:
         flash('Kullanıcı bulunamadı!', 'error')
-        conn.close()
         return redirect(url_for('kullanici_listesi'))
     
     try:
@@ -793,8 +1266,6 @@ def kullanici_sifre_sifirla(kullanici_id):
         
     except Exception as e:
         flash(f'Şifre sıfırlanırken hata oluştu: {str(e)}', 'error')
-    finally:
-        conn.close()
         
     return redirect(url_for('kullanici_listesi'))
 
@@ -817,7 +1288,6 @@ def depo_listesi():
         GROUP BY d.id
         ORDER BY d.depo_adi
     ''').fetchall()
-    conn.close()
     
     return render_template('depo_listesi.html', depolar=depolar)
 
@@ -854,13 +1324,12 @@ def depo_ekle():
             ''', (depo_adi, adres, telefon, email, datetime.now()))
             
             conn.commit()
+            reference_data.gecersiz_kil()
             flash(f'"{depo_adi}" deposu başarıyla eklendi!', 'success')
             return redirect(url_for('depo_listesi'))
             
         except Exception as e:
             flash(f'Depo eklenirken hata oluştu: {str(e)}', 'error')
-        finally:
-            conn.close()
     
     return render_template('depo_ekle.html')
 
@@ -901,17 +1370,15 @@ def depo_guncelle(depo_id):
             ''', (depo_adi, adres, telefon, email, aktif, depo_id))
             
             conn.commit()
+            reference_data.gecersiz_kil()
             flash(f'"{depo_adi}" deposu başarıyla güncellendi!', 'success')
             return redirect(url_for('depo_listesi'))
             
         except Exception as e:
             flash(f'Depo güncellenirken hata oluştu: {str(e)}', 'error')
-        finally:
-            conn.close()
     
     # GET request - depo bilgilerini getir
     depo = conn.execute('SELECT * FROM depo WHERE id = ?', (depo_id,)).fetchone()
-    conn.close()
     
     if not depo:
         flash('Depo bulunamadı!', 'error')
@@ -930,215 +1397,178 @@ def gunluk_rapor():
     kargo_firma_id = request.args.get('kargo_firma_id')
     platform_id = request.args.get('platform_id')
 
-    conn = get_db_connection()
     try:
-        # Giriş işlemleri (STOK_GIRISI işlemlerini al)
-        giris_query = '''
-            SELECT ig.*, u.urun_adi, u.jant_ebati, u.barkod, d.depo_adi
-            FROM islem_gecmisi ig
-            LEFT JOIN urun u ON ig.urun_id = u.id
-            LEFT JOIN depo d ON ig.depo_id = d.id
-            WHERE ig.islem_tipi = 'STOK_GIRISI' 
-            AND DATE(ig.tarih) = ?
-        '''
-        giris_params = [secili_tarih]
-        if platform_id:
-            giris_query += ' AND ig.platform_id = ?'
-            giris_params.append(platform_id)
-        giris_query += ' ORDER BY ig.tarih DESC'
-        giris_islemleri = conn.execute(giris_query, tuple(giris_params)).fetchall()
-
-        # Çıkış işlemleri (STOK_CIKISI işlemlerini al) - kargo firması ve platform filtresi
-        cikis_query = '''
-            SELECT ig.*, u.urun_adi, u.jant_ebati, u.barkod, d.depo_adi, ig.kargo_bilgisi, ig.platform_id
-            FROM islem_gecmisi ig
-            LEFT JOIN urun u ON ig.urun_id = u.id
-            LEFT JOIN depo d ON ig.depo_id = d.id
-            LEFT JOIN stok_cikis_fis f ON DATE(ig.tarih) = DATE(f.tarih) AND ig.depo_id = f.depo_id
-            LEFT JOIN stok_cikis_fis_detay fd ON f.id = fd.fis_id AND ig.urun_id = fd.urun_id
-            WHERE ig.islem_tipi = 'STOK_CIKISI'
-            AND DATE(ig.tarih) = ?
-        '''
-        cikis_params = [secili_tarih]
-        if kargo_firma_id:
-            cikis_query += ' AND fd.kargo_firmasi_id = ?'
-            cikis_params.append(kargo_firma_id)
-        if platform_id:
-            cikis_query += ' AND ig.platform_id = ?'
-            cikis_params.append(platform_id)
-        cikis_query += ' ORDER BY ig.tarih DESC'
-        cikis_islemleri = conn.execute(cikis_query, tuple(cikis_params)).fetchall()
-
-        # Transfer işlemleri (DEPO_TRANSFER işlemlerini al)
-        transfer_query = '''
-            SELECT ig.*, u.urun_adi, u.jant_ebati, u.barkod, d.depo_adi,
-                   d2.depo_adi as hedef_depo_adi
-            FROM islem_gecmisi ig
-            LEFT JOIN urun u ON ig.urun_id = u.id
-            LEFT JOIN depo d ON ig.depo_id = d.id
-            LEFT JOIN depo d2 ON ig.hedef_depo_id = d2.id
-            WHERE ig.islem_tipi = 'DEPO_TRANSFER' 
-            AND DATE(ig.tarih) = ?
-        '''
-        transfer_params = [secili_tarih]
-        if platform_id:
-            transfer_query += ' AND ig.platform_id = ?'
-            transfer_params.append(platform_id)
-        transfer_query += ' ORDER BY ig.tarih DESC'
-        transfer_islemleri = conn.execute(transfer_query, tuple(transfer_params)).fetchall()
-
-        # Kargo bazlı tarih aralıklı özet
-        kargo_ozet = conn.execute('''
-            SELECT COALESCE(kf.firma_adi, 'Kargo Belirtilmemiş') as kargo_firma,
-                   SUM(fd.cikis_adedi) as toplam_adet,
-                   COUNT(fd.id) as islem_sayisi
-            FROM stok_cikis_fis_detay fd
-            LEFT JOIN stok_cikis_fis f ON fd.fis_id = f.id
-            LEFT JOIN kargo_firmasi kf ON fd.kargo_firmasi_id = kf.id
-            WHERE DATE(f.tarih) BETWEEN ? AND ?
-            GROUP BY kf.firma_adi
-            ORDER BY toplam_adet DESC
-        ''', (baslangic_tarih, bitis_tarih)).fetchall()
-
-        # Platform bazlı tarih aralıklı özet
-        platform_ozet = conn.execute('''
-            SELECT COALESCE(p.platform_adi, 'Belirtilmemiş') as platform_adi,
-                   SUM(fd.cikis_adedi) as toplam_adet,
-                   COUNT(fd.id) as islem_sayisi
-            FROM stok_cikis_fis_detay fd
-            LEFT JOIN stok_cikis_fis f ON fd.fis_id = f.id
-            LEFT JOIN platform p ON f.platform_id = p.id
-            WHERE DATE(f.tarih) BETWEEN ? AND ?
-            GROUP BY p.platform_adi
-            ORDER BY toplam_adet DESC
-        ''', (baslangic_tarih, bitis_tarih)).fetchall()
+        gun_baslangic, gun_bitis = gun_araligi(secili_tarih)
+        aralik_baslangic, aralik_bitis = gun_araligi(baslangic_tarih, bitis_tarih)
+    except ValueError:
+        flash('Geçersiz tarih formatı! (YYYY-AA-GG)', 'error')
+        secili_tarih = baslangic_tarih = bitis_tarih = datetime.now().strftime('%Y-%m-%d')
+        gun_baslangic, gun_bitis = gun_araligi(secili_tarih)
+        aralik_baslangic, aralik_bitis = gun_baslangic, gun_bitis
 
-        # Günlük özet
-        ozet = conn.execute('''
-            SELECT 
-                islem_tipi,
-                COUNT(*) as islem_sayisi
-            FROM islem_gecmisi 
-            WHERE DATE(tarih) = ?
-            AND islem_tipi IN ('STOK_GIRISI', 'STOK_CIKISI', 'DEPO_TRANSFER')
-            GROUP BY islem_tipi
-        ''', (secili_tarih,)).fetchall()
-
-        # Kargo firmalarına göre günlük çıkış raporu (tabloların varlığını kontrol et)
-        kargo_raporu = []
-        try:
-            kargo_raporu = conn.execute('''
-                SELECT 
-                    COALESCE(kf.firma_adi, 'Kargo Belirtilmemiş') as kargo_firma,
-                    COUNT(DISTINCT fd.fis_id) as fis_sayisi,
-                    COUNT(fd.id) as urun_cesit_sayisi,
-                    SUM(fd.cikis_adedi) as toplam_adet,
-                    ROUND(COALESCE(SUM(fd.toplam_desi), 0), 2) as toplam_desi
-                FROM stok_cikis_fis_detay fd
-                LEFT JOIN stok_cikis_fis f ON fd.fis_id = f.id
-                LEFT JOIN kargo_firmasi kf ON fd.kargo_firmasi_id = kf.id
-                WHERE DATE(f.tarih) BETWEEN ? AND ?
-                GROUP BY kf.firma_adi
-                ORDER BY toplam_adet DESC
-            ''', (baslangic_tarih, bitis_tarih)).fetchall()
-        except Exception as e:
-            print(f"Kargo raporu hatası: {e}")
+    conn = get_db_connection()
+    # Giriş işlemleri (STOK_GIRISI işlemlerini al)
+    giris_query = '''
+        SELECT ig.*, u.urun_adi, u.jant_ebati, u.barkod, d.depo_adi
+        FROM islem_gecmisi ig
+        LEFT JOIN urun u ON ig.urun_id = u.id
+        LEFT JOIN depo d ON ig.depo_id = d.id
+        WHERE ig.islem_tipi IN ('STOK_GIRIS', 'STOK_GIRISI')
+        AND ig.tarih >= ? AND ig.tarih < ?
+    '''
+    giris_params = [gun_baslangic, gun_bitis]
+    if platform_id:
+        giris_query += ' AND ig.platform_id = ?'
+        giris_params.append(platform_id)
+    giris_query += ' ORDER BY ig.tarih DESC'
+    giris_islemleri = conn.execute(giris_query, tuple(giris_params)).fetchall()
 
-        # Günlük fiş özeti
-        fis_ozeti = {}
-        try:
-            fis_ozeti_data = conn.execute('''
-                SELECT 
-                    COUNT(DISTINCT f.id) as toplam_fis,
-                    COUNT(fd.id) as toplam_urun_cesit,
-                    SUM(fd.cikis_adedi) as toplam_cikis_adet,
-                    ROUND(COALESCE(SUM(fd.toplam_desi), 0), 2) as toplam_desi
-                FROM stok_cikis_fis f
-                LEFT JOIN stok_cikis_fis_detay fd ON f.id = fd.fis_id
-                WHERE DATE(f.tarih) BETWEEN ? AND ?
-            ''', (baslangic_tarih, bitis_tarih)).fetchone()
-            
-            if fis_ozeti_data:
-                fis_ozeti = dict(fis_ozeti_data)
-        except Exception as e:
-            print(f"Fiş özeti hatası: {e}")
-
-        # Kargo firmaları ve platform tipleri filtre seçenekleri için
-        kargo_firmalari = conn.execute('SELECT id, firma_adi FROM kargo_firmasi WHERE aktif = 1 ORDER BY firma_adi').fetchall()
-        platformlar = conn.execute('SELECT id, platform_adi FROM platform WHERE aktif = 1 ORDER BY platform_adi').fetchall()
-
-        # Özet verilerini dictionary'e çevir
-        ozet_dict = {}
-        for o in ozet:
-            ozet_dict[o['islem_tipi']] = {
-                'islem_sayisi': o['islem_sayisi'],
-                'toplam_miktar': o['islem_sayisi']
-            }
-
-        return render_template(
-            'gunluk_rapor.html',
-            giris_islemleri=giris_islemleri,
-            cikis_islemleri=cikis_islemleri,
-            transfer_islemleri=transfer_islemleri,
-            ozet=ozet_dict,
-            kargo_raporu=kargo_raporu,
-            fis_ozeti=fis_ozeti,
-            secili_tarih=secili_tarih,
-            baslangic_tarih=baslangic_tarih,
-            bitis_tarih=bitis_tarih,
-            kargo_firmalari=kargo_firmalari,
-            platformlar=platformlar,
-            secili_kargo_firma_id=kargo_firma_id,
-            secili_platform_id=platform_id,
-            kargo_ozet=kargo_ozet,
-            platform_ozet=platform_ozet
-        )
-    finally:
-        conn.close()
+    # Çıkış işlemleri (STOK_CIKISI işlemlerini al) - kargo firması ve platform filtresi
+    cikis_query = '''
+        SELECT ig.*, u.urun_adi, u.jant_ebati, u.barkod, d.depo_adi, ig.kargo_bilgisi, ig.platform_id
+        FROM islem_gecmisi ig
+        LEFT JOIN urun u ON ig.urun_id = u.id
+        LEFT JOIN depo d ON ig.depo_id = d.id
+        LEFT JOIN stok_cikis_fis_detay fd ON fd.id = ig.fis_detay_id
+        WHERE ig.islem_tipi IN ('STOK_CIKIS', 'STOK_CIKISI')
+        AND ig.tarih >= ? AND ig.tarih < ?
+    '''
+    cikis_params = [gun_baslangic, gun_bitis]
+    if kargo_firma_id:
+        cikis_query += ' AND fd.kargo_firmasi_id = ?'
+        cikis_params.append(kargo_firma_id)
+    if platform_id:
+        cikis_query += ' AND ig.platform_id = ?'
+        cikis_params.append(platform_id)
+    cikis_query += ' ORDER BY ig.tarih DESC'
+    cikis_islemleri = conn.execute(cikis_query, tuple(cikis_params)).fetchall()
+
+    # Transfer işlemleri (DEPO_TRANSFER işlemlerini al)
+    transfer_query = '''
+        SELECT ig.*, u.urun_adi, u.jant_ebati, u.barkod, d.depo_adi,
+               d2.depo_adi as hedef_depo_adi
+        FROM islem_gecmisi ig
+        LEFT JOIN urun u ON ig.urun_id = u.id
+        LEFT JOIN depo d ON ig.depo_id = d.id
+        LEFT JOIN depo d2 ON ig.hedef_depo_id = d2.id
+        WHERE ig.islem_tipi = 'DEPO_TRANSFER'
+        AND ig.tarih >= ? AND ig.tarih < ?
+    '''
+    transfer_params = [gun_baslangic, gun_bitis]
+    if platform_id:
+        transfer_query += ' AND ig.platform_id = ?'
+        transfer_params.append(platform_id)
+    transfer_query += ' ORDER BY ig.tarih DESC'
+    transfer_islemleri = conn.execute(transfer_query, tuple(transfer_params)).fetchall()
+
+    # Kargo ve platform özetleri gunluk_cikis_ozet'ten okunur (gün başına birkaç satır)
+    kargo_raporu = conn.execute('''
+        SELECT COALESCE(kf.firma_adi, 'Kargo Belirtilmemiş') as kargo_firma,
+               SUM(o.fis_sayisi) as fis_sayisi,
+               SUM(o.satir_sayisi) as urun_cesit_sayisi,
+               SUM(o.satir_sayisi) as islem_sayisi,
+               SUM(o.toplam_adet) as toplam_adet,
+               ROUND(SUM(o.toplam_desi), 2) as toplam_desi
+        FROM gunluk_cikis_ozet o
+        LEFT JOIN kargo_firmasi kf ON o.kargo_firmasi_id = kf.id
+        WHERE o.gun >= ? AND o.gun < ?
+        GROUP BY kf.firma_adi
+        ORDER BY toplam_adet DESC
+    ''', (aralik_baslangic, aralik_bitis)).fetchall()
+    kargo_ozet = kargo_raporu
+
+    platform_ozet = conn.execute('''
+        SELECT COALESCE(p.platform_adi, 'Belirtilmemiş') as platform_adi,
+               SUM(o.toplam_adet) as toplam_adet,
+               SUM(o.satir_sayisi) as islem_sayisi
+        FROM gunluk_cikis_ozet o
+        LEFT JOIN platform p ON o.platform_id = p.id
+        WHERE o.gun >= ? AND o.gun < ?
+        GROUP BY p.platform_adi
+        ORDER BY toplam_adet DESC
+    ''', (aralik_baslangic, aralik_bitis)).fetchall()
+
+    # Günlük özet
+    ozet = conn.execute('''
+        SELECT 
+            islem_tipi,
+            COUNT(*) as islem_sayisi
+        FROM islem_gecmisi 
+        WHERE islem_tipi IN ('STOK_GIRIS', 'STOK_GIRISI', 'STOK_CIKIS', 'STOK_CIKISI', 'DEPO_TRANSFER')
+        AND tarih >= ? AND tarih < ?
+        GROUP BY islem_tipi
+    ''', (gun_baslangic, gun_bitis)).fetchall()
+
+    # Tarih aralığı fiş özeti
+    fis_ozeti = dict(conn.execute('''
+        SELECT 
+            COALESCE(SUM(fis_sayisi), 0) as toplam_fis,
+            COALESCE(SUM(satir_sayisi), 0) as toplam_urun_cesit,
+            SUM(toplam_adet) as toplam_cikis_adet,
+            ROUND(COALESCE(SUM(toplam_desi), 0), 2) as toplam_desi
+        FROM gunluk_cikis_ozet
+        WHERE gun >= ? AND gun < ?
+    ''', (aralik_baslangic, aralik_bitis)).fetchone())
+
+    # Kargo firmaları ve platform tipleri filtre seçenekleri için
+    referans = reference_data.getir(conn)
+    kargo_firmalari = referans.aktif_kargo_firmalari
+    platformlar = referans.aktif_platformlar
+
+    # Özet verilerini dictionary'e çevir
+    # Geçmiş kayıtları STOK_GIRIS/STOK_CIKIS olarak yazılır; şablon *_GIRISI/*_CIKISI anahtarlarını kullanır
+    ozet_dict = {}
+    for o in ozet:
+        tip = {'STOK_GIRIS': 'STOK_GIRISI', 'STOK_CIKIS': 'STOK_CIKISI'}.get(o['islem_tipi'], o['islem_tipi'])
+        mevcut = ozet_dict.setdefault(tip, {'islem_sayisi': 0, 'toplam_miktar': 0})
+        mevcut['islem_sayisi'] += o['islem_sayisi']
+        mevcut['toplam_miktar'] += o['islem_sayisi']
+
+    return render_template(
+        'gunluk_rapor.html',
+        giris_islemleri=giris_islemleri,
+        cikis_islemleri=cikis_islemleri,
+        transfer_islemleri=transfer_islemleri,
+        ozet=ozet_dict,
+        kargo_raporu=kargo_raporu,
+        fis_ozeti=fis_ozeti,
+        secili_tarih=secili_tarih,
+        baslangic_tarih=baslangic_tarih,
+        bitis_tarih=bitis_tarih,
+        kargo_firmalari=kargo_firmalari,
+        platformlar=platformlar,
+        secili_kargo_firma_id=kargo_firma_id,
+        secili_platform_id=platform_id,
+        kargo_ozet=kargo_ozet,
+        platform_ozet=platform_ozet
+    )
 
 # Kargo Firmalarını Listele API
 @app.route('/api/kargo_firmalari')
 @login_required
+@surum_etagi('kargo_firmasi', 'ayarlar')
 def api_kargo_firmalari():
     """Aktif kargo firmalarını listeler"""
-    conn = None
     try:
-        conn = get_db_connection()
-        
-        # Tabloyu kontrol et, yoksa oluştur
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='kargo_firmasi'")
-        if not cursor.fetchone():
-            return jsonify({
-                'firmalar': [],
-                'varsayilan_id': None,
-                'error': 'Kargo firmasi tablosu bulunamadı'
-            })
-        
-        kargo_firmalari = conn.execute('''
-            SELECT id, firma_adi, aktif
-            FROM kargo_firmasi 
-            WHERE aktif = 1 
-            ORDER BY firma_adi
-        ''').fetchall()
+        referans = reference_data.getir(get_db_connection())
         
         # Varsayılan kargo firmasını al
         varsayilan_kargo = None
         try:
-            varsayilan = conn.execute('SELECT deger FROM ayarlar WHERE anahtar = ?', ('varsayilan_kargo_firmasi_id',)).fetchone()
+            varsayilan = referans.ayar('varsayilan_kargo_firmasi_id')
             if varsayilan:
-                varsayilan_kargo = int(varsayilan['deger'])
+                varsayilan_kargo = int(varsayilan)
         except:
             pass
         
         return jsonify({
             'firmalar': [{
-                'id': firma['id'],
-                'firma_adi': firma['firma_adi'],
-                'kisa_adi': firma['firma_adi'],  # kisa_adi yerine firma_adi kullan
+                'id': firma.id,
+                'firma_adi': firma.firma_adi,
+                'kisa_adi': firma.firma_adi,  # kisa_adi yerine firma_adi kullan
                 'telefon': '',
                 'website': ''
-            } for firma in kargo_firmalari],
+            } for firma in referans.aktif_kargo_firmalari],
             'varsayilan_id': varsayilan_kargo
         })
         
@@ -1148,35 +1578,25 @@ def api_kargo_firmalari():
             'varsayilan_id': None,
             'error': f'Kargo firmaları yüklenirken hata: {str(e)}'
         }), 500
-    finally:
-        if conn:
-            conn.close()
 
 # Platform Listesi API
 @app.route('/api/platformlar')
 @login_required
+@surum_etagi('platform')
 def api_platformlar():
     """Aktif platformları listeler"""
     try:
-        conn = get_db_connection()
-        platformlar = conn.execute('''
-            SELECT id, platform_adi, platform_tipi, komisyon_orani 
-            FROM platform 
-            WHERE aktif = 1 
-            ORDER BY platform_adi
-        ''').fetchall()
+        platformlar = reference_data.getir(get_db_connection()).aktif_platformlar
         
         return jsonify([{
-            'id': platform['id'],
-            'platform_adi': platform['platform_adi'],
-            'platform_tipi': platform['platform_tipi'],
-            'komisyon_orani': platform['komisyon_orani']
+            'id': platform.id,
+            'platform_adi': platform.platform_adi,
+            'platform_tipi': platform.platform_tipi,
+            'komisyon_orani': platform.komisyon_orani
         } for platform in platformlar])
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 # Müşteri Listesi API
 @app.route('/api/musteriler')
@@ -1184,26 +1604,18 @@ def api_platformlar():
 def api_musteriler():
     """Aktif müşterileri listeler"""
     try:
-        conn = get_db_connection()
-        musteriler = conn.execute('''
-            SELECT id, musteri_adi, musteri_tipi, telefon, email 
-            FROM musteri 
-            WHERE aktif = 1 
-            ORDER BY musteri_adi
-        ''').fetchall()
+        musteriler = reference_data.getir(get_db_connection()).aktif_musteriler
         
         return jsonify([{
-            'id': musteri['id'],
-            'musteri_adi': musteri['musteri_adi'],
-            'musteri_tipi': musteri['musteri_tipi'],
-            'telefon': musteri['telefon'],
-            'email': musteri['email']
+            'id': musteri.id,
+            'musteri_adi': musteri.musteri_adi,
+            'musteri_tipi': musteri.musteri_tipi,
+            'telefon': musteri.telefon,
+            'email': musteri.email
         } for musteri in musteriler])
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 # Database Fix - Geçici route
 # Sistem Ayarları
@@ -1225,25 +1637,9 @@ def ayarlar():
     
     # Ayarları al
     ayarlar = {}
-    try:
-        ayarlar_rows = conn.execute('SELECT anahtar, deger FROM ayarlar').fetchall()
-        for row in ayarlar_rows:
-            ayarlar[row['anahtar']] = row['deger']
-    except:
-        # Ayarlar tablosu yoksa oluştur
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS ayarlar (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                anahtar VARCHAR(100) NOT NULL UNIQUE,
-                deger TEXT,
-                aciklama TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        conn.commit()
-    
-    conn.close()
+    ayarlar_rows = conn.execute('SELECT anahtar, deger FROM ayarlar').fetchall()
+    for row in ayarlar_rows:
+        ayarlar[row['anahtar']] = row['deger']
     
     return render_template('ayarlar.html', 
                          kargo_firmalari=kargo_firmalari,
@@ -1287,12 +1683,11 @@ def ayar_kaydet():
             ''', (anahtar, deger, aciklama, datetime.now(), datetime.now()))
         
         conn.commit()
+        reference_data.gecersiz_kil()
         flash('Ayar başarıyla kaydedildi!', 'success')
         
     except Exception as e:
         flash(f'Ayar kaydedilirken hata oluştu: {str(e)}', 'error')
-    finally:
-        conn.close()
     
     return redirect(url_for('ayarlar'))
 
@@ -1334,11 +1729,10 @@ def kargo_firma_kaydet():
             flash('Kargo firması başarıyla eklendi!', 'success')
         
         conn.commit()
+        reference_data.gecersiz_kil()
         
     except Exception as e:
         flash(f'Kargo firması kaydedilirken hata oluştu: {str(e)}', 'error')
-    finally:
-        conn.close()
     
     return redirect(url_for('ayarlar'))
 
@@ -1348,94 +1742,36 @@ def kargo_firma_kaydet():
 @app.route('/api/stok_cikis', methods=['POST'])
 @login_required
 def api_stok_cikis():
-    """API endpoint for stock exit operations"""
+    """API endpoint for stock exit operations
+
+    Sepet yazmadan önce bütünüyle doğrulanır (stock_moves.cikis_kaydet); bir
+    satır bile geçersizse hiçbir şey yazılmaz. Okuma ve yazma aynı
+    BEGIN IMMEDIATE işlemindedir; stok göreli ve koşullu düşülür, böylece
+    eşzamanlı çıkışlar stoğu eksiye düşüremez.
+    """
     try:
         data = request.get_json()
-        depo_id = int(data.get('depo_id'))
-        platform_id = data.get('platform_id')
-        kargo_id = data.get('kargo_id')
+        depo_id = stock_moves.tam_sayi(data.get('depo_id') or 0, 'depo')
+        platform_id = stock_moves.tam_sayi(data['platform_id'], 'platform') if data.get('platform_id') else None
+        kargo_id = stock_moves.tam_sayi(data['kargo_id'], 'kargo firması') if data.get('kargo_id') else None
         aciklama = data.get('aciklama', '')
         urunler = data.get('urunler', [])
         
         if not depo_id or not urunler:
             return jsonify({'success': False, 'message': 'Eksik bilgi!'})
-        
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Fiş numarası oluştur
-        fis_no = f"C{datetime.now().strftime('%Y%m%d%H%M%S')}{session['kullanici_id']}"
-        tarih = datetime.now()
-        toplam_urun_adedi = len(urunler)
-        toplam_adet = sum([int(u['adet']) for u in urunler])
-        durum = 'TAMAMLANDI'
-
-        # Fiş kaydı
-        cursor.execute('''
-            INSERT INTO stok_cikis_fis (fis_no, tarih, depo_id, aciklama, toplam_urun_adedi, toplam_adet, kullanici_id, kullanici_adi, durum)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (fis_no, tarih, depo_id, aciklama, toplam_urun_adedi, toplam_adet, session['kullanici_id'], session['kullanici_adi'], durum))
-        fis_id = cursor.lastrowid
-
-        for urun_data in urunler:
-            urun_id = int(urun_data['urun_id'])
-            adet = int(urun_data['adet'])
-
-            # Check stock
-            mevcut_stok = cursor.execute('''
-                SELECT miktar FROM urun_stok 
-                WHERE urun_id = ? AND depo_id = ?
-            ''', (urun_id, depo_id)).fetchone()
-
-            mevcut_miktar = mevcut_stok['miktar'] if mevcut_stok else 0
-            if mevcut_miktar < adet:
-                conn.rollback()
-                urun_info = cursor.execute('SELECT urun_adi FROM urun WHERE id = ?', (urun_id,)).fetchone()
-                return jsonify({
-                    'success': False, 
-                    'message': f'{urun_info["urun_adi"]} için yeterli stok yok! (Mevcut: {mevcut_miktar}, İstenen: {adet})'
-                })
-
-            # Update stock
-            yeni_miktar = mevcut_miktar - adet
-            cursor.execute('''
-                UPDATE urun_stok SET miktar = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE urun_id = ? AND depo_id = ?
-            ''', (yeni_miktar, urun_id, depo_id))
 
-            # Log transaction
-            urun_info = cursor.execute('SELECT urun_adi, desi FROM urun WHERE id = ?', (urun_id,)).fetchone()
-            cursor.execute('''
-                INSERT INTO islem_gecmisi (
-                    islem_tipi, urun_id, depo_id, eski_deger, yeni_deger, 
-                    urun_bilgisi, kullanici_id, kullanici_adi,
-                    platform_id, kargo_bilgisi
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                'STOK_CIKIS', urun_id, depo_id, str(mevcut_miktar), str(yeni_miktar),
-                f'{urun_info["urun_adi"]} - {aciklama}',
-                session['kullanici_id'], session['kullanici_adi'],
-                platform_id, f'Kargo ID: {kargo_id}' if kargo_id else None
-            ))
+        satirlar = stock_moves.satirlari_oku(urunler, 'adet')
 
-            # Fiş detay kaydı
-            cursor.execute('''
-                INSERT INTO stok_cikis_fis_detay (fis_id, urun_id, urun_adi, cikis_adedi, birim_desi, toplam_desi, kargo_firmasi_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                fis_id, urun_id, urun_info['urun_adi'], adet, urun_info['desi'], float(urun_info['desi']) * adet, kargo_id
-            ))
+        kullanici_id, kullanici_adi, tarih = session['kullanici_id'], session['kullanici_adi'], datetime.now()
+        fis_id, fis_no = write_queue.yaz(lambda conn: stock_moves.cikis_kaydet(
+            conn, depo_id, platform_id, kargo_id, satirlar, aciklama, kullanici_id, kullanici_adi, tarih
+        ))
+        return jsonify({'success': True, 'message': 'Stok çıkışı başarıyla tamamlandı!', 'fis_id': fis_id, 'fis_no': fis_no})
 
-        conn.commit()
-        return jsonify({'success': True, 'message': 'Stok çıkışı başarıyla tamamlandı!'})
-        
+    except stock_moves.StokHatasi as e:
+        return jsonify({'success': False, 'message': str(e)})
     except Exception as e:
-        if 'conn' in locals():
-            conn.rollback()
         return jsonify({'success': False, 'message': f'Hata: {str(e)}'})
-    finally:
-        if 'conn' in locals():
-            conn.close()
 
 @app.route('/api/stok_giris', methods=['POST'])
 @login_required
@@ -1443,149 +1779,189 @@ def api_stok_giris():
     """API endpoint for stock entry operations"""
     try:
         data = request.get_json()
-        depo_id = int(data.get('depo_id'))
-        urun_id = int(data.get('urun_id'))
-        miktar = int(data.get('miktar'))
+        depo_id = stock_moves.tam_sayi(data.get('depo_id') or 0, 'depo')
+        urun_id = stock_moves.tam_sayi(data.get('urun_id') or 0, 'ürün id')
+        miktar = stock_moves.tam_sayi(data.get('miktar') or 0, 'miktar')
         aciklama = data.get('aciklama', '')
         
         if not depo_id or not urun_id or not miktar:
             return jsonify({'success': False, 'message': 'Eksik bilgi!'})
-        
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get current stock
-        mevcut_stok = cursor.execute('''
-            SELECT miktar FROM urun_stok 
-            WHERE urun_id = ? AND depo_id = ?
-        ''', (urun_id, depo_id)).fetchone()
-        
-        eski_miktar = mevcut_stok['miktar'] if mevcut_stok else 0
-        yeni_miktar = eski_miktar + miktar
-        
-        # Update or insert stock
-        if mevcut_stok:
-            cursor.execute('''
-                UPDATE urun_stok SET miktar = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE urun_id = ? AND depo_id = ?
-            ''', (yeni_miktar, urun_id, depo_id))
-        else:
-            cursor.execute('''
+        if miktar < 0:
+            return jsonify({'success': False, 'message': "Miktar 0'dan büyük olmalı!"})
+
+        kullanici_id, kullanici_adi = session['kullanici_id'], session['kullanici_adi']
+
+        def giris(conn):
+            # Depo ve ürün yazmadan önce doğrulanır; stok göreli artırılır, satır yoksa oluşturulur
+            stock_moves.aktif_depo_dogrula(conn, depo_id)
+            urun_adi = stock_moves.urun_adlari(conn, [urun_id])[urun_id]
+            yeni_miktar = conn.execute('''
                 INSERT INTO urun_stok (urun_id, depo_id, miktar)
                 VALUES (?, ?, ?)
-            ''', (urun_id, depo_id, yeni_miktar))
-        
-        # Log transaction
-        urun_info = cursor.execute('SELECT urun_adi FROM urun WHERE id = ?', (urun_id,)).fetchone()
-        cursor.execute('''
-            INSERT INTO islem_gecmisi (
-                islem_tipi, urun_id, depo_id, eski_deger, yeni_deger, 
-                urun_bilgisi, kullanici_id, kullanici_adi
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            'STOK_GIRIS', urun_id, depo_id, str(eski_miktar), str(yeni_miktar),
-            f'{urun_info["urun_adi"]} - {aciklama}',
-            session['kullanici_id'], session['kullanici_adi']
-        ))
-        
-        conn.commit()
+                ON CONFLICT (urun_id, depo_id) DO UPDATE SET
+                    miktar = COALESCE(miktar, 0) + excluded.miktar,
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING miktar
+            ''', (urun_id, depo_id, miktar)).fetchone()['miktar']
+            eski_miktar = yeni_miktar - miktar
+
+            # Log transaction
+            conn.execute('''
+                INSERT INTO islem_gecmisi (
+                    islem_tipi, urun_id, depo_id, eski_deger, yeni_deger, 
+                    urun_bilgisi, kullanici_id, kullanici_adi
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                'STOK_GIRIS', urun_id, depo_id, str(eski_miktar), str(yeni_miktar),
+                f'{urun_adi} - {aciklama}',
+                kullanici_id, kullanici_adi
+            ))
+
+        write_queue.yaz(giris)
         return jsonify({'success': True, 'message': 'Stok girişi başarıyla tamamlandı!'})
         
+    except stock_moves.StokHatasi as e:
+        return jsonify({'success': False, 'message': str(e)})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Hata: {str(e)}'})
+
+@app.route('/api/stok_giris_toplu', methods=['POST'])
+@login_required
+def api_stok_giris_toplu():
+    """Çok satırlı stok girişi (tedarikçi teslimatı); tek işlem, tek commit
+
+    Gövde: {depo_id, aciklama, urunler: [{urun_id, miktar}, ...]}.
+    Giriş fişi oluşturulur ve fiş numarası döndürülür.
+    """
+    try:
+        data = request.get_json()
+        depo_id = stock_moves.tam_sayi(data.get('depo_id') or 0, 'depo')
+        aciklama = data.get('aciklama', '')
+        if not depo_id:
+            return jsonify({'success': False, 'message': 'Eksik bilgi!'})
+        satirlar = stock_moves.satirlari_oku(data.get('urunler'))
+
+        kullanici_id, kullanici_adi, tarih = session['kullanici_id'], session['kullanici_adi'], datetime.now()
+        fis_id, fis_no = write_queue.yaz(lambda conn: stock_moves.giris_kaydet(
+            conn, depo_id, satirlar, aciklama, kullanici_id, kullanici_adi, tarih
+        ))
+        return jsonify({
+            'success': True,
+            'message': f'{len(satirlar)} satırlık stok girişi tamamlandı!',
+            'fis_id': fis_id,
+            'fis_no': fis_no,
+        })
+
+    except stock_moves.StokHatasi as e:
+        return jsonify({'success': False, 'message': str(e)})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Hata: {str(e)}'})
+
+@app.route('/api/depo_transfer_toplu', methods=['POST'])
+@login_required
+def api_depo_transfer_toplu():
+    """Çok satırlı depo transferi; tek transfer fişi, tek işlem
+
+    Gövde: {kaynak_depo_id, hedef_depo_id, aciklama, urunler: [{urun_id, miktar}, ...]}.
+    """
+    try:
+        data = request.get_json()
+        kaynak_depo_id = stock_moves.tam_sayi(data.get('kaynak_depo_id') or 0, 'kaynak depo')
+        hedef_depo_id = stock_moves.tam_sayi(data.get('hedef_depo_id') or 0, 'hedef depo')
+        aciklama = data.get('aciklama', '')
+        if not kaynak_depo_id or not hedef_depo_id:
+            return jsonify({'success': False, 'message': 'Eksik bilgi!'})
+        satirlar = stock_moves.satirlari_oku(data.get('urunler'))
+
+        kullanici_id, kullanici_adi, tarih = session['kullanici_id'], session['kullanici_adi'], datetime.now()
+        fis_id, fis_no = write_queue.yaz(lambda conn: stock_moves.transfer_kaydet(
+            conn, kaynak_depo_id, hedef_depo_id, satirlar, aciklama, kullanici_id, kullanici_adi, tarih
+        ))
+        return jsonify({
+            'success': True,
+            'message': f'{len(satirlar)} satırlık depo transferi tamamlandı!',
+            'fis_id': fis_id,
+            'fis_no': fis_no,
+        })
+
+    except stock_moves.StokHatasi as e:
+        return jsonify({'success': False, 'message': str(e)})
     except Exception as e:
-        if 'conn' in locals():
-            conn.rollback()
         return jsonify({'success': False, 'message': f'Hata: {str(e)}'})
-    finally:
-        if 'conn' in locals():
-            conn.close()
 
 @app.route('/api/depo_transfer', methods=['POST'])
 @login_required
 def api_depo_transfer():
-    """API endpoint for warehouse transfer operations"""
+    """API endpoint for warehouse transfer operations
+
+    Kaynak stok BEGIN IMMEDIATE işlemi içinde koşullu düşülür, hedef stok upsert
+    ile artırılır; eşzamanlı transferler stoğu eksiye düşüremez.
+    """
     try:
         data = request.get_json()
-        kaynak_depo_id = int(data.get('kaynak_depo_id'))
-        hedef_depo_id = int(data.get('hedef_depo_id'))
-        urun_id = int(data.get('urun_id'))
-        miktar = int(data.get('miktar'))
+        kaynak_depo_id = stock_moves.tam_sayi(data.get('kaynak_depo_id') or 0, 'kaynak depo')
+        hedef_depo_id = stock_moves.tam_sayi(data.get('hedef_depo_id') or 0, 'hedef depo')
+        urun_id = stock_moves.tam_sayi(data.get('urun_id') or 0, 'ürün id')
+        miktar = stock_moves.tam_sayi(data.get('miktar') or 0, 'miktar')
         aciklama = data.get('aciklama', '')
         
         if not kaynak_depo_id or not hedef_depo_id or not urun_id or not miktar:
             return jsonify({'success': False, 'message': 'Eksik bilgi!'})
         
+        if miktar < 0:
+            return jsonify({'success': False, 'message': "Miktar 0'dan büyük olmalı!"})
+        
         if kaynak_depo_id == hedef_depo_id:
             return jsonify({'success': False, 'message': 'Kaynak ve hedef depo aynı olamaz!'})
-        
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Check source stock
-        kaynak_stok = cursor.execute('''
-            SELECT miktar FROM urun_stok 
-            WHERE urun_id = ? AND depo_id = ?
-        ''', (urun_id, kaynak_depo_id)).fetchone()
-        
-        kaynak_miktar = kaynak_stok['miktar'] if kaynak_stok else 0
-        if kaynak_miktar < miktar:
-            urun_info = cursor.execute('SELECT urun_adi FROM urun WHERE id = ?', (urun_id,)).fetchone()
-            return jsonify({
-                'success': False, 
-                'message': f'Kaynak depoda yeterli stok yok! (Mevcut: {kaynak_miktar}, İstenen: {miktar})'
-            })
-        
-        # Update source warehouse stock
-        yeni_kaynak_miktar = kaynak_miktar - miktar
-        cursor.execute('''
-            UPDATE urun_stok SET miktar = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE urun_id = ? AND depo_id = ?
-        ''', (yeni_kaynak_miktar, urun_id, kaynak_depo_id))
-        
-        # Update destination warehouse stock
-        hedef_stok = cursor.execute('''
-            SELECT miktar FROM urun_stok 
-            WHERE urun_id = ? AND depo_id = ?
-        ''', (urun_id, hedef_depo_id)).fetchone()
-        
-        hedef_miktar = hedef_stok['miktar'] if hedef_stok else 0
-        yeni_hedef_miktar = hedef_miktar + miktar
-        
-        if hedef_stok:
-            cursor.execute('''
-                UPDATE urun_stok SET miktar = ?, updated_at = CURRENT_TIMESTAMP
+
+        kullanici_id, kullanici_adi = session['kullanici_id'], session['kullanici_adi']
+
+        def transfer(conn):
+            # Depolar ve ürün yazmadan önce doğrulanır
+            stock_moves.aktif_depo_dogrula(conn, kaynak_depo_id, 'Kaynak depo')
+            stock_moves.aktif_depo_dogrula(conn, hedef_depo_id, 'Hedef depo')
+            urun_adi = stock_moves.urun_adlari(conn, [urun_id])[urun_id]
+
+            # Check source stock
+            kaynak_stok = conn.execute('''
+                SELECT miktar FROM urun_stok 
                 WHERE urun_id = ? AND depo_id = ?
-            ''', (yeni_hedef_miktar, urun_id, hedef_depo_id))
-        else:
-            cursor.execute('''
-                INSERT INTO urun_stok (urun_id, depo_id, miktar)
-                VALUES (?, ?, ?)
-            ''', (urun_id, hedef_depo_id, yeni_hedef_miktar))
-        
-        # Log transaction
-        urun_info = cursor.execute('SELECT urun_adi FROM urun WHERE id = ?', (urun_id,)).fetchone()
-        cursor.execute('''
-            INSERT INTO islem_gecmisi (
-                islem_tipi, urun_id, depo_id, hedef_depo_id,
-                eski_deger, yeni_deger, urun_bilgisi, 
+            ''', (urun_id, kaynak_depo_id)).fetchone()
+            kaynak_miktar = kaynak_stok['miktar'] if kaynak_stok else 0
+
+            # Kaynak stok göreli ve koşullu düşülür; yetersizse satır güncellenmez
+            if conn.execute('''
+                UPDATE urun_stok SET miktar = miktar - ?, updated_at = CURRENT_TIMESTAMP
+                WHERE urun_id = ? AND depo_id = ? AND miktar >= ?
+            ''', (miktar, urun_id, kaynak_depo_id, miktar)).rowcount != 1:
+                raise stock_moves.StokHatasi(
+                    f'Kaynak depoda yeterli stok yok! (Mevcut: {kaynak_miktar}, İstenen: {miktar})')
+            yeni_kaynak_miktar = kaynak_miktar - miktar
+
+            # Hedef depo stoğu göreli artırılır; satır yoksa oluşturulur
+            stock_moves.stok_ekle(conn, hedef_depo_id, {urun_id: miktar})
+
+            # Log transaction
+            conn.execute('''
+                INSERT INTO islem_gecmisi (
+                    islem_tipi, urun_id, depo_id, hedef_depo_id,
+                    eski_deger, yeni_deger, urun_bilgisi, 
+                    kullanici_id, kullanici_adi
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                'DEPO_TRANSFER', urun_id, kaynak_depo_id, hedef_depo_id,
+                str(kaynak_miktar), str(yeni_kaynak_miktar),
+                f'{urun_adi} - {aciklama}',
                 kullanici_id, kullanici_adi
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            'DEPO_TRANSFER', urun_id, kaynak_depo_id, hedef_depo_id,
-            str(kaynak_miktar), str(yeni_kaynak_miktar),
-            f'{urun_info["urun_adi"]} - {aciklama}',
-            session['kullanici_id'], session['kullanici_adi']
-        ))
-        
-        conn.commit()
+            ))
+
+        write_queue.yaz(transfer)
         return jsonify({'success': True, 'message': 'Depo transferi başarıyla tamamlandı!'})
-        
+
+    except stock_moves.StokHatasi as e:
+        return jsonify({'success': False, 'message': str(e)})
     except Exception as e:
-        if 'conn' in locals():
-            conn.rollback()
         return jsonify({'success': False, 'message': f'Hata: {str(e)}'})
-    finally:
-        if 'conn' in locals():
-            conn.close()
 
 if __name__ == '__main__':
     # Configuration from environment variables
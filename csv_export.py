@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+BikeStock - CSV dışa aktarım yardımcıları
+Satırlar sorgu imlecinden okunarak küçük parçalar halinde üretilir; yanıt
+Flask'ta üreteç olarak akıtılır, dosyanın tamamı bellekte tutulmaz.
+
+Çıktı Excel'in Türkçe ayarlarıyla doğrudan açılır: UTF-8 BOM, ';' ayraç.
+"""
+
+import csv
+import heapq
+import io
+
+AYRAC = ';'
+# Her yield'da gönderilen satır sayısı (çok küçük parçalar yanıtı yavaşlatır)
+PARCA_SATIR = 500
+
+
+def csv_parcalari(basliklar, satirlar, parca_satir=PARCA_SATIR):
+    """Başlık ve satır demetlerinden CSV metin parçaları üretir"""
+    tampon = io.StringIO()
+    yazici = csv.writer(tampon, delimiter=AYRAC)
+    tampon.write('\ufeff')
+    yazici.writerow(basliklar)
+    sayac = 0
+    for satir in satirlar:
+        yazici.writerow(satir)
+        sayac += 1
+        if sayac >= parca_satir:
+            yield tampon.getvalue()
+            tampon.seek(0)
+            tampon.truncate()
+            sayac = 0
+    yield tampon.getvalue()
+
+
+def sirali_birlestir(imlecler, anahtar, azalan=False):
+    """Aynı anahtarla sıralı imleçleri tek sıralı akışta birleştirir
+
+    Birden fazla kolda eşleşen satır (aynı anahtar) bir kez döndürülür.
+    """
+    if len(imlecler) == 1:
+        yield from imlecler[0]
+        return
+    onceki = None
+    for satir in heapq.merge(*imlecler, key=anahtar, reverse=azalan):
+        deger = anahtar(satir)
+        if deger != onceki:
+            onceki = deger
+            yield satir
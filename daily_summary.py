@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+BikeStock - Günlük çıkış özetleri
+Stok çıkışlarını (gün, depo, kargo firması, platform) anahtarıyla toplayan
+gunluk_cikis_ozet tablosunu yönetir. Günlük rapor bu tablodan okur; tarih
+aralığı büyüse bile gün başına birkaç satır taranır.
+
+Kargo firması veya platform belirtilmemişse anahtarda 0 kullanılır
+(NULL birincil anahtarda tekil sayılmaz).
+
+Kullanım:
+    python daily_summary.py                                   # tüm özetleri yeniden oluştur
+    python daily_summary.py --baslangic 2025-01-01 --bitis 2025-01-31
+"""
+
+import argparse
+import sys
+import time
+
+import database
+
+
+def _anahtar(deger):
+    """Boş kargo/platform değerlerini 0'a çevirir"""
+    return int(deger) if deger else 0
+
+
+def cikis_ekle(conn, gun, depo_id, kargo_firmasi_id, platform_id, satir_sayisi, toplam_adet, toplam_desi):
+    """Bir çıkış fişini günlük özete ekler
+
+    Çağıranın işlemi içinde çalışır; fiş kaydıyla birlikte commit edilir.
+    """
+    conn.execute('''
+        INSERT INTO gunluk_cikis_ozet (
+            gun, depo_id, kargo_firmasi_id, platform_id,
+            fis_sayisi, satir_sayisi, toplam_adet, toplam_desi
+        ) VALUES (?, ?, ?, ?, 1, ?, ?, ?)
+        ON CONFLICT (gun, depo_id, kargo_firmasi_id, platform_id) DO UPDATE SET
+            fis_sayisi = fis_sayisi + 1,
+            satir_sayisi = satir_sayisi + excluded.satir_sayisi,
+            toplam_adet = toplam_adet + excluded.toplam_adet,
+            toplam_desi = toplam_desi + excluded.toplam_desi
+    ''', (gun, depo_id, _anahtar(kargo_firmasi_id), _anahtar(platform_id),
+          satir_sayisi, toplam_adet, toplam_desi))
+
+
+def yeniden_olustur(conn, baslangic=None, bitis=None):
+    """Özetleri stok_cikis_fis/stok_cikis_fis_detay tablolarından yeniden hesaplar
+
+    baslangic/bitis 'YYYY-MM-DD' (bitis dahil); verilmezse tüm tablo yeniden
+    oluşturulur. Çağıranın işlemi içinde çalışır. Oluşan özet satırı sayısını döndürür.
+    """
+    kosul = '1'
+    ozet_kosul = '1'
+    params = []
+    if baslangic:
+        kosul += ' AND f.tarih >= ?'
+        ozet_kosul += ' AND gun >= ?'
+        params.append(baslangic)
+    if bitis:
+        kosul += " AND f.tarih < date(?, '+1 day')"
+        ozet_kosul += ' AND gun <= ?'
+        params.append(bitis)
+
+    conn.execute(f'DELETE FROM gunluk_cikis_ozet WHERE {ozet_kosul}', params)
+    return conn.execute(f'''
+        INSERT INTO gunluk_cikis_ozet (
+            gun, depo_id, kargo_firmasi_id, platform_id,
+            fis_sayisi, satir_sayisi, toplam_adet, toplam_desi
+        )
+        SELECT date(f.tarih), f.depo_id,
+               COALESCE(fd.kargo_firmasi_id, 0), COALESCE(f.platform_id, 0),
+               COUNT(DISTINCT f.id), COUNT(fd.id),
+               COALESCE(SUM(fd.cikis_adedi), 0), COALESCE(SUM(fd.toplam_desi), 0)
+        FROM stok_cikis_fis f
+        LEFT JOIN stok_cikis_fis_detay fd ON fd.fis_id = f.id
+        WHERE {kosul}
+        GROUP BY 1, 2, 3, 4
+    ''', params).rowcount
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='BikeStock günlük çıkış özetlerini yeniden oluşturur')
+    parser.add_argument('--baslangic', help='İlk gün (YYYY-MM-DD)')
+    parser.add_argument('--bitis', help='Son gün, dahil (YYYY-MM-DD)')
+    args = parser.parse_args(argv)
+
+    baslama = time.perf_counter()
+    conn = database.connect()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        satir = yeniden_olustur(conn, args.baslangic, args.bitis)
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"📊 {satir} özet satırı oluşturuldu ({(time.perf_counter() - baslama) * 1000:.0f} ms)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
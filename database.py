@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+BikeStock - Veritabanı bağlantı katmanı
+Her worker thread'i için tek bir SQLite bağlantısı tutar ve istek boyunca flask.g'ye bağlar
+"""
+
+import os
+import sqlite3
+import threading
+
+from flask import g
+
+DB_PATH = os.environ.get(
+    'DATABASE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stok_takip.db')
+)
+
+# Bağlantı ayarları
+BUSY_TIMEOUT_MS = 5000              # Yazma kilidi için bekleme süresi
+CACHE_SIZE_KB = 16384               # Bağlantı başına sayfa önbelleği (16 MB)
+MMAP_SIZE = 128 * 1024 * 1024       # Bellek eşlemeli okuma alanı (128 MB)
+
+# Tanımlıysa çalışan her SQL ifadesi bu dosyaya yazılır (index_advisor.py --trace)
+SQL_TRACE_FILE = os.environ.get('SQL_TRACE_FILE')
+
+_yerel = threading.local()
+_trace_kilidi = threading.Lock()
+_miras_baglantilar = []
+
+
+class SchemaRegistry:
+    """Açılışta bir kez okunan şema bilgisi; route'lar sqlite_master sorgulamaz"""
+
+    def __init__(self):
+        self.version = 0
+        self.tables = {}
+        self.indexes = frozenset()
+
+    def load(self, conn):
+        """Tablo, sütun ve index listesini katalogdan okur"""
+        self.version = conn.execute('PRAGMA user_version').fetchone()[0]
+        tablolar = {}
+        indexler = set()
+        for row in conn.execute("SELECT type, name FROM sqlite_master WHERE type IN ('table', 'index')"):
+            if row['type'] == 'index':
+                indexler.add(row['name'])
+            else:
+                sutunlar = conn.execute(f'PRAGMA table_info("{row["name"]}")').fetchall()
+                tablolar[row['name']] = frozenset(sutun['name'] for sutun in sutunlar)
+        self.tables = tablolar
+        self.indexes = frozenset(indexler)
+
+    def has_table(self, table):
+        return table in self.tables
+
+    def has_column(self, table, column):
+        return column in self.tables.get(table, ())
+
+    def has_index(self, index):
+        return index in self.indexes
+
+
+schema = SchemaRegistry()
+
+
+def connect(db_path=None):
+    """Yeni bir SQLite bağlantısı açar ve performans ayarlarını uygular"""
+    conn = sqlite3.connect(db_path or DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000)
+    conn.row_factory = sqlite3.Row
+
+    # WAL: okuyucular yazanları, yazanlar okuyucuları bloklamaz
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+    # WAL modunda NORMAL güvenlidir; fsync sadece checkpoint sırasında yapılır
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute(f'PRAGMA cache_size = -{CACHE_SIZE_KB}')
+    conn.execute(f'PRAGMA mmap_size = {MMAP_SIZE}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+
+    if SQL_TRACE_FILE:
+        conn.set_trace_callback(_trace_yaz)
+    return conn
+
+
+def _trace_yaz(sql):
+    """SQL izleme dosyasına tek satır olarak ekler"""
+    with _trace_kilidi:
+        with open(SQL_TRACE_FILE, 'a', encoding='utf-8') as f:
+            f.write(' '.join(sql.split()) + '\n')
+
+
+def get_thread_connection():
+    """Çalışan thread'e ait bağlantıyı döndürür, yoksa açar"""
+    conn = getattr(_yerel, 'conn', None)
+    # Fork sonrası ebeveyn süreçten kalan bağlantı kullanılmaz
+    if conn is None or _yerel.pid != os.getpid():
+        conn = connect()
+        _yerel.conn = conn
+        _yerel.pid = os.getpid()
+    return conn
+
+
+def close_thread_connection():
+    """Çalışan thread'in bağlantısını kapatır"""
+    conn = getattr(_yerel, 'conn', None)
+    if conn is not None and _yerel.pid == os.getpid():
+        conn.close()
+    _yerel.conn = None
+
+
+def reset_after_fork():
+    """Fork edilen süreçte (gunicorn post_fork) ebeveynden kalan bağlantıyı bırakır
+
+    Bağlantı kapatılmaz: SQLite, fork'tan geçen bir bağlantının çocuk süreçte
+    kullanılmasını veya kapatılmasını desteklemez. Referansı tutulur ki çöp
+    toplayıcı da kapatmasın; süreç yeni bağlantısını ilk istekte açar.
+    """
+    global _yerel
+    conn = getattr(_yerel, 'conn', None)
+    if conn is not None:
+        _miras_baglantilar.append(conn)
+    _yerel = threading.local()
+
+
+def get_db():
+    """İstek boyunca kullanılacak bağlantıyı flask.g üzerinden döndürür"""
+    if 'db' not in g:
+        g.db = get_thread_connection()
+    return g.db
+
+
+def release_db(exc=None):
+    """İstek sonunda bağlantıyı havuza bırakır, yarım kalan işlemi geri alır"""
+    conn = g.pop('db', None)
+    if conn is None:
+        return
+    try:
+        if conn.in_transaction:
+            conn.rollback()
+    except sqlite3.Error:
+        # Bozulan bağlantı bir sonraki istekte yeniden açılır
+        close_thread_connection()
+
+
+def load_schema(db_path=None):
+    """Şema kayıt defterini ayrı bir bağlantı ile doldurur"""
+    conn = connect(db_path)
+    try:
+        schema.load(conn)
+    finally:
+        conn.close()
+    return schema
+
+
+def init_app(app):
+    """Bağlantı katmanını Flask uygulamasına bağlar"""
+    app.teardown_appcontext(release_db)
@@ -1,7 +1,83 @@
-bind = "0.0.0.0:10000"
-workers = 1
-worker_class = "sync"
-timeout = 120
+# -*- coding: utf-8 -*-
+"""
+BikeStock - gunicorn ayarları
+Tüm değerler ortam değişkenleriyle değiştirilebilir; varsayılanlar CPU sayısından hesaplanır.
+
+    GUNICORN_WORKER_CLASS   gthread (varsayılan) veya sync
+    WEB_CONCURRENCY         worker süreci sayısı (varsayılan: CPU sayısı, en az 2)
+    GUNICORN_THREADS        gthread modunda worker başına thread (varsayılan: 4)
+    GUNICORN_TIMEOUT        saniye (varsayılan: 120)
+    GUNICORN_PRELOAD        1/0; uygulama master süreçte bir kez yüklenir (varsayılan: 1)
+    PORT                    dinlenecek port (varsayılan: 10000)
+
+SQLite'ta okumalar süreçler ve thread'ler arasında paralel yürür, yazmalar tek
+yazma kilidinde sıraya girer (BEGIN IMMEDIATE + busy_timeout). Python kodu GIL
+altında çalıştığı için CPU'yu süreç sayısı, yavaş bir isteğin (gunluk_rapor,
+CSV dışa aktarım) diğerlerini bekletmemesini thread sayısı sağlar. Worker
+sayısını CPU'nun çok üstüne çıkarmak yazma kilidi beklemesini artırır.
+
+Ölçüm: load_test.py, 16 istemci, 30 sn; 120 bin ürün, 1M geçmiş satırı,
+100 bin fiş. Tek vCPU'lu makinede alındı, istemci de aynı CPU'yu kullandı.
+
+A) %80 okuma, %15 tek satırlık stok girişi, %5 otuz günlük gunluk_rapor
+
+    mod               istek/sn   okuma p50 / p99   yazma p99   rapor p50
+    sync    w=1          102       150 /  341 ms      350 ms      171 ms
+    sync    w=4           68       222 /  567 ms      446 ms      443 ms
+    gthread w=2 t=4       63       233 /  722 ms      594 ms      552 ms
+    gthread w=4 t=4       64        55 / 1347 ms      918 ms     1163 ms
+
+B) %97 okuma, %3 doksan günlük işlem geçmişi CSV'si (~227 bin satır)
+
+    mod               okuma p50 / p95 / p99       aktarım p50
+    sync    w=1          325 / 6836 / 8846 ms       6.0 sn
+    sync    w=4          451 / 1366 / 6995 ms      11.8 sn
+    gthread w=2 t=4      137 /  924 / 22140 ms     24.9 sn
+    gthread w=4 t=4       60 /  838 /  2125 ms     46.2 sn
+
+Hiçbir modda "database is locked" hatası olmadı. Tek CPU'da toplam iş hacmi
+eşzamanlılıkla artmıyor (istekler CPU'ya bağlı); CPU'dan fazla süreç yalnızca
+kimin beklediğini değiştiriyor. sync w=1'de tek bir aktarım bütün okumaları
+saniyelerce bekletiyor. gthread w=4 t=4'te okuma p50'si düşüyor ama iş hacmi
+102'den 64 istek/sn'ye iniyor, rapor p50'si 171'den 1163 ms'ye, okuma p99'u
+341'den 1347 ms'ye çıkıyor. Varsayılan bu yüzden CPU başına bir gthread
+worker (uzun bir istek tek süreci bekletmesin diye en az 2) ve I/O beklemeleri
+için 4 thread. Yalnızca kısa isteklerin geldiği kurulumlarda
+GUNICORN_WORKER_CLASS=sync WEB_CONCURRENCY=1 daha yüksek iş hacmi verir.
+"""
+
+import multiprocessing
+import os
+
+
+def _env_int(ad, varsayilan):
+    deger = os.environ.get(ad, '').strip()
+    return int(deger) if deger else varsayilan
+
+
+bind = f"0.0.0.0:{_env_int('PORT', 10000)}"
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = _env_int('WEB_CONCURRENCY', max(2, multiprocessing.cpu_count()))
+threads = _env_int('GUNICORN_THREADS', 4) if worker_class == 'gthread' else 1
+
+timeout = _env_int('GUNICORN_TIMEOUT', 120)
 keepalive = 5
 max_requests = 1000
-max_requests_jitter = 100
\ No newline at end of file
+max_requests_jitter = 100
+
+# Uygulama (ve şema doğrulaması) master'da bir kez yüklenir; SECRET_KEY verilmemişse
+# rastgele anahtar da tek olur, worker'lar arasında oturumlar geçerli kalır
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+
+def pre_fork(server, worker):
+    """Master'da açık kalmış SQLite bağlantısı fork'a taşınmaz"""
+    import database
+    database.close_thread_connection()
+
+
+def post_fork(server, worker):
+    """Worker kendi bağlantılarını ilk istekte açar"""
+    import database
+    database.reset_after_fork()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+BikeStock - Index danışmanı
+Uygulamanın çalıştırdığı SQL ifadelerini EXPLAIN QUERY PLAN ile inceler,
+tam tablo taramalarını ve geçici B-tree (sıralama/gruplama) kullanımını raporlar.
+
+SQL ifadeleri iki kaynaktan toplanır:
+  * Python dosyalarındaki execute()/executemany() çağrıları (statik analiz)
+  * SQL_TRACE_FILE ile çalıştırılan uygulamanın izleme dosyası (--trace)
+
+Statik analiz f-string ile kurulan WHERE/ORDER BY gibi bölümlerin gerçek
+metnini bilemez; bu ifadeler incelenmez, "--trace gerekir" diye listelenir ve
+--strict'i etkilemez. Uygulamanın gerçekten çalıştırdığı SQL'i gören --trace
+asıl ölçüdür.
+
+Kullanım:
+    python index_advisor.py                      # app.py, güncel şema ile
+    python index_advisor.py --db stok_takip.db   # gerçek veritabanı istatistikleriyle
+    SQL_TRACE_FILE=sql.log python app.py         # izleme dosyası topla
+    python index_advisor.py --trace sql.log
+    python index_advisor.py --strict             # sorun varsa çıkış kodu 1
+"""
+
+import argparse
+import ast
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+
+import migrations
+
+VARSAYILAN_DOSYALAR = ['app.py']
+
+# Birkaç satırlık referans tabloları; bunlarda tarama sorun sayılmaz
+KUCUK_TABLOLAR = {
+    'depo', 'platform', 'kargo_firmasi', 'musteri', 'ayarlar', 'kullanici',
+    'islem_tipi', 'fis_sequence', 'schema_migrations',
+}
+
+ATLANAN_KOMUTLAR = ('PRAGMA', 'BEGIN', 'COMMIT', 'ROLLBACK', 'END', 'SAVEPOINT', 'RELEASE',
+                    'CREATE', 'ALTER', 'DROP', 'ANALYZE', 'VACUUM', 'REINDEX')
+
+# f-string içindeki ifadenin yeri (statik analizde metni bilinmez)
+_PARCA = '\x00'
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_YORUM_RE = re.compile(r'--[^\n]*')
+_ISIMLI_PARAM_RE = re.compile(r'(?<![:\w]):([A-Za-z_]\w*)')
+_SAYI_RE = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])')
+_TABLO_RE = re.compile(r'\b(?:FROM|JOIN|UPDATE|INTO)\s+([A-Za-z_]\w*)(?:\s+(?:AS\s+)?([A-Za-z_]\w*))?',
+                       re.IGNORECASE)
+_ANAHTAR_KELIMELER = {'WHERE', 'ON', 'LEFT', 'JOIN', 'INNER', 'GROUP', 'ORDER', 'LIMIT', 'SET',
+                      'VALUES', 'USING', 'SELECT', 'AND', 'OR', 'CROSS', 'NATURAL', 'HAVING',
+                      'UNION', 'DEFAULT', 'WINDOW', 'RETURNING', 'OUTER'}
+# Planı belirleyen bölümler; bunlardan sonra gelen f-string parçası planı değiştirir
+_PLAN_BOLUMU_RE = re.compile(r'\b(?:WHERE|ON|GROUP\s+BY|ORDER\s+BY|HAVING)\b', re.IGNORECASE)
+
+
+class _SqlToplayici(ast.NodeVisitor):
+    """execute()/executemany() çağrılarına verilen SQL metinlerini toplar
+
+    Aynı fonksiyonda `sorgu = '...'` ve `sorgu += '...'` ile kurulan sorgular
+    tüm eklemeler uygulanmış haliyle alınır. f-string içindeki ifadeler _PARCA ile işaretlenir.
+    """
+
+    def __init__(self, dosya):
+        self.dosya = dosya
+        self.ifadeler = []
+        self._degiskenler = [{}]
+
+    @staticmethod
+    def _metin(node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return node.value
+        if isinstance(node, ast.JoinedStr):
+            parcalar = []
+            for deger in node.values:
+                if isinstance(deger, ast.Constant):
+                    parcalar.append(deger.value)
+                else:
+                    parcalar.append(_PARCA)
+            return ''.join(parcalar)
+        return None
+
+    def visit_FunctionDef(self, node):
+        self._degiskenler.append({})
+        self.generic_visit(node)
+        self._degiskenler.pop()
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Assign(self, node):
+        metin = self._metin(node.value)
+        for hedef in node.targets:
+            if isinstance(hedef, ast.Name):
+                if metin is not None:
+                    self._degiskenler[-1][hedef.id] = metin
+                else:
+                    self._degiskenler[-1].pop(hedef.id, None)
+        self.generic_visit(node)
+
+    def visit_AugAssign(self, node):
+        if isinstance(node.target, ast.Name) and isinstance(node.op, ast.Add):
+            metin = self._metin(node.value)
+            mevcut = self._degiskenler[-1].get(node.target.id)
+            if metin is not None and mevcut is not None:
+                self._degiskenler[-1][node.target.id] = mevcut + metin
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Attribute) and node.func.attr in ('execute', 'executemany') and node.args:
+            arg = node.args[0]
+            metin = self._metin(arg)
+            if metin is None and isinstance(arg, ast.Name):
+                metin = self._degiskenler[-1].get(arg.id)
+            if metin is not None:
+                self.ifadeler.append((metin, f'{self.dosya}:{node.lineno}'))
+        self.generic_visit(node)
+
+
+def python_dosyasindan_topla(dosya):
+    """Python dosyasındaki SQL ifadelerini (metin, konum) listesi olarak döndürür"""
+    with open(dosya, encoding='utf-8') as f:
+        agac = ast.parse(f.read(), filename=dosya)
+    toplayici = _SqlToplayici(os.path.basename(dosya))
+    toplayici.visit(agac)
+    return toplayici.ifadeler
+
+
+def izleme_dosyasindan_topla(dosya):
+    """SQL_TRACE_FILE çıktısındaki ifadeleri sabitleri '?' ile değiştirerek toplar"""
+    ifadeler = []
+    with open(dosya, encoding='utf-8') as f:
+        for satir_no, satir in enumerate(f, 1):
+            sql = satir.strip()
+            if not sql:
+                continue
+            sql = _STRING_RE.sub('?', sql)
+            sql = _SAYI_RE.sub('?', sql)
+            ifadeler.append((sql, f'{os.path.basename(dosya)}:{satir_no}'))
+    return ifadeler
+
+
+def normalize(sql):
+    return ' '.join(_YORUM_RE.sub('', sql).split())
+
+
+def dinamik_mi(sql):
+    """WHERE/ORDER BY gibi planı belirleyen bir bölümde f-string parçası var mı"""
+    temiz = _STRING_RE.sub("''", sql)
+    bolum = _PLAN_BOLUMU_RE.search(temiz)
+    return bolum is not None and _PARCA in temiz[bolum.start():]
+
+
+def parametreler(sql):
+    """EXPLAIN için NULL parametre listesi veya sözlüğü hazırlar"""
+    temiz = _STRING_RE.sub("''", _YORUM_RE.sub('', sql))
+    isimli = _ISIMLI_PARAM_RE.findall(temiz)
+    if isimli:
+        return {isim: None for isim in isimli}
+    return [None] * temiz.count('?')
+
+
+def takma_adlar(sql):
+    """Takma ad -> tablo adı eşlemesi (plan satırlarındaki SCAN x için)"""
+    eslesme = {}
+    for tablo, takma in _TABLO_RE.findall(sql):
+        eslesme[tablo.lower()] = tablo.lower()
+        if takma and takma.upper() not in _ANAHTAR_KELIMELER:
+            eslesme[takma.lower()] = tablo.lower()
+    return eslesme
+
+
+def plani_incele(conn, sql):
+    """(plan satırları, bulgular) döndürür; bulgu = (seviye, mesaj)"""
+    plan = conn.execute(f'EXPLAIN QUERY PLAN {sql}', parametreler(sql)).fetchall()
+    adlar = takma_adlar(sql)
+    # Sadece referans tablolarına dokunan ifadelerde sıralama maliyeti önemsizdir
+    hepsi_kucuk = bool(adlar) and set(adlar.values()) <= KUCUK_TABLOLAR
+    bulgular = []
+    for satir in plan:
+        detay = satir[3]
+        if detay.startswith('SCAN ') and not detay.startswith('SCAN CONSTANT ROW'):
+            hedef = detay.split()[1]
+            tablo = adlar.get(hedef.lower(), hedef.lower())
+            if 'USING COVERING INDEX' in detay or 'USING INDEX' in detay:
+                bulgular.append(('BILGI', f'index üzerinden tam tarama: {detay}'))
+            elif tablo in KUCUK_TABLOLAR:
+                bulgular.append(('BILGI', f'küçük referans tablosu taraması: {detay}'))
+            elif tablo.startswith(('(', 'subquery')) or hedef.startswith('('):
+                continue
+            else:
+                bulgular.append(('UYARI', f'tam tablo taraması: {detay}'))
+        elif 'USE TEMP B-TREE' in detay:
+            bulgular.append(('BILGI' if hepsi_kucuk else 'UYARI', f'geçici B-tree: {detay}'))
+    return plan, bulgular
+
+
+def analiz_et(ifadeler, conn):
+    """Her benzersiz ifade için plan ve bulguları hesaplar"""
+    sonuclar = []
+    gorulen = {}
+    for sql, konum in ifadeler:
+        anahtar = normalize(sql)
+        if not anahtar or anahtar.split()[0].upper() in ATLANAN_KOMUTLAR or 'sqlite_master' in anahtar:
+            continue
+        if anahtar in gorulen:
+            gorulen[anahtar]['konumlar'].append(konum)
+            continue
+        kayit = {'sql': anahtar.replace(_PARCA, '{…}'), 'konumlar': [konum], 'plan': [], 'bulgular': [],
+                 'hata': None, 'dinamik': dinamik_mi(anahtar)}
+        if not kayit['dinamik']:
+            try:
+                kayit['plan'], kayit['bulgular'] = plani_incele(conn, anahtar.replace(_PARCA, '?'))
+            except sqlite3.Error as e:
+                kayit['hata'] = str(e)
+        gorulen[anahtar] = kayit
+        sonuclar.append(kayit)
+    return sonuclar
+
+
+def rapor_yazdir(sonuclar, ayrintili=False):
+    """Raporu yazdırır, uyarı sayısını döndürür"""
+    uyari_sayisi = 0
+    for kayit in sonuclar:
+        uyarilar = [b for b in kayit['bulgular'] if b[0] == 'UYARI']
+        uyari_sayisi += len(uyarilar)
+        if not ayrintili and not uyarilar and not kayit['hata'] and not kayit['dinamik']:
+            continue
+
+        isaret = '❌' if uyarilar else ('⚠️' if kayit['hata'] else ('🔎' if kayit['dinamik'] else '✅'))
+        print(f"{isaret} {', '.join(kayit['konumlar'])}")
+        print(f"   {kayit['sql'][:160]}{'...' if len(kayit['sql']) > 160 else ''}")
+        if kayit['dinamik']:
+            print("   dinamik koşul/sıralama: planı --trace ile inceleyin")
+        if kayit['hata']:
+            print(f"   ⚠️ plan alınamadı: {kayit['hata']}")
+        for seviye, mesaj in kayit['bulgular']:
+            print(f"   {'UYARI' if seviye == 'UYARI' else 'bilgi'}: {mesaj}")
+        if ayrintili:
+            for satir in kayit['plan']:
+                print(f"      | {satir[3]}")
+        print()
+
+    sorunlu = sum(1 for k in sonuclar if any(b[0] == 'UYARI' for b in k['bulgular']))
+    hatali = sum(1 for k in sonuclar if k['hata'])
+    dinamik = sum(1 for k in sonuclar if k['dinamik'])
+    print("=" * 50)
+    print(f"📊 {len(sonuclar)} ifade incelendi: {sorunlu} sorunlu, {hatali} plan alınamadı, "
+          f"{dinamik} --trace gerekir, {len(sonuclar) - sorunlu - hatali - dinamik} temiz")
+    return uyari_sayisi
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='BikeStock index danışmanı (EXPLAIN QUERY PLAN)')
+    parser.add_argument('dosyalar', nargs='*', help='İncelenecek Python dosyaları (varsayılan: app.py)')
+    parser.add_argument('--db', help='Planların alınacağı veritabanı (varsayılan: geçici, güncel şema)')
+    parser.add_argument('--trace', action='append', default=[], help='SQL_TRACE_FILE çıktısı')
+    parser.add_argument('--strict', action='store_true',
+                        help='Uyarı varsa 1 ile çık (statik olarak tamamlanamayan ifadeler sayılmaz)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Temiz ifadeleri ve planları da göster')
+    args = parser.parse_args(argv)
+
+    kok = os.path.dirname(os.path.abspath(__file__))
+    dosyalar = args.dosyalar or [os.path.join(kok, d) for d in VARSAYILAN_DOSYALAR]
+
+    ifadeler = []
+    for dosya in dosyalar:
+        ifadeler.extend(python_dosyasindan_topla(dosya))
+    for dosya in args.trace:
+        ifadeler.extend(izleme_dosyasindan_topla(dosya))
+
+    gecici_dizin = None
+    if args.db:
+        conn = sqlite3.connect(f'file:{os.path.abspath(args.db)}?mode=ro', uri=True)
+    else:
+        gecici_dizin = tempfile.TemporaryDirectory()
+        db_path = os.path.join(gecici_dizin.name, 'advisor.db')
+        migrations.migrate(db_path, verbose=False)
+        conn = sqlite3.connect(db_path)
+
+    try:
+        sonuclar = analiz_et(ifadeler, conn)
+    finally:
+        conn.close()
+        if gecici_dizin:
+            gecici_dizin.cleanup()
+
+    uyari_sayisi = rapor_yazdir(sonuclar, args.verbose)
+    return 1 if args.strict and uyari_sayisi else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+BikeStock - Yük testi
+Çalışan bir sunucuya (gunicorn veya python app.py) eşzamanlı istemcilerle
+okuma, yazma ve rapor isteklerinden oluşan bir karışım gönderir; istek/sn ve
+gecikme yüzdeliklerini istek türüne göre raporlar. gunicorn_config.py'deki
+ölçümler bu betikle alınmıştır.
+
+Yazma istekleri gerçek stok girişi yapar; üretim veritabanına karşı çalıştırmayın.
+
+Kullanım:
+    gunicorn app:app --config gunicorn_config.py &
+    python load_test.py http://127.0.0.1:10000 --istemci 16 --sure 30
+    python load_test.py http://127.0.0.1:10000 --karisim okuma=95,aktarim=5
+"""
+
+import argparse
+import http.client
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+
+VARSAYILAN_KARISIM = 'okuma=80,yazma=15,rapor=5'
+ARAMA_ONEKLERI = ['a', 'b', 'ic', 'la', 'ja', 'zi', 'se', '1', '2', '86']
+
+
+class Istemci:
+    """Oturum çerezini tutan, bağlantıyı yeniden kullanan basit HTTP istemcisi"""
+
+    def __init__(self, adres):
+        self.adres = urllib.parse.urlsplit(adres)
+        self.cerez = None
+        self.baglanti = None
+
+    def istek(self, yontem, yol, govde=None, basliklar=None):
+        basliklar = dict(basliklar or {})
+        if self.cerez:
+            basliklar['Cookie'] = self.cerez
+        for deneme in range(2):
+            if self.baglanti is None:
+                self.baglanti = http.client.HTTPConnection(self.adres.hostname, self.adres.port, timeout=300)
+            try:
+                self.baglanti.request(yontem, yol, body=govde, headers=basliklar)
+                yanit = self.baglanti.getresponse()
+                veri = yanit.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # Worker max_requests ile yeniden başlatılmış olabilir
+                self.baglanti.close()
+                self.baglanti = None
+                if deneme:
+                    raise
+        cerez = yanit.getheader('Set-Cookie')
+        if cerez:
+            self.cerez = cerez.split(';', 1)[0]
+        return yanit.status, veri
+
+    def giris(self, kullanici_adi, sifre):
+        govde = urllib.parse.urlencode({'kullanici_adi': kullanici_adi, 'sifre': sifre})
+        self.istek('POST', '/login', govde, {'Content-Type': 'application/x-www-form-urlencoded'})
+        if not self.cerez:
+            raise SystemExit('Giriş başarısız')
+
+
+def okuma(istemci, urun_idleri, depo_id):
+    secim = random.random()
+    if secim < 0.5:
+        return istemci.istek('GET', '/api/urun_secim?q=' + urllib.parse.quote(random.choice(ARAMA_ONEKLERI)))
+    if secim < 0.8:
+        return istemci.istek('GET', f'/api/urun_stok_durumu/{random.choice(urun_idleri)}')
+    return istemci.istek('GET', f'/stok?depo_id={depo_id}')
+
+
+def yazma(istemci, urun_idleri, depo_id):
+    govde = json.dumps({'depo_id': depo_id, 'aciklama': 'yük testi',
+                        'urunler': [{'urun_id': random.choice(urun_idleri), 'miktar': 1}]})
+    return istemci.istek('POST', '/api/stok_giris_toplu', govde, {'Content-Type': 'application/json'})
+
+
+def rapor(istemci, urun_idleri, depo_id):
+    bitis = time.strftime('%Y-%m-%d')
+    baslangic = time.strftime('%Y-%m-%d', time.localtime(time.time() - 30 * 86400))
+    return istemci.istek('GET', f'/gunluk_rapor?baslangic_tarih={baslangic}&bitis_tarih={bitis}')
+
+
+def aktarim(istemci, urun_idleri, depo_id):
+    baslangic = time.strftime('%Y-%m-%d', time.localtime(time.time() - 90 * 86400))
+    return istemci.istek('GET', f'/disa_aktar/islem_gecmisi?baslangic={baslangic}')
+
+
+ISTEK_TURLERI = {'okuma': okuma, 'yazma': yazma, 'rapor': rapor, 'aktarim': aktarim}
+
+
+def karisim_oku(metin):
+    karisim = {}
+    for parca in metin.split(','):
+        tur, _, agirlik = parca.partition('=')
+        if tur.strip() not in ISTEK_TURLERI:
+            raise SystemExit(f'Bilinmeyen istek türü: {tur}')
+        karisim[tur.strip()] = int(agirlik)
+    return karisim
+
+
+def yuzdelik(degerler, oran):
+    if not degerler:
+        return 0.0
+    degerler = sorted(degerler)
+    return degerler[min(len(degerler) - 1, int(len(degerler) * oran))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='BikeStock yük testi')
+    parser.add_argument('adres', help='Sunucu adresi, ör. http://127.0.0.1:10000')
+    parser.add_argument('--istemci', type=int, default=16, help='Eşzamanlı istemci sayısı')
+    parser.add_argument('--sure', type=int, default=30, help='Ölçüm süresi (sn)')
+    parser.add_argument('--karisim', default=VARSAYILAN_KARISIM, help=f'Ağırlıklar (varsayılan: {VARSAYILAN_KARISIM})')
+    parser.add_argument('--depo', type=int, default=1, help='Okuma ve yazmaların depo id\'si')
+    parser.add_argument('--kullanici', default='admin')
+    parser.add_argument('--sifre', default='admin123')
+    args = parser.parse_args(argv)
+
+    karisim = karisim_oku(args.karisim)
+    turler, agirliklar = list(karisim), list(karisim.values())
+
+    hazirlik = Istemci(args.adres)
+    hazirlik.giris(args.kullanici, args.sifre)
+    # Ürün id'leri seçici API'sinden toplanır (veritabanına doğrudan erişim gerekmez)
+    urun_idleri = []
+    for onek in ARAMA_ONEKLERI:
+        _, veri = hazirlik.istek('GET', '/api/urun_secim?sayfa_boyutu=200&q=' + urllib.parse.quote(onek))
+        urun_idleri.extend(urun['id'] for urun in json.loads(veri)['urunler'])
+    if not urun_idleri:
+        raise SystemExit('Ürün bulunamadı')
+
+    sureler = defaultdict(list)
+    hatalar = defaultdict(int)
+    kilit = threading.Lock()
+    bitis = time.monotonic() + args.sure
+
+    def calis():
+        istemci = Istemci(args.adres)
+        istemci.giris(args.kullanici, args.sifre)
+        while time.monotonic() < bitis:
+            tur = random.choices(turler, agirliklar)[0]
+            baslama = time.perf_counter()
+            try:
+                durum, _ = ISTEK_TURLERI[tur](istemci, urun_idleri, args.depo)
+            except (OSError, http.client.HTTPException):
+                durum = 0
+            gecen = (time.perf_counter() - baslama) * 1000
+            with kilit:
+                if durum == 200:
+                    sureler[tur].append(gecen)
+                else:
+                    hatalar[tur] += 1
+
+    thread_listesi = [threading.Thread(target=calis) for _ in range(args.istemci)]
+    baslama = time.monotonic()
+    for thread in thread_listesi:
+        thread.start()
+    for thread in thread_listesi:
+        thread.join()
+    toplam_sure = time.monotonic() - baslama
+
+    toplam = sum(len(degerler) for degerler in sureler.values())
+    print(f'{args.istemci} istemci, {toplam_sure:.0f} sn: {toplam / toplam_sure:.1f} istek/sn')
+    print(f"{'tür':<8}{'adet':>8}{'hata':>6}{'ort':>9}{'p50':>9}{'p95':>9}{'p99':>9}   (ms)")
+    for tur in turler:
+        degerler = sureler[tur]
+        ortalama = statistics.fmean(degerler) if degerler else 0.0
+        print(f'{tur:<8}{len(degerler):>8}{hatalar[tur]:>6}{ortalama:>9.0f}'
+              f'{yuzdelik(degerler, 0.50):>9.0f}{yuzdelik(degerler, 0.95):>9.0f}{yuzdelik(degerler, 0.99):>9.0f}')
+    return 1 if sum(hatalar.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
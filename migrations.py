@@ -0,0 +1,1123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+BikeStock - Sürümlü veritabanı geçişleri
+Şema sürümü PRAGMA user_version'da tutulur; her numaralı geçiş bir kez uygulanır
+ve süresi schema_migrations tablosuna yazılır.
+
+Kullanım:
+    python migrations.py          # bekleyen geçişleri uygula
+    python migrations.py durum    # uygulanan geçişleri listele
+    python migrations.py fis_bagla  # fiş bağlantısı eksik çıkış kayıtlarını doldur
+"""
+
+import hashlib
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+import database
+
+# Parçalı güncellemelerde tek işlemde dokunulan en fazla satır sayısı
+BACKFILL_CHUNK = 5000
+
+MIGRATIONS = []
+
+
+def migration(version, name, transactional=True):
+    """Numaralı geçiş fonksiyonunu kaydeder
+
+    transactional=False olan geçişler kendi kısa işlemlerini yönetir (parçalı
+    backfill, tek tek index oluşturma) ve yarıda kesilirse tekrar çalıştırılabilir
+    olmalıdır.
+    """
+    def decorator(func):
+        MIGRATIONS.append((version, name, transactional, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return decorator
+
+
+def latest_version():
+    """Koddaki en yüksek geçiş numarası"""
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def current_version(conn):
+    """Veritabanının şema sürümü"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+# Geçiş yardımcıları
+def table_columns(conn, table):
+    """Tablonun sütun adları (üretilmiş sütunlar dahil)"""
+    return [row[1] for row in conn.execute(f'PRAGMA table_xinfo({table})').fetchall()]
+
+
+def add_column(conn, table, column, definition):
+    """Sütun yoksa ekler; eklendiyse True döner"""
+    if column in table_columns(conn, table):
+        return False
+    conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+    return True
+
+
+def seed_rows(conn, table, key_column, columns, rows):
+    """Anahtar sütunu eşleşen kayıt yoksa varsayılan satırları ekler"""
+    placeholders = ', '.join('?' for _ in columns)
+    key_index = columns.index(key_column)
+    for row in rows:
+        conn.execute(f'''
+            INSERT INTO {table} ({', '.join(columns)})
+            SELECT {placeholders}
+            WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE {key_column} = ?)
+        ''', (*row, row[key_index]))
+
+
+def create_index(conn, name, table, columns, where=None):
+    """Index'i kendi kısa işleminde oluşturur
+
+    SQLite index oluşturmayı parçalara bölemez; her index'i ayrı işlemde kurmak
+    yazma kilidini tek index süresiyle sınırlar.
+    """
+    sql = f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})'
+    if where:
+        sql += f' WHERE {where}'
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.execute(sql)
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+
+
+def run_in_chunks(conn, table, func, chunk_size=BACKFILL_CHUNK, pause=0.0):
+    """func(conn, alt, ust) fonksiyonunu rowid aralıkları için ayrı işlemlerde çalıştırır
+
+    Her parça kendi işleminde commit edilir, böylece büyük tablolarda bile yazma
+    kilidi kısa süre tutulur ve okuyucular/diğer yazanlar araya girebilir.
+    """
+    max_rowid = conn.execute(f'SELECT MAX(rowid) FROM {table}').fetchone()[0] or 0
+    toplam = 0
+    alt = 0
+    while alt < max_rowid:
+        ust = alt + chunk_size
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            toplam += func(conn, alt, ust) or 0
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        alt = ust
+        if pause:
+            time.sleep(pause)
+    return toplam
+
+
+def backfill(conn, table, assignments, where='1', params=(), chunk_size=BACKFILL_CHUNK, pause=0.0):
+    """UPDATE table SET assignments WHERE where ifadesini parçalar halinde uygular"""
+    def parca(conn, alt, ust):
+        return conn.execute(f'''
+            UPDATE {table} SET {assignments}
+            WHERE rowid > ? AND rowid <= ? AND ({where})
+        ''', (*params, alt, ust)).rowcount
+    return run_in_chunks(conn, table, parca, chunk_size, pause)
+
+
+# Geçiş motoru
+def _record(conn, version, name, duration_ms):
+    conn.execute('''
+        INSERT OR REPLACE INTO schema_migrations (version, name, applied_at, duration_ms)
+        VALUES (?, ?, ?, ?)
+    ''', (version, name, datetime.now(), round(duration_ms, 2)))
+    conn.execute(f'PRAGMA user_version = {int(version)}')
+
+
+def migrate(db_path=None, verbose=True):
+    """Bekleyen geçişleri sırayla uygular, uygulanan geçiş listesini döndürür"""
+    conn = database.connect(db_path)
+    # İşlemler geçişler tarafından açıkça yönetilir
+    conn.isolation_level = None
+    uygulananlar = []
+    try:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name VARCHAR(100) NOT NULL,
+                applied_at DATETIME,
+                duration_ms REAL
+            )
+        ''')
+
+        for version, name, transactional, func in MIGRATIONS:
+            if current_version(conn) >= version:
+                continue
+
+            if verbose:
+                print(f"🔄 Geçiş {version:03d} - {name} uygulanıyor...")
+            baslangic = time.perf_counter()
+
+            if transactional:
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    # Kilit alındıktan sonra başka bir süreç uygulamış olabilir
+                    if current_version(conn) >= version:
+                        conn.execute('ROLLBACK')
+                        continue
+                    func(conn)
+                    _record(conn, version, name, (time.perf_counter() - baslangic) * 1000)
+                    conn.execute('COMMIT')
+                except Exception:
+                    conn.execute('ROLLBACK')
+                    raise
+            else:
+                func(conn)
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    if current_version(conn) < version:
+                        _record(conn, version, name, (time.perf_counter() - baslangic) * 1000)
+                    conn.execute('COMMIT')
+                except Exception:
+                    conn.execute('ROLLBACK')
+                    raise
+
+            sure_ms = (time.perf_counter() - baslangic) * 1000
+            uygulananlar.append((version, name, sure_ms))
+            if verbose:
+                print(f"   ✅ {sure_ms:.1f} ms")
+
+        if uygulananlar:
+            # Sorgu planlayıcı istatistiklerini güncelle
+            conn.execute('PRAGMA optimize')
+
+        if verbose:
+            if uygulananlar:
+                print(f"🎉 {len(uygulananlar)} geçiş uygulandı, şema sürümü: {current_version(conn)}")
+            else:
+                print(f"✅ Şema güncel, sürüm: {current_version(conn)}")
+    finally:
+        conn.close()
+
+    return uygulananlar
+
+
+def status(db_path=None):
+    """Uygulanmış geçişleri ve bekleyenleri yazdırır"""
+    conn = database.connect(db_path)
+    try:
+        print(f"📊 Şema sürümü: {current_version(conn)} / {latest_version()}")
+        uygulanan = {}
+        try:
+            for row in conn.execute('SELECT * FROM schema_migrations ORDER BY version'):
+                uygulanan[row['version']] = row
+        except Exception:
+            pass
+        for version, name, _, _ in MIGRATIONS:
+            row = uygulanan.get(version)
+            if row:
+                print(f"   ✅ {version:03d} {name} ({row['applied_at']}, {row['duration_ms']} ms)")
+            else:
+                print(f"   ⏳ {version:03d} {name}")
+    finally:
+        conn.close()
+
+
+# Geçişler
+@migration(1, 'temel_sema')
+def _temel_sema(conn):
+    """safe_upgrade_database.py ve route içindeki CREATE TABLE ifadelerinin birleşimi"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS depo (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            depo_adi VARCHAR(100) NOT NULL UNIQUE,
+            adres TEXT,
+            telefon VARCHAR(20),
+            email VARCHAR(100),
+            aktif BOOLEAN DEFAULT 1,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS urun (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            urun_adi VARCHAR(200) NOT NULL,
+            jant_ebati VARCHAR(50),
+            lastik_ebati VARCHAR(100),
+            barkod VARCHAR(100) UNIQUE,
+            desi DECIMAL(8,2) DEFAULT 0.00,
+            aciklama TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS kullanici (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kullanici_adi VARCHAR(50) NOT NULL UNIQUE,
+            email VARCHAR(100) UNIQUE,
+            sifre_hash VARCHAR(255) NOT NULL,
+            tam_ad VARCHAR(100),
+            rol VARCHAR(20) DEFAULT 'user',
+            aktif BOOLEAN DEFAULT 1,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME,
+            last_login DATETIME
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS urun_stok (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            urun_id INTEGER NOT NULL,
+            depo_id INTEGER NOT NULL,
+            miktar INTEGER DEFAULT 0,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (urun_id) REFERENCES urun (id),
+            FOREIGN KEY (depo_id) REFERENCES depo (id),
+            UNIQUE(urun_id, depo_id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS platform (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            platform_adi VARCHAR(100) NOT NULL UNIQUE,
+            platform_tipi VARCHAR(50) DEFAULT 'E-TICARET',
+            komisyon_orani DECIMAL(5,2) DEFAULT 0.00,
+            api_bilgileri TEXT,
+            aktif BOOLEAN DEFAULT 1,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS musteri (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            musteri_adi VARCHAR(200) NOT NULL,
+            musteri_tipi VARCHAR(50) DEFAULT 'BIREYSEL',
+            telefon VARCHAR(20),
+            email VARCHAR(100),
+            adres TEXT,
+            vergi_no VARCHAR(20),
+            aktif BOOLEAN DEFAULT 1,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS islem_gecmisi (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tarih DATETIME DEFAULT CURRENT_TIMESTAMP,
+            islem_tipi VARCHAR(50),
+            urun_id INTEGER,
+            depo_id INTEGER,
+            hedef_depo_id INTEGER,
+            eski_deger VARCHAR(100),
+            yeni_deger VARCHAR(100),
+            urun_bilgisi TEXT,
+            kullanici_id INTEGER,
+            kullanici_adi VARCHAR(50),
+            platform_id INTEGER,
+            musteri_id INTEGER,
+            kargo_bilgisi TEXT,
+            takip_no VARCHAR(100),
+            teslimat_durumu VARCHAR(50) DEFAULT 'HAZIRLANYOR',
+            FOREIGN KEY (urun_id) REFERENCES urun (id),
+            FOREIGN KEY (depo_id) REFERENCES depo (id),
+            FOREIGN KEY (kullanici_id) REFERENCES kullanici (id),
+            FOREIGN KEY (platform_id) REFERENCES platform (id),
+            FOREIGN KEY (musteri_id) REFERENCES musteri (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS kargo_firmasi (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            firma_adi VARCHAR(100) NOT NULL UNIQUE,
+            kisa_adi VARCHAR(50),
+            telefon VARCHAR(20),
+            website VARCHAR(100),
+            aktif BOOLEAN DEFAULT 1,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS stok_cikis_fis (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fis_no VARCHAR(50) NOT NULL UNIQUE,
+            tarih DATETIME DEFAULT CURRENT_TIMESTAMP,
+            depo_id INTEGER NOT NULL,
+            aciklama TEXT,
+            toplam_urun_adedi INTEGER DEFAULT 0,
+            toplam_adet INTEGER DEFAULT 0,
+            kullanici_id INTEGER,
+            kullanici_adi VARCHAR(50),
+            durum VARCHAR(20) DEFAULT 'TAMAMLANDI',
+            platform_id INTEGER,
+            FOREIGN KEY (depo_id) REFERENCES depo (id),
+            FOREIGN KEY (kullanici_id) REFERENCES kullanici (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS stok_cikis_fis_detay (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fis_id INTEGER NOT NULL,
+            urun_id INTEGER NOT NULL,
+            urun_adi VARCHAR(200),
+            cikis_adedi INTEGER NOT NULL,
+            birim_desi DECIMAL(8,2),
+            toplam_desi DECIMAL(8,2),
+            kargo_firmasi_id INTEGER,
+            FOREIGN KEY (fis_id) REFERENCES stok_cikis_fis (id),
+            FOREIGN KEY (urun_id) REFERENCES urun (id),
+            FOREIGN KEY (kargo_firmasi_id) REFERENCES kargo_firmasi (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ayarlar (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            anahtar VARCHAR(100) NOT NULL UNIQUE,
+            deger TEXT,
+            aciklama TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Eski kurulumlardan (setup_database.py, route içi CREATE TABLE) kalan eksik sütunlar
+    for column, definition in [('adres', 'TEXT'), ('telefon', 'VARCHAR(20)'), ('email', 'VARCHAR(100)')]:
+        add_column(conn, 'depo', column, definition)
+    for column, definition in [('lastik_ebati', 'VARCHAR(100)'), ('aciklama', 'TEXT'),
+                               ('updated_at', 'DATETIME')]:
+        add_column(conn, 'urun', column, definition)
+    add_column(conn, 'kullanici', 'updated_at', 'DATETIME')
+    if add_column(conn, 'urun_stok', 'miktar', 'INTEGER DEFAULT 0'):
+        if 'stok_adedi' in table_columns(conn, 'urun_stok'):
+            conn.execute('UPDATE urun_stok SET miktar = stok_adedi')
+    add_column(conn, 'urun_stok', 'updated_at', 'DATETIME')
+    for column, definition in [('platform_id', 'INTEGER'), ('musteri_id', 'INTEGER'),
+                               ('kargo_bilgisi', 'TEXT'), ('takip_no', 'VARCHAR(100)'),
+                               ('teslimat_durumu', "VARCHAR(50) DEFAULT 'HAZIRLANYOR'")]:
+        add_column(conn, 'islem_gecmisi', column, definition)
+    for column, definition in [('kisa_adi', 'VARCHAR(50)'), ('telefon', 'VARCHAR(20)'),
+                               ('website', 'VARCHAR(100)')]:
+        add_column(conn, 'kargo_firmasi', column, definition)
+    add_column(conn, 'stok_cikis_fis', 'platform_id', 'INTEGER')
+    add_column(conn, 'stok_cikis_fis_detay', 'kargo_firmasi_id', 'INTEGER')
+
+    # Varsayılan veriler
+    admin_hash = hashlib.sha256('admin123'.encode()).hexdigest()
+    conn.execute('''
+        INSERT OR IGNORE INTO kullanici
+        (kullanici_adi, email, sifre_hash, tam_ad, rol, aktif, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', ('admin', 'admin@bikestock.com', admin_hash, 'Sistem Yöneticisi', 'admin', 1, datetime.now()))
+
+    seed_rows(conn, 'depo', 'depo_adi', ['depo_adi', 'aktif'], [('Ana Depo', 1)])
+    seed_rows(conn, 'platform', 'platform_adi', ['platform_adi', 'platform_tipi', 'komisyon_orani', 'aktif'], [
+        ('Trendyol', 'E-TICARET', 15.00, 1),
+        ('Hepsiburada', 'E-TICARET', 12.00, 1),
+        ('N11', 'E-TICARET', 8.00, 1),
+        ('Amazon', 'E-TICARET', 10.00, 1),
+        ('GittiGidiyor', 'E-TICARET', 6.00, 1),
+        ('Ciceksepeti', 'E-TICARET', 8.00, 1),
+        ('Mağaza Satış', 'FIZIKSEL', 0.00, 1),
+        ('Bayi Satış', 'TOPTAN', 0.00, 1),
+        ('Diğer', 'DIGER', 0.00, 1),
+    ])
+    seed_rows(conn, 'musteri', 'musteri_adi', ['musteri_adi', 'musteri_tipi', 'aktif'], [
+        ('Bireysel Müşteri', 'BIREYSEL', 1),
+        ('Kurumsal Müşteri', 'KURUMSAL', 1),
+        ('Bayi', 'BAYI', 1),
+        ('Toptan Müşteri', 'TOPTAN', 1),
+    ])
+    seed_rows(conn, 'kargo_firmasi', 'firma_adi', ['firma_adi', 'kisa_adi'], [
+        (firma, firma.split()[0]) for firma in
+        ['Yurtiçi Kargo', 'Aras Kargo', 'MNG Kargo', 'PTT Kargo', 'UPS Kargo', 'Sürat Kargo']
+    ])
+
+
+@migration(2, 'birlesik_stok_islem')
+def _birlesik_stok_islem(conn):
+    """unified_stock_system.py'deki işlem tipi, fiş ve sequence tabloları"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS islem_tipi (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kod VARCHAR(20) NOT NULL UNIQUE,
+            ad VARCHAR(50) NOT NULL,
+            aciklama TEXT,
+            stok_yonu INTEGER NOT NULL, -- +1: Artış, -1: Azalış, 0: Transfer/Sayım
+            renk VARCHAR(20) DEFAULT 'primary',
+            ikon VARCHAR(30) DEFAULT 'arrow-up-down',
+            aktif BOOLEAN DEFAULT 1,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    islem_tipleri = [
+        ('ALIS', 'Alış/Satın Alma', 'Tedarikçiden alınan ürünler - Stok artar', 1, 'success', 'cart-plus'),
+        ('SATIS', 'Satış', 'Müşterilere satılan ürünler - Stok azalır', -1, 'danger', 'cart-dash'),
+        ('IADE', 'İade', 'Müşterilerden iade edilen ürünler - Stok artar', 1, 'warning', 'arrow-counterclockwise'),
+        ('TRANSFER', 'Depo Transferi', 'Depolar arası ürün transferi', 0, 'info', 'arrow-left-right'),
+        ('SAYIM', 'Sayım Düzeltmesi', 'Stok sayımı sonucu düzeltme', 0, 'secondary', 'calculator'),
+        ('URETIM', 'Üretim', 'Üretim sonucu stok girişi - Stok artar', 1, 'primary', 'gear'),
+        ('FIRE', 'Fire/Kayıp', 'Fire, kayıp, hasar - Stok azalır', -1, 'dark', 'exclamation-triangle')
+    ]
+    for tip in islem_tipleri:
+        conn.execute('''
+            INSERT OR IGNORE INTO islem_tipi (kod, ad, aciklama, stok_yonu, renk, ikon)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', tip)
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS stok_islem (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fis_no VARCHAR(50) NOT NULL UNIQUE,
+            tarih DATETIME DEFAULT CURRENT_TIMESTAMP,
+            islem_tipi_id INTEGER NOT NULL,
+            depo_id INTEGER NOT NULL,
+            hedef_depo_id INTEGER, -- Transfer işlemleri için
+            aciklama TEXT,
+            toplam_urun_adedi INTEGER DEFAULT 0,
+            toplam_adet INTEGER DEFAULT 0,
+            toplam_desi DECIMAL(10,2) DEFAULT 0,
+            kullanici_id INTEGER,
+            kullanici_adi VARCHAR(50),
+            durum VARCHAR(20) DEFAULT 'TAMAMLANDI',
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (islem_tipi_id) REFERENCES islem_tipi (id),
+            FOREIGN KEY (depo_id) REFERENCES depo (id),
+            FOREIGN KEY (hedef_depo_id) REFERENCES depo (id),
+            FOREIGN KEY (kullanici_id) REFERENCES kullanici (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS stok_islem_detay (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            islem_id INTEGER NOT NULL,
+            urun_id INTEGER NOT NULL,
+            urun_adi VARCHAR(200),
+            adet INTEGER NOT NULL,
+            urun_adedi INTEGER DEFAULT 1,
+            birim_desi DECIMAL(8,2),
+            toplam_desi DECIMAL(8,2),
+            birim_fiyat DECIMAL(10,2), -- Alış/satış fiyatı için
+            toplam_fiyat DECIMAL(10,2),
+            kargo_firmasi_id INTEGER,
+            notlar TEXT,
+            FOREIGN KEY (islem_id) REFERENCES stok_islem (id),
+            FOREIGN KEY (urun_id) REFERENCES urun (id),
+            FOREIGN KEY (kargo_firmasi_id) REFERENCES kargo_firmasi (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS fis_sequence (
+            islem_tipi_kod VARCHAR(20) PRIMARY KEY,
+            son_no INTEGER DEFAULT 0,
+            prefix VARCHAR(10) DEFAULT '',
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    for tip in ['ALIS', 'SATIS', 'IADE', 'TRANSFER', 'SAYIM', 'URETIM', 'FIRE']:
+        conn.execute('''
+            INSERT OR IGNORE INTO fis_sequence (islem_tipi_kod, prefix)
+            VALUES (?, ?)
+        ''', (tip, tip[:2]))
+
+    # unified_stock_system.py'deki hali olduğu gibi; geçiş 15 düzeltilmiş haliyle değiştirir
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS tr_stok_islem_detay_after_insert
+        AFTER INSERT ON stok_islem_detay
+        BEGIN
+            -- Stok güncelle
+            UPDATE urun_stok
+            SET miktar = miktar + (
+                NEW.adet * (
+                    SELECT stok_yonu
+                    FROM islem_tipi
+                    WHERE id = (SELECT islem_tipi_id FROM stok_islem WHERE id = NEW.islem_id)
+                )
+            ),
+            updated_at = CURRENT_TIMESTAMP
+            WHERE urun_id = NEW.urun_id
+            AND depo_id = (SELECT depo_id FROM stok_islem WHERE id = NEW.islem_id);
+
+            -- Eğer stok kaydı yoksa oluştur
+            INSERT OR IGNORE INTO urun_stok (urun_id, depo_id, miktar, created_at, updated_at)
+            SELECT NEW.urun_id,
+                   (SELECT depo_id FROM stok_islem WHERE id = NEW.islem_id),
+                   NEW.adet * (
+                       SELECT stok_yonu
+                       FROM islem_tipi
+                       WHERE id = (SELECT islem_tipi_id FROM stok_islem WHERE id = NEW.islem_id)
+                   ),
+                   CURRENT_TIMESTAMP,
+                   CURRENT_TIMESTAMP
+            WHERE NOT EXISTS (
+                SELECT 1 FROM urun_stok
+                WHERE urun_id = NEW.urun_id
+                AND depo_id = (SELECT depo_id FROM stok_islem WHERE id = NEW.islem_id)
+            );
+
+            -- Transfer işlemi ise hedef depoya da ekle
+            INSERT OR IGNORE INTO urun_stok (urun_id, depo_id, miktar, created_at, updated_at)
+            SELECT NEW.urun_id,
+                   si.hedef_depo_id,
+                   NEW.adet,
+                   CURRENT_TIMESTAMP,
+                   CURRENT_TIMESTAMP
+            FROM stok_islem si, islem_tipi it
+            WHERE si.id = NEW.islem_id
+            AND it.id = si.islem_tipi_id
+            AND it.kod = 'TRANSFER'
+            AND si.hedef_depo_id IS NOT NULL
+            AND NOT EXISTS (
+                SELECT 1 FROM urun_stok
+                WHERE urun_id = NEW.urun_id
+                AND depo_id = si.hedef_depo_id
+            );
+
+            -- Transfer işlemi ise hedef depoya stok ekle
+            UPDATE urun_stok
+            SET miktar = miktar + NEW.adet,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE urun_id = NEW.urun_id
+            AND depo_id = (
+                SELECT hedef_depo_id
+                FROM stok_islem si, islem_tipi it
+                WHERE si.id = NEW.islem_id
+                AND it.id = si.islem_tipi_id
+                AND it.kod = 'TRANSFER'
+                AND si.hedef_depo_id IS NOT NULL
+            );
+        END
+    ''')
+
+    conn.execute('''
+        CREATE VIEW IF NOT EXISTS v_stok_islem_rapor AS
+        SELECT
+            si.id,
+            si.fis_no,
+            si.tarih,
+            it.kod as islem_tipi_kod,
+            it.ad as islem_tipi_adi,
+            it.stok_yonu,
+            it.renk as islem_renk,
+            it.ikon as islem_ikon,
+            d1.depo_adi as kaynak_depo,
+            d2.depo_adi as hedef_depo,
+            si.aciklama,
+            si.toplam_urun_adedi,
+            si.toplam_adet,
+            si.toplam_desi,
+            si.kullanici_adi,
+            si.durum,
+            si.created_at
+        FROM stok_islem si
+        JOIN islem_tipi it ON si.islem_tipi_id = it.id
+        JOIN depo d1 ON si.depo_id = d1.id
+        LEFT JOIN depo d2 ON si.hedef_depo_id = d2.id
+        ORDER BY si.tarih DESC
+    ''')
+
+
+@migration(3, 'temel_indexler', transactional=False)
+def _temel_indexler(conn):
+    """app.py sorgularının erişim yolları için ikincil index'ler
+
+    urun_stok (urun_id, depo_id) aramaları UNIQUE kısıtının index'ini kullanır.
+    """
+    create_index(conn, 'idx_islem_gecmisi_tarih', 'islem_gecmisi', 'tarih')
+    create_index(conn, 'idx_islem_gecmisi_tip_tarih', 'islem_gecmisi', 'islem_tipi, tarih')
+    create_index(conn, 'idx_stok_cikis_fis_tarih', 'stok_cikis_fis', 'tarih')
+    create_index(conn, 'idx_stok_cikis_fis_detay_fis', 'stok_cikis_fis_detay', 'fis_id')
+    create_index(conn, 'idx_urun_stok_depo', 'urun_stok', 'depo_id')
+    create_index(conn, 'idx_urun_urun_adi', 'urun', 'urun_adi')
+
+
+
+def fis_baglantilarini_doldur(conn, chunk_size=BACKFILL_CHUNK, pause=0.0):
+    """Eski STOK_CIKIS geçmiş kayıtlarını fiş detay satırlarıyla eşleştirir
+
+    Eşleşme: aynı depo, ürün ve çıkış adedi; fiş zamanı ±1 gün içinde (geçmiş
+    UTC, fiş yerel saatle yazılıyordu) ve en yakın olan. Her detay satırı
+    yalnızca bir geçmiş kaydına bağlanır. Tekrar çalıştırmak güvenlidir.
+    """
+    def parca(conn, alt, ust):
+        satirlar = conn.execute('''
+            SELECT id, urun_id, depo_id, eski_deger, yeni_deger, tarih
+            FROM islem_gecmisi
+            WHERE rowid > ? AND rowid <= ?
+            AND islem_tipi = 'STOK_CIKIS' AND fis_detay_id IS NULL
+        ''', (alt, ust)).fetchall()
+        guncellenen = 0
+        for satir in satirlar:
+            try:
+                adet = int(satir[3]) - int(satir[4])
+            except (TypeError, ValueError):
+                continue
+            detay = conn.execute('''
+                SELECT fd.id, fd.fis_id
+                FROM stok_cikis_fis_detay fd
+                JOIN stok_cikis_fis f ON f.id = fd.fis_id
+                WHERE f.depo_id = ? AND fd.urun_id = ? AND fd.cikis_adedi = ?
+                AND f.tarih >= datetime(?, '-1 day') AND f.tarih < datetime(?, '+1 day')
+                AND NOT EXISTS (SELECT 1 FROM islem_gecmisi x WHERE x.fis_detay_id = fd.id)
+                ORDER BY ABS(julianday(f.tarih) - julianday(?))
+                LIMIT 1
+            ''', (satir[2], satir[1], adet, satir[5], satir[5], satir[5])).fetchone()
+            if detay:
+                conn.execute(
+                    'UPDATE islem_gecmisi SET fis_id = ?, fis_detay_id = ? WHERE id = ?',
+                    (detay[1], detay[0], satir[0])
+                )
+                guncellenen += 1
+        return guncellenen
+    return run_in_chunks(conn, 'islem_gecmisi', parca, chunk_size, pause)
+
+
+@migration(4, 'islem_fis_baglantisi', transactional=False)
+def _islem_fis_baglantisi(conn):
+    """Stok çıkışı geçmiş kayıtlarını fiş ve fiş detay satırına doğrudan bağlar
+
+    Sadece sütunlar ve index'ler eklenir. Eski kayıtların eşleştirilmesi satır
+    başına arama yaptığı için açılışta (init_schema) çalıştırılmaz; bakım
+    sırasında "python migrations.py fis_bagla" ile yapılır.
+    """
+    add_column(conn, 'islem_gecmisi', 'fis_id', 'INTEGER REFERENCES stok_cikis_fis(id)')
+    add_column(conn, 'islem_gecmisi', 'fis_detay_id', 'INTEGER REFERENCES stok_cikis_fis_detay(id)')
+    create_index(conn, 'idx_islem_gecmisi_fis', 'islem_gecmisi', 'fis_id', where='fis_id IS NOT NULL')
+    create_index(conn, 'idx_islem_gecmisi_fis_detay', 'islem_gecmisi', 'fis_detay_id',
+                 where='fis_detay_id IS NOT NULL')
+    bagsiz = conn.execute('''
+        SELECT EXISTS (SELECT 1 FROM islem_gecmisi WHERE islem_tipi = 'STOK_CIKIS' AND fis_detay_id IS NULL)
+    ''').fetchone()[0]
+    if bagsiz:
+        print("ℹ️  Eski çıkış kayıtlarını fişlere bağlamak için: python migrations.py fis_bagla")
+
+
+
+@migration(5, 'gunluk_cikis_ozet')
+def _gunluk_cikis_ozet(conn):
+    """Günlük rapor için (gün, depo, kargo, platform) çıkış özet tablosu
+
+    İlk doldurma daily_summary.yeniden_olustur() ile aynı sorgudur ama burada
+    sabit yazılır; modüldeki sonraki değişiklikler bu geçişi etkilemez.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS gunluk_cikis_ozet (
+            gun TEXT NOT NULL,
+            depo_id INTEGER NOT NULL,
+            kargo_firmasi_id INTEGER NOT NULL DEFAULT 0,
+            platform_id INTEGER NOT NULL DEFAULT 0,
+            fis_sayisi INTEGER NOT NULL DEFAULT 0,
+            satir_sayisi INTEGER NOT NULL DEFAULT 0,
+            toplam_adet INTEGER NOT NULL DEFAULT 0,
+            toplam_desi REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (gun, depo_id, kargo_firmasi_id, platform_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('DELETE FROM gunluk_cikis_ozet')
+    conn.execute('''
+        INSERT INTO gunluk_cikis_ozet (
+            gun, depo_id, kargo_firmasi_id, platform_id,
+            fis_sayisi, satir_sayisi, toplam_adet, toplam_desi
+        )
+        SELECT date(f.tarih), f.depo_id,
+               COALESCE(fd.kargo_firmasi_id, 0), COALESCE(f.platform_id, 0),
+               COUNT(DISTINCT f.id), COUNT(fd.id),
+               COALESCE(SUM(fd.cikis_adedi), 0), COALESCE(SUM(fd.toplam_desi), 0)
+        FROM stok_cikis_fis f
+        LEFT JOIN stok_cikis_fis_detay fd ON fd.fis_id = f.id
+        GROUP BY 1, 2, 3, 4
+    ''')
+
+
+
+@migration(6, 'urun_arama_fts')
+def _urun_arama_fts(conn):
+    """Ürün adı, barkod ve jant ebatı için FTS5 trigram arama index'i
+
+    İçerik Türkçe katlanmış olarak tutulur (product_search.katla ile aynı).
+    SQLite FTS5 olmadan derlenmişse tablo oluşturulmaz; uygulama LIKE ile arar.
+    """
+    # Katlama product_search.katla_sql() ile üretilen ifadenin o günkü hali; sabit tutulur.
+    # Katlama değişirse tetikleyiciler ve urun_fts yeni bir geçişle yeniden kurulur.
+    katla = ("LOWER(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE("
+             "REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE("
+             "COALESCE({}, ''), 'İ', 'i'), 'I', 'i'), 'ı', 'i'), 'Ş', 's'), 'ş', 's'), 'Ç', 'c'), 'ç', 'c'), "
+             "'Ğ', 'g'), 'ğ', 'g'), 'Ö', 'o'), 'ö', 'o'), 'Ü', 'u'), 'ü', 'u'), 'Â', 'a'), 'â', 'a'), "
+             "'Î', 'i'), 'î', 'i'), 'Û', 'u'), 'û', 'u'), 'É', 'e'), 'é', 'e'))")
+    try:
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS urun_fts USING fts5(
+                urun_adi, barkod, jant_ebati, tokenize = 'trigram'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        print(f"⚠️  FTS5 kullanılamıyor, ürün araması LIKE ile yapılacak: {e}")
+        return
+
+    # Sıralama: ürün adı eşleşmesi barkod ve jant ebatından ağır basar
+    conn.execute("INSERT INTO urun_fts (urun_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 2.0)')")
+
+    adi, barkod, jant = (katla.format(f'new.{sutun}') for sutun in ('urun_adi', 'barkod', 'jant_ebati'))
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS urun_fts_ekle AFTER INSERT ON urun BEGIN
+            INSERT INTO urun_fts (rowid, urun_adi, barkod, jant_ebati)
+            VALUES (new.id, {adi}, {barkod}, {jant});
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS urun_fts_sil AFTER DELETE ON urun BEGIN
+            DELETE FROM urun_fts WHERE rowid = old.id;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS urun_fts_guncelle AFTER UPDATE OF id, urun_adi, barkod, jant_ebati ON urun BEGIN
+            DELETE FROM urun_fts WHERE rowid = old.id;
+            INSERT INTO urun_fts (rowid, urun_adi, barkod, jant_ebati)
+            VALUES (new.id, {adi}, {barkod}, {jant});
+        END
+    ''')
+
+    adi, barkod, jant = (katla.format(sutun) for sutun in ('urun_adi', 'barkod', 'jant_ebati'))
+    conn.execute('DELETE FROM urun_fts')
+    conn.execute(f'''
+        INSERT INTO urun_fts (rowid, urun_adi, barkod, jant_ebati)
+        SELECT id, {adi}, {barkod}, {jant} FROM urun
+    ''')
+
+
+
+@migration(7, 'urun_barkod_index', transactional=False)
+def _urun_barkod_index(conn):
+    """Barkod okutma için urun.barkod index'i
+
+    Yeni kurulumlarda UNIQUE kısıtının index'i yeterlidir; kısıtsız oluşturulmuş
+    eski tablolarda ayrı index eklenir.
+    """
+    for index in conn.execute('PRAGMA index_list(urun)').fetchall():
+        ilk_sutun = conn.execute(f'PRAGMA index_info("{index[1]}")').fetchone()
+        if ilk_sutun and ilk_sutun[2] == 'barkod':
+            return
+    create_index(conn, 'idx_urun_barkod', 'urun', 'barkod')
+
+
+
+@migration(8, 'urun_stok_ozet')
+def _urun_stok_ozet(conn):
+    """Ürün başına toplam stok, depo sayısı ve son hareket zamanı
+
+    urun_stok üzerindeki tetikleyicilerle güncel tutulur; ürün listesi bu tabloyu
+    okur ve stok miktarına göre index üzerinden sıralanır.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS urun_stok_ozet (
+            urun_id INTEGER PRIMARY KEY REFERENCES urun(id),
+            toplam_stok INTEGER NOT NULL DEFAULT 0,
+            depo_sayisi INTEGER NOT NULL DEFAULT 0,
+            son_hareket DATETIME
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_urun_stok_ozet_toplam
+        ON urun_stok_ozet (toplam_stok, urun_id)
+    ''')
+
+    # Her ürünün bir özet satırı olur (stoksuz ürünler 0 ile listelenir)
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS urun_stok_ozet_urun_ekle AFTER INSERT ON urun BEGIN
+            INSERT OR IGNORE INTO urun_stok_ozet (urun_id) VALUES (new.id);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS urun_stok_ozet_urun_sil AFTER DELETE ON urun BEGIN
+            DELETE FROM urun_stok_ozet WHERE urun_id = old.id;
+        END
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS urun_stok_ozet_stok_ekle AFTER INSERT ON urun_stok BEGIN
+            INSERT INTO urun_stok_ozet (urun_id, toplam_stok, depo_sayisi, son_hareket)
+            VALUES (new.urun_id, COALESCE(new.miktar, 0), 1, CURRENT_TIMESTAMP)
+            ON CONFLICT (urun_id) DO UPDATE SET
+                toplam_stok = toplam_stok + excluded.toplam_stok,
+                depo_sayisi = depo_sayisi + 1,
+                son_hareket = excluded.son_hareket;
+        END
+    ''')
+    # Ürün değişse de (urun_id güncellemesi) doğru kalması için eski satır çıkarılıp yenisi eklenir
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS urun_stok_ozet_stok_guncelle AFTER UPDATE OF urun_id, miktar ON urun_stok BEGIN
+            UPDATE urun_stok_ozet SET
+                toplam_stok = toplam_stok - COALESCE(old.miktar, 0),
+                depo_sayisi = depo_sayisi - 1
+            WHERE urun_id = old.urun_id;
+            INSERT INTO urun_stok_ozet (urun_id, toplam_stok, depo_sayisi, son_hareket)
+            VALUES (new.urun_id, COALESCE(new.miktar, 0), 1, CURRENT_TIMESTAMP)
+            ON CONFLICT (urun_id) DO UPDATE SET
+                toplam_stok = toplam_stok + excluded.toplam_stok,
+                depo_sayisi = depo_sayisi + 1,
+                son_hareket = excluded.son_hareket;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS urun_stok_ozet_stok_sil AFTER DELETE ON urun_stok BEGIN
+            UPDATE urun_stok_ozet SET
+                toplam_stok = toplam_stok - COALESCE(old.miktar, 0),
+                depo_sayisi = depo_sayisi - 1,
+                son_hareket = CURRENT_TIMESTAMP
+            WHERE urun_id = old.urun_id;
+        END
+    ''')
+
+    conn.execute('DELETE FROM urun_stok_ozet')
+    conn.execute('''
+        INSERT INTO urun_stok_ozet (urun_id, toplam_stok, depo_sayisi, son_hareket)
+        SELECT u.id, COALESCE(SUM(us.miktar), 0), COUNT(us.id), MAX(us.updated_at)
+        FROM urun u
+        LEFT JOIN urun_stok us ON us.urun_id = u.id
+        GROUP BY u.id
+    ''')
+
+    # Ürün listesi özet kartları: jant çeşidi index atlamalı taramayla sayılır
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_urun_jant_ebati ON urun (jant_ebati)')
+    conn.execute('ANALYZE urun')
+    conn.execute('ANALYZE urun_stok_ozet')
+
+
+@migration(9, 'urun_arama_adi')
+def _urun_arama_adi(conn):
+    """Türkçe katlanmış ürün adı (üretilmiş sütun) ve önek araması index'i
+
+    Stok işlem sayfasındaki ürün seçiciler ada göre önek aramasını bu index'te
+    aralık taraması olarak yapar ve (arama_adi, id) üzerinden sayfalar.
+    İfade, geçişin yazıldığı günkü product_search.katla_sql('urun_adi') çıktısıdır.
+    """
+    add_column(conn, 'urun', 'arama_adi',
+               "TEXT GENERATED ALWAYS AS (LOWER(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE("
+               "REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE("
+               "REPLACE(REPLACE(REPLACE(COALESCE(urun_adi, ''), 'İ', 'i'), 'I', 'i'), "
+               "'ı', 'i'), 'Ş', 's'), 'ş', 's'), 'Ç', 'c'), 'ç', 'c'), 'Ğ', 'g'), 'ğ', 'g'), 'Ö', 'o'), "
+               "'ö', 'o'), 'Ü', 'u'), 'ü', 'u'), 'Â', 'a'), 'â', 'a'), 'Î', 'i'), 'î', 'i'), 'Û', 'u'), "
+               "'û', 'u'), 'É', 'e'), 'é', 'e'))) VIRTUAL")
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_urun_arama_adi ON urun (arama_adi, id)')
+
+
+@migration(10, 'islem_gecmisi_filtre_indexleri', transactional=False)
+def _islem_gecmisi_filtre_indexleri(conn):
+    """İşlem geçmişi filtreleri için (filtre sütunu, tarih) index'leri
+
+    /gecmis her filtreyi tarih sırasıyla bu index'lerden okur; sayfa başına
+    sıralama yapılmaz. İşlem tipi için idx_islem_gecmisi_tip_tarih kullanılır.
+    """
+    for sutun in ('urun_id', 'depo_id', 'hedef_depo_id', 'kullanici_id'):
+        create_index(conn, f'idx_islem_gecmisi_{sutun}_tarih', 'islem_gecmisi', f'{sutun}, tarih',
+                     where=f'{sutun} IS NOT NULL')
+    conn.execute('ANALYZE islem_gecmisi')
+
+
+@migration(11, 'fis_toplamlari', transactional=False)
+def _fis_toplamlari(conn):
+    """Fiş başlığında toplam desi; fiş listesi için (depo, tarih) ve (platform, tarih) index'leri
+
+    Satır sayısı (toplam_urun_adedi) ve toplam desi fiş oluşturulurken yazılır;
+    fiş listesi detay satırlarını toplamadan sayfalanır.
+    """
+    add_column(conn, 'stok_cikis_fis', 'toplam_desi', 'REAL NOT NULL DEFAULT 0')
+    backfill(conn, 'stok_cikis_fis', '''
+        toplam_urun_adedi = (SELECT COUNT(*) FROM stok_cikis_fis_detay fd WHERE fd.fis_id = stok_cikis_fis.id),
+        toplam_desi = (SELECT COALESCE(SUM(fd.toplam_desi), 0) FROM stok_cikis_fis_detay fd
+                       WHERE fd.fis_id = stok_cikis_fis.id)
+    ''')
+    create_index(conn, 'idx_stok_cikis_fis_depo_tarih', 'stok_cikis_fis', 'depo_id, tarih')
+    create_index(conn, 'idx_stok_cikis_fis_platform_tarih', 'stok_cikis_fis', 'platform_id, tarih',
+                 where='platform_id IS NOT NULL')
+
+
+@migration(12, 'stok_giris_fis')
+def _stok_giris_fis(conn):
+    """Çok satırlı stok girişleri için giriş fişi ve fiş detay tabloları"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS stok_giris_fis (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fis_no VARCHAR(50) NOT NULL UNIQUE,
+            tarih DATETIME DEFAULT CURRENT_TIMESTAMP,
+            depo_id INTEGER NOT NULL,
+            aciklama TEXT,
+            toplam_urun_adedi INTEGER DEFAULT 0,
+            toplam_adet INTEGER DEFAULT 0,
+            kullanici_id INTEGER,
+            kullanici_adi VARCHAR(50),
+            FOREIGN KEY (depo_id) REFERENCES depo (id),
+            FOREIGN KEY (kullanici_id) REFERENCES kullanici (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS stok_giris_fis_detay (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fis_id INTEGER NOT NULL,
+            urun_id INTEGER NOT NULL,
+            urun_adi VARCHAR(200),
+            giris_adedi INTEGER NOT NULL,
+            FOREIGN KEY (fis_id) REFERENCES stok_giris_fis (id),
+            FOREIGN KEY (urun_id) REFERENCES urun (id)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_stok_giris_fis_tarih ON stok_giris_fis (tarih)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_stok_giris_fis_detay_fis ON stok_giris_fis_detay (fis_id)')
+
+
+@migration(13, 'depo_transfer_fis')
+def _depo_transfer_fis(conn):
+    """Çok satırlı depo transferleri için transfer fişi ve fiş detay tabloları"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS depo_transfer_fis (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fis_no VARCHAR(50) NOT NULL UNIQUE,
+            tarih DATETIME DEFAULT CURRENT_TIMESTAMP,
+            kaynak_depo_id INTEGER NOT NULL,
+            hedef_depo_id INTEGER NOT NULL,
+            aciklama TEXT,
+            toplam_urun_adedi INTEGER DEFAULT 0,
+            toplam_adet INTEGER DEFAULT 0,
+            kullanici_id INTEGER,
+            kullanici_adi VARCHAR(50),
+            FOREIGN KEY (kaynak_depo_id) REFERENCES depo (id),
+            FOREIGN KEY (hedef_depo_id) REFERENCES depo (id),
+            FOREIGN KEY (kullanici_id) REFERENCES kullanici (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS depo_transfer_fis_detay (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fis_id INTEGER NOT NULL,
+            urun_id INTEGER NOT NULL,
+            urun_adi VARCHAR(200),
+            miktar INTEGER NOT NULL,
+            FOREIGN KEY (fis_id) REFERENCES depo_transfer_fis (id),
+            FOREIGN KEY (urun_id) REFERENCES urun (id)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_depo_transfer_fis_tarih ON depo_transfer_fis (tarih)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_depo_transfer_fis_detay_fis ON depo_transfer_fis_detay (fis_id)')
+
+
+@migration(14, 'veri_surumu')
+def _veri_surumu(conn):
+    """Tablo başına değişiklik sayacı (result_cache.py)
+
+    İzlenen tablolara yapılan her INSERT/UPDATE/DELETE tetikleyiciyle tablonun
+    sürümünü artırır. Sürümler veritabanında tutulduğu için bütün worker'lar
+    aynı değeri görür; önbellek kayıtları ve ETag'ler bu sürümlerle damgalanır.
+    Yeni bir tablo izlenecekse yeni bir geçişle eklenmelidir.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS veri_surumu (
+            tablo TEXT PRIMARY KEY,
+            surum INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    tablolar = ('urun', 'urun_stok', 'depo', 'kargo_firmasi', 'platform', 'musteri', 'ayarlar', 'stok_cikis_fis')
+    for tablo in tablolar:
+        conn.execute('INSERT OR IGNORE INTO veri_surumu (tablo) VALUES (?)', (tablo,))
+        for olay in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS veri_surumu_{tablo}_{olay.lower()} AFTER {olay} ON {tablo} BEGIN
+                    UPDATE veri_surumu SET surum = surum + 1 WHERE tablo = '{tablo}';
+                END
+            ''')
+
+
+@migration(15, 'stok_islem_tetikleyicisi')
+def _stok_islem_tetikleyicisi(conn):
+    """tr_stok_islem_detay_after_insert tetikleyicisinin düzeltilmiş hali
+
+    Geçiş 2'deki (unified_stock_system.py'den taşınan) tetikleyicide iki hata var:
+    - urun_stok'ta olmayan created_at sütununa yazdığı için her stok_islem_detay
+      eklemesi "no column named created_at" hatasıyla düşer;
+    - transferde hedef depoya önce INSERT OR IGNORE, sonra UPDATE yapıldığından
+      hedefte kaydı olmayan ürün için miktar iki kez eklenir.
+    Yeni halde created_at yazılmaz ve hedef depoda önce güncellenir, kayıt yoksa eklenir.
+    """
+    conn.execute('DROP TRIGGER IF EXISTS tr_stok_islem_detay_after_insert')
+    conn.execute('''
+        CREATE TRIGGER tr_stok_islem_detay_after_insert
+        AFTER INSERT ON stok_islem_detay
+        BEGIN
+            -- Stok güncelle
+            UPDATE urun_stok
+            SET miktar = miktar + (
+                NEW.adet * (
+                    SELECT stok_yonu
+                    FROM islem_tipi
+                    WHERE id = (SELECT islem_tipi_id FROM stok_islem WHERE id = NEW.islem_id)
+                )
+            ),
+            updated_at = CURRENT_TIMESTAMP
+            WHERE urun_id = NEW.urun_id
+            AND depo_id = (SELECT depo_id FROM stok_islem WHERE id = NEW.islem_id);
+
+            -- Eğer stok kaydı yoksa oluştur
+            INSERT OR IGNORE INTO urun_stok (urun_id, depo_id, miktar, updated_at)
+            SELECT NEW.urun_id,
+                   (SELECT depo_id FROM stok_islem WHERE id = NEW.islem_id),
+                   NEW.adet * (
+                       SELECT stok_yonu
+                       FROM islem_tipi
+                       WHERE id = (SELECT islem_tipi_id FROM stok_islem WHERE id = NEW.islem_id)
+                   ),
+                   CURRENT_TIMESTAMP
+            WHERE NOT EXISTS (
+                SELECT 1 FROM urun_stok
+                WHERE urun_id = NEW.urun_id
+                AND depo_id = (SELECT depo_id FROM stok_islem WHERE id = NEW.islem_id)
+            );
+
+            -- Transfer işlemi ise hedef depoya stok ekle (önce güncelle, kayıt yoksa ekle)
+            UPDATE urun_stok
+            SET miktar = miktar + NEW.adet,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE urun_id = NEW.urun_id
+            AND depo_id = (
+                SELECT hedef_depo_id
+                FROM stok_islem si, islem_tipi it
+                WHERE si.id = NEW.islem_id
+                AND it.id = si.islem_tipi_id
+                AND it.kod = 'TRANSFER'
+                AND si.hedef_depo_id IS NOT NULL
+            );
+
+            -- Hedef depoda stok kaydı yoksa oluştur
+            INSERT OR IGNORE INTO urun_stok (urun_id, depo_id, miktar, updated_at)
+            SELECT NEW.urun_id,
+                   si.hedef_depo_id,
+                   NEW.adet,
+                   CURRENT_TIMESTAMP
+            FROM stok_islem si, islem_tipi it
+            WHERE si.id = NEW.islem_id
+            AND it.id = si.islem_tipi_id
+            AND it.kod = 'TRANSFER'
+            AND si.hedef_depo_id IS NOT NULL
+            AND NOT EXISTS (
+                SELECT 1 FROM urun_stok
+                WHERE urun_id = NEW.urun_id
+                AND depo_id = si.hedef_depo_id
+            );
+        END
+    ''')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'durum':
+        status()
+    elif len(sys.argv) > 1 and sys.argv[1] == 'fis_bagla':
+        conn = database.connect()
+        conn.isolation_level = None
+        try:
+            print(f"🔗 {fis_baglantilarini_doldur(conn)} çıkış kaydı fişine bağlandı")
+        finally:
+            conn.close()
+    else:
+        print("🔧 BikeStock Veritabanı Geçişleri")
+        print("=" * 50)
+        migrate()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+BikeStock - Keyset (imleç) sayfalama yardımcıları
+OFFSET yerine son görülen satırın sıralama anahtarından devam edilir; sayfa
+maliyeti tablo büyüklüğünden ve sayfa numarasından bağımsızdır.
+
+İmleç, anahtar değerlerinin URL'de taşınabilir (base64 JSON) halidir.
+"""
+
+import base64
+import json
+
+SAYFA_BOYUTU = 50
+EN_BUYUK_SAYFA_BOYUTU = 200
+
+
+def sayfa_boyutu(deger, varsayilan=SAYFA_BOYUTU):
+    """İstekten gelen sayfa boyutunu 1..EN_BUYUK_SAYFA_BOYUTU aralığına sınırlar"""
+    try:
+        boyut = int(deger)
+    except (TypeError, ValueError):
+        return varsayilan
+    return max(1, min(boyut, EN_BUYUK_SAYFA_BOYUTU))
+
+
+def imlec_olustur(degerler):
+    """Anahtar değerlerini URL güvenli imlece çevirir"""
+    ham = json.dumps(list(degerler), ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(ham.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def imlec_coz(imlec, anahtar_sayisi):
+    """İmleci anahtar değerleri demetine çevirir; geçersizse None"""
+    if not imlec:
+        return None
+    try:
+        ham = base64.urlsafe_b64decode(imlec + '=' * (-len(imlec) % 4))
+        degerler = json.loads(ham.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(degerler, list) or len(degerler) != anahtar_sayisi:
+        return None
+    return tuple(degerler)
+
+
+def yon(azalan, geri):
+    """Sorgunun gerçek sıralama yönü; önceki sayfa için sıralama ters çevrilir"""
+    return azalan != geri
+
+
+def keyset_kosulu(sutunlar, degerler, azalan):
+    """(a, b) > (?, ?) biçiminde satır değeri karşılaştırması ve parametreleri
+
+    SQLite satır değeri karşılaştırmasını (a, b) index'inde aralık taraması
+    olarak çalıştırır.
+    """
+    isaret = '<' if azalan else '>'
+    sol = ', '.join(sutunlar)
+    sag = ', '.join('?' * len(sutunlar))
+    return f'({sol}) {isaret} ({sag})', list(degerler)
+
+
+def siralama_ifadesi(sutunlar, azalan):
+    """ORDER BY ifadesi (tüm sütunlar aynı yönde)"""
+    yon_sql = 'DESC' if azalan else 'ASC'
+    return ', '.join(f'{sutun} {yon_sql}' for sutun in sutunlar)
+
+
+def sayfa_sonucu(satirlar, boyut, anahtar, geri, imlec_var):
+    """boyut + 1 satırlık sorgu sonucundan (satırlar, sonraki imleç, önceki imleç) üretir
+
+    anahtar: satırdan sıralama anahtarı demetini döndüren fonksiyon.
+    geri: sorgu önceki sayfa için ters sırayla çalıştırıldıysa True.
+    """
+    satirlar = list(satirlar)
+    fazlasi_var = len(satirlar) > boyut
+    satirlar = satirlar[:boyut]
+    if geri:
+        satirlar.reverse()
+        sonraki_var, onceki_var = imlec_var, fazlasi_var
+    else:
+        sonraki_var, onceki_var = fazlasi_var, imlec_var
+
+    sonraki = imlec_olustur(anahtar(satirlar[-1])) if satirlar and sonraki_var else None
+    onceki = imlec_olustur(anahtar(satirlar[0])) if satirlar and onceki_var else None
+    return satirlar, sonraki, onceki
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+BikeStock - CSV'den toplu ürün ve açılış stoğu aktarımı
+Dosya satır satır okunur (tamamı belleğe alınmaz), satırlar PARCA_BOYUTU'luk
+parçalar halinde ayrı işlemlerde yazılır. Hatalı satırlar raporlanır, aktarım
+durmaz.
+
+Sütunlar (başlık satırı zorunlu, ayraç ',' veya ';'):
+    urun_adi, jant_ebati     zorunlu
+    desi, barkod, aciklama   isteğe bağlı
+    stok                     depo_id verilmişse o depodaki açılış stoğu
+    stok_<depo_id>           belirtilen depodaki açılış stoğu (ör. stok_2)
+
+Mükerrer kontrolü, mevcut barkodlar ve (ürün adı, jant ebatı) çiftleri başta
+belleğe alınarak yapılır; dosya içindeki tekrarlar da yakalanır.
+
+Kullanım:
+    python product_import.py katalog.csv
+    python product_import.py katalog.csv --depo 1 --kullanici admin
+"""
+
+import argparse
+import csv
+import io
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+import database
+import stock_moves
+
+PARCA_BOYUTU = 500
+# Sonuçta tutulan en fazla hata satırı (sayım hepsini kapsar)
+HATA_SINIRI = 1000
+
+ZORUNLU_SUTUNLAR = ('urun_adi', 'jant_ebati')
+
+
+def _ayrac(ilk_satir):
+    """Başlık satırına göre ayraç; Türkçe Excel çıktıları ';' kullanır"""
+    return ';' if ilk_satir.count(';') > ilk_satir.count(',') else ','
+
+
+def csv_ac(dosya):
+    """(başlık, (satır no, {sütun: değer}) üreteci); başlıklar küçük harfe çevrilir"""
+    ilk_satir = dosya.readline()
+    ayrac = _ayrac(ilk_satir)
+    baslik = [sutun.strip().lower() for sutun in next(csv.reader([ilk_satir], delimiter=ayrac), [])]
+    eksik = [sutun for sutun in ZORUNLU_SUTUNLAR if sutun not in baslik]
+    if eksik:
+        raise ValueError(f'Eksik sütun: {", ".join(eksik)}')
+
+    def satirlar():
+        for satir_no, degerler in enumerate(csv.reader(dosya, delimiter=ayrac), start=2):
+            if any(deger.strip() for deger in degerler):
+                yield satir_no, dict(zip(baslik, (deger.strip() for deger in degerler)))
+    return baslik, satirlar()
+
+
+def stok_sutunlari(conn, baslik, depo_id=None):
+    """{sütun adı: depo_id}; bilinmeyen depo varsa ValueError"""
+    depolar = {satir[0] for satir in conn.execute('SELECT id FROM depo')}
+    sutunlar = {}
+    if depo_id is not None and 'stok' in baslik:
+        sutunlar['stok'] = depo_id
+    for sutun in baslik:
+        if sutun.startswith('stok_') and sutun[5:].isdigit():
+            sutunlar[sutun] = int(sutun[5:])
+    bilinmeyen = sorted({d for d in sutunlar.values() if d not in depolar})
+    if bilinmeyen:
+        raise ValueError(f'Depo bulunamadı (ID: {", ".join(map(str, bilinmeyen))})')
+    return sutunlar
+
+
+def _urun_satiri(satir, stoklar):
+    """CSV satırını doğrular; (urun, {depo_id: adet}) veya hata mesajıyla ValueError"""
+    urun_adi = satir.get('urun_adi', '')
+    jant_ebati = satir.get('jant_ebati', '')
+    if not urun_adi or not jant_ebati:
+        raise ValueError('Ürün adı ve jant ebatı zorunludur')
+    try:
+        desi = float((satir.get('desi') or '0').replace(',', '.'))
+    except ValueError:
+        raise ValueError(f'Geçersiz desi: {satir.get("desi")}')
+    barkod = satir.get('barkod') or None
+    if barkod == '00':
+        barkod = None
+
+    acilis = {}
+    for sutun, depo_id in stoklar.items():
+        deger = satir.get(sutun)
+        if not deger:
+            continue
+        try:
+            adet = int(deger)
+        except ValueError:
+            raise ValueError(f'Geçersiz stok ({sutun}): {deger}')
+        if adet < 0:
+            raise ValueError(f'Stok negatif olamaz ({sutun})')
+        if adet:
+            acilis[depo_id] = acilis.get(depo_id, 0) + adet
+    return (urun_adi, jant_ebati, desi, barkod, satir.get('aciklama') or None), acilis
+
+
+def _parca_yaz(conn, parca, kullanici_id, kullanici_adi):
+    """Doğrulanmış ürünleri tek işlemde yazar; eklenen stok satırı sayısını döndürür"""
+    simdi = datetime.now()
+    gecmis, stoklar = [], {}
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        for _, urun, acilis in parca:
+            urun_id = conn.execute('''
+                INSERT INTO urun (urun_adi, jant_ebati, desi, barkod, aciklama, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (*urun, simdi, simdi)).lastrowid
+            urun_adi, jant_ebati, desi, barkod, _ = urun
+            gecmis.append(('URUN_EKLEME', urun_id, None, None, f'Yeni ürün: {urun_adi}',
+                           f'Jant: {jant_ebati}, Desi: {desi} kg, Barkod: {barkod or "00"}'))
+            for depo_id, adet in acilis.items():
+                stoklar.setdefault(depo_id, {})[urun_id] = adet
+                gecmis.append(('STOK_GIRIS', urun_id, depo_id, '0', f'{urun_adi} - CSV açılış stoğu', str(adet)))
+
+        for depo_id, miktarlar in stoklar.items():
+            stock_moves.stok_ekle(conn, depo_id, miktarlar)
+        conn.executemany('''
+            INSERT INTO islem_gecmisi (
+                islem_tipi, urun_id, depo_id, eski_deger, urun_bilgisi, yeni_deger,
+                tarih, kullanici_id, kullanici_adi
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(*kayit, simdi, kullanici_id, kullanici_adi) for kayit in gecmis])
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    return sum(len(miktarlar) for miktarlar in stoklar.values())
+
+
+def ice_aktar(conn, dosya, depo_id=None, kullanici_id=None, kullanici_adi=None, parca_boyutu=PARCA_BOYUTU):
+    """Metin dosyasındaki ürünleri aktarır; özet sözlüğü döndürür
+
+    conn işlem dışında olmalıdır; her parça kendi BEGIN IMMEDIATE/COMMIT'iyle yazılır.
+    Başlık hatalıysa veya bilinmeyen depo varsa ValueError.
+    """
+    baslama = time.perf_counter()
+    baslik, satirlar = csv_ac(dosya)
+    stoklar = stok_sutunlari(conn, baslik, depo_id)
+
+    barkodlar = {satir[0] for satir in conn.execute('SELECT barkod FROM urun WHERE barkod IS NOT NULL')}
+    adlar = {(satir[0], satir[1]) for satir in conn.execute('SELECT urun_adi, jant_ebati FROM urun')}
+
+    sonuc = {'eklenen': 0, 'stok_satiri': 0, 'hatali': 0, 'hatalar': []}
+
+    def hata(satir_no, mesaj):
+        sonuc['hatali'] += 1
+        if len(sonuc['hatalar']) < HATA_SINIRI:
+            sonuc['hatalar'].append((satir_no, mesaj))
+
+    def yaz(parca):
+        try:
+            sonuc['stok_satiri'] += _parca_yaz(conn, parca, kullanici_id, kullanici_adi)
+            sonuc['eklenen'] += len(parca)
+        except sqlite3.IntegrityError:
+            # Parça geri alındı; hatalı satırı bulmak için satırlar tek tek yazılır
+            for kayit in parca:
+                try:
+                    sonuc['stok_satiri'] += _parca_yaz(conn, [kayit], kullanici_id, kullanici_adi)
+                    sonuc['eklenen'] += 1
+                except sqlite3.IntegrityError as e:
+                    hata(kayit[0], str(e))
+
+    parca = []
+    for satir_no, satir in satirlar:
+        try:
+            urun, acilis = _urun_satiri(satir, stoklar)
+        except ValueError as e:
+            hata(satir_no, str(e))
+            continue
+        urun_adi, jant_ebati, _, barkod, _ = urun
+        if barkod and barkod in barkodlar:
+            hata(satir_no, f'Barkod zaten kullanılıyor: {barkod}')
+            continue
+        if (urun_adi, jant_ebati) in adlar:
+            hata(satir_no, f'"{urun_adi}" ({jant_ebati}") zaten mevcut')
+            continue
+        if barkod:
+            barkodlar.add(barkod)
+        adlar.add((urun_adi, jant_ebati))
+        parca.append((satir_no, urun, acilis))
+        if len(parca) >= parca_boyutu:
+            yaz(parca)
+            parca = []
+    if parca:
+        yaz(parca)
+
+    sonuc['sure_ms'] = (time.perf_counter() - baslama) * 1000
+    return sonuc
+
+
+def metin_akisi(ikili_akis):
+    """Yüklenen dosyanın ikili akışını satır satır okunan metne çevirir (BOM atlanır)"""
+    return io.TextIOWrapper(ikili_akis, encoding='utf-8-sig', newline='')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='BikeStock CSV ürün ve açılış stoğu aktarımı')
+    parser.add_argument('dosya', help='CSV dosyası (UTF-8)')
+    parser.add_argument('--depo', type=int, help='"stok" sütununun yazılacağı depo id')
+    parser.add_argument('--kullanici', default=None, help='Geçmiş kayıtlarında görünecek kullanıcı adı')
+    args = parser.parse_args(argv)
+
+    conn = database.connect()
+    conn.isolation_level = None
+    try:
+        kullanici_id = None
+        if args.kullanici:
+            satir = conn.execute('SELECT id FROM kullanici WHERE kullanici_adi = ?', (args.kullanici,)).fetchone()
+            if not satir:
+                print(f"❌ Kullanıcı bulunamadı: {args.kullanici}")
+                return 1
+            kullanici_id = satir[0]
+        with open(args.dosya, encoding='utf-8-sig', newline='') as dosya:
+            sonuc = ice_aktar(conn, dosya, args.depo, kullanici_id, args.kullanici)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    finally:
+        conn.close()
+
+    print(f"📦 {sonuc['eklenen']} ürün eklendi, {sonuc['stok_satiri']} stok satırı yazıldı "
+          f"({sonuc['sure_ms']:.0f} ms)")
+    if sonuc['hatali']:
+        print(f"⚠️  {sonuc['hatali']} satır aktarılmadı:")
+        for satir_no, mesaj in sonuc['hatalar'][:50]:
+            print(f"   satır {satir_no}: {mesaj}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
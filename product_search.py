@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+BikeStock - Ürün arama yardımcıları
+urun_fts (FTS5, trigram) tablosu için Türkçe harf katlama ve MATCH ifadesi üretimi.
+
+Katlama hem Python'da (arama terimi) hem SQL'de (tetikleyiciler) aynı tabloyla
+yapılır: İ/I/ı/Î/î -> i, Ş/ş -> s, Ç/ç -> c, Ğ/ğ -> g, Ö/ö -> o, Ü/ü/Û/û -> u,
+Â/â -> a, É/é -> e. Böylece "ic lastik", "İç Lastik" ve "IC LASTIK" aynı
+kayıtları bulur. Ardından yalnız ASCII harfler küçültülür; SQLite LOWER() de
+yalnız ASCII'yi küçülttüğü için iki taraf aynı sonucu verir.
+
+Tetikleyiciler ve urun.arama_adi geçişlerde sabit SQL olarak yazılır;
+KATLAMA değişirse bunları yeniden kuran yeni bir geçiş eklenmelidir.
+`python product_search.py` iki tarafın ve veritabanındaki index'in aynı
+katlamayı kullandığını kontrol eder.
+"""
+
+import sqlite3
+import string
+import sys
+
+import database
+
+# Trigram tokenizer 3 karakterden kısa terimleri index'ten arayamaz
+MIN_TERIM = 3
+
+# bm25 sıralaması tüm eşleşmeleri puanlar; daha fazla eşleşen genel terimlerde
+# (yazım henüz başındayken) sıralama yapılmaz, ilk eşleşmeler döndürülür
+SIRALAMA_SINIRI = 200
+
+KATLAMA = {
+    'İ': 'i', 'I': 'i', 'ı': 'i',
+    'Ş': 's', 'ş': 's',
+    'Ç': 'c', 'ç': 'c',
+    'Ğ': 'g', 'ğ': 'g',
+    'Ö': 'o', 'ö': 'o',
+    'Ü': 'u', 'ü': 'u',
+    'Â': 'a', 'â': 'a',
+    'Î': 'i', 'î': 'i',
+    'Û': 'u', 'û': 'u',
+    'É': 'e', 'é': 'e',
+}
+
+# KATLAMA ve ardından yalnız ASCII küçültme (str.lower() bütün Unicode harfleri küçültür)
+_KATLAMA_TABLOSU = str.maketrans({**KATLAMA, **{harf: harf.lower() for harf in string.ascii_uppercase}})
+
+# katla() ile katla_sql() karşılaştırmasında kullanılan örnek adlar
+KATLAMA_ORNEKLERI = (
+    'İç Lastik 26"', 'IŞIKLI ZİL', 'Çocuk Bisikleti Ğ', 'Ön Çatal Ü', 'ışık', 'Âlet Çantası',
+    'Îzmir Bayi', 'Ûst Boru', 'Édition Vélo', 'Ärger Größe', 'ΑΒΓ', 'MTB 29 Kadro', '',
+)
+
+
+def katla(metin):
+    """Arama terimini index'teki biçime çevirir"""
+    return (metin or '').translate(_KATLAMA_TABLOSU)
+
+
+def katla_sql(ifade):
+    """katla() ile aynı dönüşümü yapan SQL ifadesi (tetikleyiciler için)"""
+    sql = f"COALESCE({ifade}, '')"
+    for kaynak, hedef in KATLAMA.items():
+        sql = f"REPLACE({sql}, '{kaynak}', '{hedef}')"
+    return f'LOWER({sql})'
+
+
+def index_katlamasi_guncel(conn):
+    """urun.arama_adi sütunu katla_sql() ile aynı ifadeyle mi kurulmuş (KATLAMA değişip geçiş eklenmediyse False)"""
+    tablo = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'urun'").fetchone()
+    return tablo is None or 'arama_adi' not in tablo[0] or katla_sql('urun_adi') in tablo[0]
+
+
+def katlama_farklari(ornekler=KATLAMA_ORNEKLERI):
+    """katla() ile katla_sql() sonucu farklı olan örnekler: [(metin, python, sql)]"""
+    conn = sqlite3.connect(':memory:')
+    try:
+        farklar = []
+        for metin in ornekler:
+            sql = conn.execute(f'SELECT {katla_sql("?")}', (metin,)).fetchone()[0]
+            if katla(metin) != sql:
+                farklar.append((metin, katla(metin), sql))
+        return farklar
+    finally:
+        conn.close()
+
+
+def fts_sorgusu(terim):
+    """(MATCH ifadesi, kısa kelimeler) döndürür
+
+    Her kelime tırnaklı bir ifade olur ve hepsi AND ile aranır. MIN_TERIM'den
+    kısa kelimeler MATCH'e katılamaz, ayrıca döndürülür. Hiç uzun kelime
+    yoksa MATCH ifadesi None olur.
+    """
+    uzun, kisa = [], []
+    for kelime in katla(terim).split():
+        (uzun if len(kelime) >= MIN_TERIM else kisa).append(kelime)
+    if not uzun:
+        return None, kisa
+    return ' '.join('"' + kelime.replace('"', '""') + '"' for kelime in uzun), kisa
+
+
+def like_deseni(kelime):
+    """LIKE için %kelime% deseni; % ve _ kaçışlanır (ESCAPE '\\')"""
+    kelime = kelime.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{kelime}%'
+
+
+def fts_kosulu(terim):
+    """urun_fts üzerinde WHERE koşulu ve parametreleri
+
+    Uzun kelimeler trigram index'iyle (MATCH), kısa kelimeler katlanmış içerik
+    üzerinde LIKE ile aranır. Sadece kısa kelime varsa koşul urun_fts'i tarar
+    ama Türkçe katlama yine geçerlidir. Aranacak kelime yoksa (None, None) döner.
+    """
+    eslesme, kisa = fts_sorgusu(terim)
+    kosullar, params = [], []
+    if eslesme is not None:
+        kosullar.append('urun_fts MATCH ?')
+        params.append(eslesme)
+    for kelime in kisa:
+        kosullar.append("(urun_fts.urun_adi || ' ' || urun_fts.barkod || ' ' || urun_fts.jant_ebati) LIKE ? ESCAPE '\\'")
+        params.append(like_deseni(kelime))
+    if not kosullar:
+        return None, None
+    return ' AND '.join(kosullar), params
+
+
+def eslesen_urun_idleri(conn, terim, limit=10):
+    """En iyi eşleşen ürün id'lerini sıralı döndürür; aranacak kelime yoksa None
+
+    Önce en fazla SIRALAMA_SINIRI + 1 aday alınır (index'ten, puanlamasız).
+    Eşleşme sayısı sınırın altındaysa bm25 ile sıralanır; böylece yazım
+    sırasındaki her istek eşleşme sayısından bağımsız olarak kısa sürer.
+    """
+    kosul, params = fts_kosulu(terim)
+    if kosul is None:
+        return None
+    adaylar = conn.execute(
+        f'SELECT rowid FROM urun_fts WHERE {kosul} LIMIT ?', (*params, SIRALAMA_SINIRI + 1)
+    ).fetchall()
+    if len(adaylar) > SIRALAMA_SINIRI:
+        return [satir[0] for satir in adaylar[:limit]]
+    return [satir[0] for satir in conn.execute(
+        f'SELECT rowid FROM urun_fts WHERE {kosul} ORDER BY rank LIMIT ?', (*params, limit)
+    )]
+
+
+def main():
+    hata = 0
+    for metin, python, sql in katlama_farklari():
+        print(f"❌ katla() ve katla_sql() farklı: {metin!r} -> {python!r} / {sql!r}")
+        hata = 1
+    conn = database.connect()
+    try:
+        if not index_katlamasi_guncel(conn):
+            print('❌ urun.arama_adi eski katlamayla kurulmuş; katlamayı yeniden kuran bir geçiş ekleyin')
+            hata = 1
+    finally:
+        conn.close()
+    if not hata:
+        print('✅ Katlama tutarlı')
+    return hata
+
+
+if __name__ == '__main__':
+    sys.exit(main())
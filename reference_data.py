@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+BikeStock - Referans verisi önbelleği
+depo, kargo_firmasi, platform, musteri ve ayarlar tabloları nadiren değişir
+ama neredeyse her sayfada açılır liste olarak okunur. Bu tablolar süreç başına
+bir kez okunup değişmez kayıtlar (NamedTuple) halinde bellekte tutulur.
+
+Bu tablolara yazan route'lar commit'ten sonra gecersiz_kil() çağırır; sonraki
+istek tabloları yeniden okur. Diğer gunicorn worker'larındaki yazmalar
+tabloların veri_surumu sayaçlarından (result_cache.damga) fark edilir.
+"""
+
+import threading
+from types import MappingProxyType
+from typing import NamedTuple, Optional
+
+import result_cache
+
+TABLOLAR = ('depo', 'kargo_firmasi', 'platform', 'musteri', 'ayarlar')
+
+
+class Depo(NamedTuple):
+    id: int
+    depo_adi: str
+    adres: Optional[str]
+    telefon: Optional[str]
+    email: Optional[str]
+    aktif: bool
+
+
+class KargoFirmasi(NamedTuple):
+    id: int
+    firma_adi: str
+    kisa_adi: Optional[str]
+    telefon: Optional[str]
+    website: Optional[str]
+    aktif: bool
+
+
+class Platform(NamedTuple):
+    id: int
+    platform_adi: str
+    platform_tipi: Optional[str]
+    komisyon_orani: Optional[float]
+    aktif: bool
+
+
+class Musteri(NamedTuple):
+    id: int
+    musteri_adi: str
+    musteri_tipi: Optional[str]
+    telefon: Optional[str]
+    email: Optional[str]
+    aktif: bool
+
+
+class Referanslar:
+    """Tabloların bir anlık görüntüsü; listeler ada göre sıralı, salt okunur"""
+
+    def __init__(self, depolar, kargo_firmalari, platformlar, musteriler, ayarlar):
+        self.depolar = depolar
+        self.kargo_firmalari = kargo_firmalari
+        self.platformlar = platformlar
+        self.musteriler = musteriler
+        self.ayarlar = MappingProxyType(ayarlar)
+        self._depo_idleri = {depo.id: depo for depo in depolar}
+        self.aktif_depolar = tuple(d for d in depolar if d.aktif)
+        self.aktif_kargo_firmalari = tuple(k for k in kargo_firmalari if k.aktif)
+        self.aktif_platformlar = tuple(p for p in platformlar if p.aktif)
+        self.aktif_musteriler = tuple(m for m in musteriler if m.aktif)
+
+    def depo(self, depo_id):
+        """Id'ye göre depo; yoksa None"""
+        return self._depo_idleri.get(depo_id)
+
+    def ayar(self, anahtar, varsayilan=None):
+        return self.ayarlar.get(anahtar, varsayilan)
+
+
+def _oku(conn):
+    depolar = tuple(Depo(r[0], r[1], r[2], r[3], r[4], bool(r[5])) for r in conn.execute(
+        'SELECT id, depo_adi, adres, telefon, email, aktif FROM depo ORDER BY depo_adi'))
+    kargo_firmalari = tuple(KargoFirmasi(r[0], r[1], r[2], r[3], r[4], bool(r[5])) for r in conn.execute(
+        'SELECT id, firma_adi, kisa_adi, telefon, website, aktif FROM kargo_firmasi ORDER BY firma_adi'))
+    platformlar = tuple(Platform(r[0], r[1], r[2], r[3], bool(r[4])) for r in conn.execute(
+        'SELECT id, platform_adi, platform_tipi, komisyon_orani, aktif FROM platform ORDER BY platform_adi'))
+    musteriler = tuple(Musteri(r[0], r[1], r[2], r[3], r[4], bool(r[5])) for r in conn.execute(
+        'SELECT id, musteri_adi, musteri_tipi, telefon, email, aktif FROM musteri ORDER BY musteri_adi'))
+    ayarlar = {r[0]: r[1] for r in conn.execute('SELECT anahtar, deger FROM ayarlar')}
+    return Referanslar(depolar, kargo_firmalari, platformlar, musteriler, ayarlar)
+
+
+class ReferansOnbellegi:
+    """Süreç başına tek anlık görüntü; tabloların sürümü değişince yeniden okunur"""
+
+    def __init__(self):
+        self._kilit = threading.Lock()
+        # (damga, Referanslar); tek atamayla değiştiği için kilitsiz okunur
+        self._kayit = None
+
+    def getir(self, conn):
+        # Sürümler tablolardan önce okunur; arada gelen yazma bir sonraki istekte yeniden okutur
+        damga = result_cache.damga(conn, TABLOLAR)
+        kayit = self._kayit
+        if kayit is not None and kayit[0] == damga:
+            return kayit[1]
+        with self._kilit:
+            kayit = self._kayit
+            if kayit is None or kayit[0] != damga:
+                kayit = self._kayit = (damga, _oku(conn))
+            return kayit[1]
+
+    def gecersiz_kil(self):
+        # Kilit, sürmekte olan bir yüklemenin eski veriyi geri yazmasını engeller
+        with self._kilit:
+            self._kayit = None
+
+
+onbellek = ReferansOnbellegi()
+
+
+def getir(conn):
+    """Önbellekteki referans verisi; yoksa veya tablolar değişmişse conn ile okunur"""
+    return onbellek.getir(conn)
+
+
+def gecersiz_kil():
+    """Referans tablolarına yazan işlem commit edildikten sonra çağrılır"""
+    onbellek.gecersiz_kil()
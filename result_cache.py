@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+BikeStock - Veri sürümüne bağlı sonuç önbelleği
+Liste sayfalarının sorgu sonuçları, okudukları tabloların sürümleriyle
+(veri_surumu tablosu, tetikleyicilerle artar) damgalanarak saklanır. Sürümler
+değişmedikçe aynı istek sorgu çalıştırmadan önbellekten karşılanır; herhangi
+bir worker'da commit edilen yazma sürümü artırdığı için bütün worker'lardaki
+kayıtlar aynı anda geçersizleşir. Sayfa şablonu her istekte işlenir (oturum
+ve flash mesajları önbelleğe girmez).
+
+Kayıtlar süreç belleğinde tutulur (LRU); SONUC_ONBELLEK_BOYUTU=0 önbelleği kapatır.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+# Süreç başına tutulan en fazla sonuç
+BOYUT = int(os.environ.get('SONUC_ONBELLEK_BOYUTU', '256'))
+
+
+def surumler(conn):
+    """{tablo: sürüm}"""
+    return {satir[0]: satir[1] for satir in conn.execute('SELECT tablo, surum FROM veri_surumu')}
+
+
+def damga(conn, tablolar):
+    """Tabloların sürüm demeti; herhangi birine yazılınca değişir"""
+    surum = surumler(conn)
+    return tuple(surum.get(tablo, 0) for tablo in tablolar)
+
+
+class SonucOnbellegi:
+    """Anahtar başına (damga, sonuç) tutan, boyutu sınırlı LRU önbellek"""
+
+    def __init__(self, boyut=BOYUT):
+        self.boyut = boyut
+        self._kayitlar = OrderedDict()
+        self._kilit = threading.Lock()
+        self.istatistik = {'isabet': 0, 'iska': 0}
+
+    def getir(self, anahtar, damga, hesapla):
+        """Damga eşleşirse saklanan sonucu, değilse hesapla() sonucunu döndürür
+
+        Damga hesaplamadan önce okunmalıdır: arada commit edilen yazma, sonucu
+        eski damgayla saklatır ve sonraki istekte yeniden hesaplanır.
+        """
+        if self.boyut <= 0:
+            return hesapla()
+        with self._kilit:
+            kayit = self._kayitlar.get(anahtar)
+            if kayit is not None and kayit[0] == damga:
+                self._kayitlar.move_to_end(anahtar)
+                self.istatistik['isabet'] += 1
+                return kayit[1]
+            self.istatistik['iska'] += 1
+        sonuc = hesapla()
+        with self._kilit:
+            self._kayitlar[anahtar] = (damga, sonuc)
+            self._kayitlar.move_to_end(anahtar)
+            while len(self._kayitlar) > self.boyut:
+                self._kayitlar.popitem(last=False)
+        return sonuc
+
+
+onbellek = SonucOnbellegi()
+
+
+def getir(conn, anahtar, tablolar, hesapla):
+    """hesapla() sonucunu tablolar değişene kadar saklar
+
+    Sonuç paylaşılır; çağıran ve şablon üzerinde değişiklik yapmamalıdır.
+    """
+    return onbellek.getir(anahtar, damga(conn, tablolar), hesapla)
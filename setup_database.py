@@ -2,10 +2,10 @@
 # -*- coding: utf-8 -*-
 
 import sqlite3
-import hashlib
-from datetime import datetime
 import os
 
+import migrations
+
 def create_complete_database():
     """Tüm tabloları sıfırdan oluşturur"""
     
@@ -17,138 +17,13 @@ def create_complete_database():
         os.remove(db_path)
     
     print("Yeni veritabanı oluşturuluyor...")
+    # Şema ve varsayılan veriler sürümlü geçişlerden gelir
+    migrations.migrate(db_path)
+    
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     try:
-        # 1. Depo tablosu
-        print("Depo tablosu oluşturuluyor...")
-        cursor.execute('''
-            CREATE TABLE depo (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                depo_adi VARCHAR(100) NOT NULL,
-                lokasyon VARCHAR(255),
-                aktif BOOLEAN DEFAULT 1,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # 2. Ürün tablosu
-        print("Ürün tablosu oluşturuluyor...")
-        cursor.execute('''
-            CREATE TABLE urun (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                urun_adi VARCHAR(200) NOT NULL,
-                jant_ebati VARCHAR(20),
-                desi DECIMAL(8,2) DEFAULT 0.00,
-                aciklama TEXT,
-                barkod VARCHAR(100) UNIQUE,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # 3. Ürün stok tablosu
-        print("Ürün stok tablosu oluşturuluyor...")
-        cursor.execute('''
-            CREATE TABLE urun_stok (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                urun_id INTEGER NOT NULL,
-                depo_id INTEGER NOT NULL,
-                stok_adedi INTEGER DEFAULT 0,
-                min_stok_seviyesi INTEGER DEFAULT 0,
-                max_stok_seviyesi INTEGER DEFAULT 100,
-                last_updated DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (urun_id) REFERENCES urun (id),
-                FOREIGN KEY (depo_id) REFERENCES depo (id),
-                UNIQUE(urun_id, depo_id)
-            )
-        ''')
-        
-        # 4. Kullanıcı tablosu
-        print("Kullanıcı tablosu oluşturuluyor...")
-        cursor.execute('''
-            CREATE TABLE kullanici (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                kullanici_adi VARCHAR(50) NOT NULL UNIQUE,
-                email VARCHAR(100) UNIQUE,
-                sifre_hash VARCHAR(255) NOT NULL,
-                tam_ad VARCHAR(100),
-                rol VARCHAR(20) DEFAULT 'user',
-                aktif BOOLEAN DEFAULT 1,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                last_login DATETIME
-            )
-        ''')
-        
-        # 5. İşlem geçmişi tablosu
-        print("İşlem geçmişi tablosu oluşturuluyor...")
-        cursor.execute('''
-            CREATE TABLE islem_gecmisi (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                islem_tipi VARCHAR(50) NOT NULL,
-                urun_id INTEGER,
-                depo_id INTEGER,
-                hedef_depo_id INTEGER,
-                urun_bilgisi VARCHAR(500) NOT NULL,
-                eski_deger VARCHAR(100),
-                yeni_deger VARCHAR(100),
-                tarih DATETIME,
-                kullanici_id INTEGER,
-                kullanici_adi VARCHAR(50),
-                FOREIGN KEY (urun_id) REFERENCES urun (id),
-                FOREIGN KEY (depo_id) REFERENCES depo (id),
-                FOREIGN KEY (kullanici_id) REFERENCES kullanici (id)
-            )
-        ''')
-        
-        # 6. Stok çıkış fişi tablosu
-        print("Stok çıkış fişi tablosu oluşturuluyor...")
-        cursor.execute('''
-            CREATE TABLE stok_cikis_fis (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                fis_no VARCHAR(50) NOT NULL UNIQUE,
-                tarih DATETIME DEFAULT CURRENT_TIMESTAMP,
-                depo_id INTEGER NOT NULL,
-                aciklama TEXT,
-                toplam_urun_adedi INTEGER DEFAULT 0,
-                toplam_adet INTEGER DEFAULT 0,
-                kullanici_id INTEGER,
-                kullanici_adi VARCHAR(50),
-                durum VARCHAR(20) DEFAULT 'TAMAMLANDI',
-                FOREIGN KEY (depo_id) REFERENCES depo (id),
-                FOREIGN KEY (kullanici_id) REFERENCES kullanici (id)
-            )
-        ''')
-        
-        # 7. Stok çıkış fişi detay tablosu
-        print("Stok çıkış fişi detay tablosu oluşturuluyor...")
-        cursor.execute('''
-            CREATE TABLE stok_cikis_fis_detay (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                fis_id INTEGER NOT NULL,
-                urun_id INTEGER NOT NULL,
-                urun_adi VARCHAR(200),
-                cikis_adedi INTEGER NOT NULL,
-                birim_desi DECIMAL(8,2),
-                toplam_desi DECIMAL(8,2),
-                kargo_firmasi VARCHAR(100),
-                FOREIGN KEY (fis_id) REFERENCES stok_cikis_fis (id),
-                FOREIGN KEY (urun_id) REFERENCES urun (id)
-            )
-        ''')
-        
-        # 8. Kargo firmaları tablosu
-        print("Kargo firmaları tablosu oluşturuluyor...")
-        cursor.execute('''
-            CREATE TABLE kargo_firmasi (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                firma_adi VARCHAR(100) NOT NULL UNIQUE,
-                aktif BOOLEAN DEFAULT 1,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
         # Varsayılan veriler ekle
         print("Varsayılan veriler ekleniyor...")
         
@@ -160,17 +35,7 @@ def create_complete_database():
         ]
         
         for depo in depolar:
-            cursor.execute('INSERT INTO depo (depo_adi, lokasyon) VALUES (?, ?)', depo)
-        
-        # Varsayılan admin kullanıcı
-        admin_password = "admin123"
-        password_hash = hashlib.sha256(admin_password.encode()).hexdigest()
-        
-        cursor.execute('''
-            INSERT INTO kullanici 
-            (kullanici_adi, email, sifre_hash, tam_ad, rol, aktif, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', ('admin', 'admin@bikestock.com', password_hash, 'Sistem Yöneticisi', 'admin', 1, datetime.now()))
+            cursor.execute('INSERT OR IGNORE INTO depo (depo_adi, adres) VALUES (?, ?)', depo)
         
         # Test ürünleri
         test_urunler = [
@@ -183,11 +48,10 @@ def create_complete_database():
             cursor.execute('INSERT INTO urun (urun_adi, jant_ebati, aciklama, barkod) VALUES (?, ?, ?, ?)', urun)
         
         # Test stokları
-        cursor.execute('INSERT INTO urun_stok (urun_id, depo_id, stok_adedi) VALUES (1, 1, 10)')
-        cursor.execute('INSERT INTO urun_stok (urun_id, depo_id, stok_adedi) VALUES (2, 1, 5)')
-        cursor.execute('INSERT INTO urun_stok (urun_id, depo_id, stok_adedi) VALUES (3, 1, 8)')
+        cursor.execute('INSERT INTO urun_stok (urun_id, depo_id, miktar) VALUES (1, 1, 10)')
+        cursor.execute('INSERT INTO urun_stok (urun_id, depo_id, miktar) VALUES (2, 1, 5)')
+        cursor.execute('INSERT INTO urun_stok (urun_id, depo_id, miktar) VALUES (3, 1, 8)')
         
-        conn.commit()
         # Varsayılan kargo firmalarını ekle
         print("Varsayılan kargo firmaları ekleniyor...")
         kargo_firmalari = [
@@ -205,10 +69,11 @@ def create_complete_database():
         
         for firma in kargo_firmalari:
             cursor.execute(
-                'INSERT INTO kargo_firmasi (firma_adi) VALUES (?)',
+                'INSERT OR IGNORE INTO kargo_firmasi (firma_adi) VALUES (?)',
                 (firma,)
             )
         
+        conn.commit()
         print(f"✅ {len(kargo_firmalari)} kargo firması eklendi")
         
         # Test
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+BikeStock - Çok satırlı stok hareketleri
+Stok çıkış sepetleri, tedarikçi girişleri ve depolar arası transferler gibi
+çok satırlı belgeleri tek işlemde yazar: ürünler ve stoklar birer sorguyla okunur, satırlar
+yazmadan önce bütünüyle doğrulanır, yazmalar executemany ile toplu yapılır.
+
+Fonksiyonlar çağıranın işlemi içinde çalışır; çağıran BEGIN IMMEDIATE ile
+yazma kilidini alır, StokHatasi veya başka bir hata olursa geri alır.
+"""
+
+import daily_summary
+
+# Tek belgede kabul edilen en fazla satır (IN listeleri SQLite değişken sınırının altında kalır)
+SATIR_SINIRI = 1000
+
+
+class StokHatasi(ValueError):
+    """Belge doğrulanamadı; mesaj kullanıcıya olduğu gibi gösterilir"""
+
+
+def fis_no_olustur(conn, onek, tarih, kullanici_id, tablo='stok_cikis_fis'):
+    """Önek + zaman damgası + kullanıcı id'si; aynı saniyedeki tekrarlara sıra eki (-2, -3...)
+
+    Eşzamanlı iki işlem aynı numarayı seçmesin diye yazma kilidi altında çağrılır.
+    """
+    temel = f"{onek}{tarih.strftime('%Y%m%d%H%M%S')}{kullanici_id}"
+    fis_no, sira = temel, 1
+    while conn.execute(f'SELECT 1 FROM {tablo} WHERE fis_no = ?', (fis_no,)).fetchone():
+        sira += 1
+        fis_no = f'{temel}-{sira}'
+    return fis_no
+
+
+def tam_sayi(deger, alan):
+    """İstekteki tam sayı değeri; sayı değilse veya kesirliyse (1.7 kırpılmaz) alan adıyla StokHatasi"""
+    if isinstance(deger, float) and deger.is_integer():
+        deger = int(deger)
+    if deger is None or isinstance(deger, (bool, float)):
+        raise StokHatasi(f'Geçersiz {alan}! ({deger})')
+    try:
+        return int(deger)
+    except (TypeError, ValueError):
+        raise StokHatasi(f'Geçersiz {alan}! ({deger})')
+
+
+def satirlari_oku(satirlar, miktar_alani='miktar'):
+    """İstekteki [{urun_id, miktar}, ...] listesini [(urun_id, miktar), ...] yapar"""
+    if not satirlar:
+        raise StokHatasi('Eksik bilgi!')
+    if len(satirlar) > SATIR_SINIRI:
+        raise StokHatasi(f'Tek belgede en fazla {SATIR_SINIRI} satır olabilir!')
+    try:
+        sonuc = [(tam_sayi(satir['urun_id'], 'ürün id'), tam_sayi(satir[miktar_alani], miktar_alani))
+                 for satir in satirlar]
+    except (KeyError, TypeError):
+        raise StokHatasi('Geçersiz ürün satırı!')
+    if any(miktar <= 0 for _, miktar in sonuc):
+        raise StokHatasi("Miktar 0'dan büyük olmalı!")
+    return sonuc
+
+
+def _yer_tutucular(degerler):
+    return ', '.join('?' * len(degerler))
+
+
+def aktif_depo_dogrula(conn, depo_id, ad='Depo'):
+    """Depo yoksa veya aktif değilse StokHatasi (ad: mesajdaki depo, ör. 'Hedef depo')"""
+    if conn.execute('SELECT 1 FROM depo WHERE id = ? AND aktif = 1', (depo_id,)).fetchone() is None:
+        raise StokHatasi(f'{ad} bulunamadı veya aktif değil! (ID: {depo_id})')
+
+
+def urun_adlari(conn, urun_idleri):
+    """{urun_id: urun_adi}; bulunamayan ürün varsa StokHatasi"""
+    adlar = {satir[0]: satir[1] for satir in conn.execute(
+        f'SELECT id, urun_adi FROM urun WHERE id IN ({_yer_tutucular(urun_idleri)})', urun_idleri
+    )}
+    bulunamayanlar = [str(urun_id) for urun_id in urun_idleri if urun_id not in adlar]
+    if bulunamayanlar:
+        raise StokHatasi(f'Ürün bulunamadı! (ID: {", ".join(bulunamayanlar)})')
+    return adlar
+
+
+def depo_stoklari(conn, depo_id, urun_idleri):
+    """{urun_id: miktar}; depoda satırı olmayan ürünler 0"""
+    stoklar = {satir[0]: satir[1] or 0 for satir in conn.execute(f'''
+        SELECT urun_id, miktar FROM urun_stok
+        WHERE depo_id = ? AND urun_id IN ({_yer_tutucular(urun_idleri)})
+    ''', (depo_id, *urun_idleri))}
+    return {urun_id: stoklar.get(urun_id, 0) for urun_id in urun_idleri}
+
+
+def stok_ekle(conn, depo_id, miktarlar):
+    """{urun_id: miktar} kadar stoğu göreli artırır; satırı olmayan ürün için satır açar"""
+    conn.executemany('''
+        INSERT INTO urun_stok (urun_id, depo_id, miktar)
+        VALUES (?, ?, ?)
+        ON CONFLICT (urun_id, depo_id) DO UPDATE SET
+            miktar = COALESCE(miktar, 0) + excluded.miktar,
+            updated_at = CURRENT_TIMESTAMP
+    ''', [(urun_id, depo_id, miktar) for urun_id, miktar in miktarlar.items()])
+
+
+def stok_dus(conn, depo_id, miktarlar):
+    """{urun_id: miktar} kadar stoğu göreli ve koşullu düşer (miktar >= düşülen)
+
+    Güncellenmeyen satır varsa (stok yetersiz) StokHatasi; çağıran işlemi geri alır.
+    """
+    imlec = conn.executemany('''
+        UPDATE urun_stok SET miktar = miktar - ?, updated_at = CURRENT_TIMESTAMP
+        WHERE urun_id = ? AND depo_id = ? AND miktar >= ?
+    ''', [(miktar, urun_id, depo_id, miktar) for urun_id, miktar in miktarlar.items()])
+    if imlec.rowcount != len(miktarlar):
+        raise StokHatasi('Stok işlem sırasında değişti, lütfen tekrar deneyin!')
+
+
+def cikis_kaydet(conn, depo_id, platform_id, kargo_id, satirlar, aciklama, kullanici_id, kullanici_adi, tarih):
+    """Stok çıkış fişi (sepet); (fis_id, fis_no) döndürür
+
+    satirlar: [(urun_id, adet), ...]. Aynı ürün birden fazla satırda olabilir;
+    her satır kalan stoktan düşülür. Bir satır bile geçersizse StokHatasi,
+    hiçbir şey yazılmaz. Geçmiş kayıtları fiş ve detay satırına bağlanır,
+    günlük özet aynı işlemde güncellenir.
+    """
+    urun_idleri = sorted({urun_id for urun_id, _ in satirlar})
+    stoklar = depo_stoklari(conn, depo_id, urun_idleri)
+    urun_bilgileri = {satir['id']: satir for satir in conn.execute(f'''
+        SELECT id, urun_adi, COALESCE(desi, 0) as desi FROM urun
+        WHERE id IN ({_yer_tutucular(urun_idleri)})
+    ''', urun_idleri)}
+
+    bulunamayanlar = [str(urun_id) for urun_id in urun_idleri if urun_id not in urun_bilgileri]
+    if bulunamayanlar:
+        raise StokHatasi(f'Ürün bulunamadı! (ID: {", ".join(bulunamayanlar)})')
+
+    kalan = dict(stoklar)
+    hareketler = []
+    for urun_id, adet in satirlar:
+        mevcut_miktar = kalan[urun_id]
+        if mevcut_miktar < adet:
+            raise StokHatasi(f'{urun_bilgileri[urun_id]["urun_adi"]} için yeterli stok yok! '
+                             f'(Mevcut: {mevcut_miktar}, İstenen: {adet})')
+        kalan[urun_id] = mevcut_miktar - adet
+        hareketler.append((urun_id, adet, mevcut_miktar, mevcut_miktar - adet))
+
+    fis_no = fis_no_olustur(conn, 'C', tarih, kullanici_id)
+    toplam_urun_adedi = len(hareketler)
+    toplam_adet = sum(adet for _, adet, _, _ in hareketler)
+    toplam_desi = sum(float(urun_bilgileri[urun_id]['desi']) * adet for urun_id, adet, _, _ in hareketler)
+
+    # Satır sayısı ve toplam desi başlıkta tutulur
+    fis_id = conn.execute('''
+        INSERT INTO stok_cikis_fis (fis_no, tarih, depo_id, platform_id, aciklama, toplam_urun_adedi, toplam_adet, toplam_desi, kullanici_id, kullanici_adi, durum)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (fis_no, tarih, depo_id, platform_id, aciklama, toplam_urun_adedi, toplam_adet, toplam_desi,
+          kullanici_id, kullanici_adi, 'TAMAMLANDI')).lastrowid
+
+    # Detay id'leri ekleme sırasıyla geri okunur
+    conn.executemany('''
+        INSERT INTO stok_cikis_fis_detay (fis_id, urun_id, urun_adi, cikis_adedi, birim_desi, toplam_desi, kargo_firmasi_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (fis_id, urun_id, urun_bilgileri[urun_id]['urun_adi'], adet, urun_bilgileri[urun_id]['desi'],
+         float(urun_bilgileri[urun_id]['desi']) * adet, kargo_id)
+        for urun_id, adet, _, _ in hareketler
+    ])
+    fis_detay_idleri = [satir[0] for satir in conn.execute(
+        'SELECT id FROM stok_cikis_fis_detay WHERE fis_id = ? ORDER BY id', (fis_id,)
+    )]
+
+    stok_dus(conn, depo_id, {urun_id: stoklar[urun_id] - kalan[urun_id] for urun_id in urun_idleri})
+
+    conn.executemany('''
+        INSERT INTO islem_gecmisi (
+            islem_tipi, urun_id, depo_id, eski_deger, yeni_deger,
+            urun_bilgisi, kullanici_id, kullanici_adi,
+            platform_id, kargo_bilgisi, fis_id, fis_detay_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        ('STOK_CIKIS', urun_id, depo_id, str(mevcut_miktar), str(yeni_miktar),
+         f'{urun_bilgileri[urun_id]["urun_adi"]} - {aciklama}',
+         kullanici_id, kullanici_adi,
+         platform_id, f'Kargo ID: {kargo_id}' if kargo_id else None,
+         fis_id, fis_detay_id)
+        for (urun_id, _, mevcut_miktar, yeni_miktar), fis_detay_id in zip(hareketler, fis_detay_idleri)
+    ])
+
+    daily_summary.cikis_ekle(
+        conn, tarih.strftime('%Y-%m-%d'), depo_id, kargo_id, platform_id,
+        toplam_urun_adedi, toplam_adet, toplam_desi
+    )
+    return fis_id, fis_no
+
+
+def giris_kaydet(conn, depo_id, satirlar, aciklama, kullanici_id, kullanici_adi, tarih):
+    """Çok satırlı stok girişi; (fis_id, fis_no) döndürür
+
+    satirlar: [(urun_id, miktar), ...]. Aynı ürün birden fazla satırda olabilir;
+    geçmiş kayıtlarındaki eski/yeni değerler satır sırasıyla hesaplanır.
+    """
+    aktif_depo_dogrula(conn, depo_id)
+    urun_idleri = sorted({urun_id for urun_id, _ in satirlar})
+    adlar = urun_adlari(conn, urun_idleri)
+    mevcut = depo_stoklari(conn, depo_id, urun_idleri)
+
+    hareketler, eklenecek = [], {}
+    for urun_id, miktar in satirlar:
+        eski = mevcut[urun_id]
+        mevcut[urun_id] = eski + miktar
+        eklenecek[urun_id] = eklenecek.get(urun_id, 0) + miktar
+        hareketler.append((urun_id, miktar, eski, eski + miktar))
+
+    fis_no = fis_no_olustur(conn, 'G', tarih, kullanici_id, 'stok_giris_fis')
+    fis_id = conn.execute('''
+        INSERT INTO stok_giris_fis (fis_no, tarih, depo_id, aciklama, toplam_urun_adedi, toplam_adet, kullanici_id, kullanici_adi)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (fis_no, tarih, depo_id, aciklama, len(hareketler), sum(eklenecek.values()),
+          kullanici_id, kullanici_adi)).lastrowid
+    conn.executemany('''
+        INSERT INTO stok_giris_fis_detay (fis_id, urun_id, urun_adi, giris_adedi)
+        VALUES (?, ?, ?, ?)
+    ''', [(fis_id, urun_id, adlar[urun_id], miktar) for urun_id, miktar, _, _ in hareketler])
+
+    stok_ekle(conn, depo_id, eklenecek)
+
+    conn.executemany('''
+        INSERT INTO islem_gecmisi (
+            islem_tipi, urun_id, depo_id, eski_deger, yeni_deger,
+            urun_bilgisi, kullanici_id, kullanici_adi
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        ('STOK_GIRIS', urun_id, depo_id, str(eski), str(yeni),
+         f'{adlar[urun_id]} - {fis_no}' + (f' - {aciklama}' if aciklama else ''),
+         kullanici_id, kullanici_adi)
+        for urun_id, _, eski, yeni in hareketler
+    ])
+    return fis_id, fis_no
+
+
+def transfer_kaydet(conn, kaynak_depo_id, hedef_depo_id, satirlar, aciklama, kullanici_id, kullanici_adi, tarih):
+    """Çok satırlı depo transferi; (fis_id, fis_no) döndürür
+
+    Kaynak stoklar tek sorguyla doğrulanır (aynı ürünün satırları toplanır),
+    yetersiz ürünlerin hepsi tek hata mesajında listelenir. Kaynak düşümleri ve
+    hedef upsert'leri executemany ile yapılır.
+    """
+    if kaynak_depo_id == hedef_depo_id:
+        raise StokHatasi('Kaynak ve hedef depo aynı olamaz!')
+    aktif_depo_dogrula(conn, kaynak_depo_id, 'Kaynak depo')
+    aktif_depo_dogrula(conn, hedef_depo_id, 'Hedef depo')
+
+    urun_idleri = sorted({urun_id for urun_id, _ in satirlar})
+    adlar = urun_adlari(conn, urun_idleri)
+    kaynak = depo_stoklari(conn, kaynak_depo_id, urun_idleri)
+
+    tasinacak = {}
+    for urun_id, miktar in satirlar:
+        tasinacak[urun_id] = tasinacak.get(urun_id, 0) + miktar
+    yetersiz = [f'{adlar[urun_id]} (Mevcut: {kaynak[urun_id]}, İstenen: {miktar})'
+                for urun_id, miktar in tasinacak.items() if kaynak[urun_id] < miktar]
+    if yetersiz:
+        raise StokHatasi('Kaynak depoda yeterli stok yok! ' + ', '.join(yetersiz))
+
+    hareketler = []
+    for urun_id, miktar in satirlar:
+        eski = kaynak[urun_id]
+        kaynak[urun_id] = eski - miktar
+        hareketler.append((urun_id, miktar, eski, eski - miktar))
+
+    fis_no = fis_no_olustur(conn, 'T', tarih, kullanici_id, 'depo_transfer_fis')
+    fis_id = conn.execute('''
+        INSERT INTO depo_transfer_fis (
+            fis_no, tarih, kaynak_depo_id, hedef_depo_id, aciklama,
+            toplam_urun_adedi, toplam_adet, kullanici_id, kullanici_adi
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (fis_no, tarih, kaynak_depo_id, hedef_depo_id, aciklama, len(hareketler),
+          sum(tasinacak.values()), kullanici_id, kullanici_adi)).lastrowid
+    conn.executemany('''
+        INSERT INTO depo_transfer_fis_detay (fis_id, urun_id, urun_adi, miktar)
+        VALUES (?, ?, ?, ?)
+    ''', [(fis_id, urun_id, adlar[urun_id], miktar) for urun_id, miktar, _, _ in hareketler])
+
+    stok_dus(conn, kaynak_depo_id, tasinacak)
+    stok_ekle(conn, hedef_depo_id, tasinacak)
+
+    conn.executemany('''
+        INSERT INTO islem_gecmisi (
+            islem_tipi, urun_id, depo_id, hedef_depo_id, eski_deger, yeni_deger,
+            urun_bilgisi, kullanici_id, kullanici_adi
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        ('DEPO_TRANSFER', urun_id, kaynak_depo_id, hedef_depo_id, str(eski), str(yeni),
+         f'{adlar[urun_id]} - {fis_no}' + (f' - {aciklama}' if aciklama else ''),
+         kullanici_id, kullanici_adi)
+        for urun_id, _, eski, yeni in hareketler
+    ])
+    return fis_id, fis_no
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+BikeStock - Tek yazıcılı toplu commit (group commit) kuyruğu
+Stok hareketleri istek thread'lerinde yazılmak yerine süreç başına tek bir
+yazıcı thread'e sıraya konabilir. Yazıcı sıradaki işleri küçük partiler halinde
+tek bir BEGIN IMMEDIATE ... COMMIT içinde uygular; her iş kendi SAVEPOINT'inde
+çalıştığı için hata veren iş yalnız kendini geri alır ve her çağıran kendi
+sonucunu (veya hatasını) alır. Yoğun saatlerde istek başına bir commit ve
+yazma kilidi yerine parti başına bir commit yapılır.
+
+GROUP_COMMIT=1 ile açılır; kapalıyken yaz() işi isteğin kendi bağlantısında
+tek başına bir işlemde çalıştırır. İş fonksiyonları conn parametresi alır,
+commit/rollback yapmaz ve yazıcı thread'de çalıştığı için flask.session veya
+request'e erişmez (gereken değerler iş oluşturulurken alınır).
+"""
+
+import os
+import queue
+import threading
+import time
+import concurrent.futures
+
+import database
+
+ETKIN = os.environ.get('GROUP_COMMIT', '0') == '1'
+
+# Bir commit'te uygulanan en fazla iş
+PARTI_BOYUTU = int(os.environ.get('GROUP_COMMIT_PARTI', '32'))
+# İlk işten sonra partiye katılacak işler için beklenen en uzun süre (sn)
+TOPLAMA_SURESI = float(os.environ.get('GROUP_COMMIT_BEKLEME_MS', '2')) / 1000
+# Bu sürede başlatılamayan iş iptal edilir (sn); busy_timeout'tan uzun olmalı
+SONUC_BEKLEME = 30
+
+
+class YazmaKuyrugu:
+    """Süreç başına tek yazıcı thread; thread ilk işte (fork sonrası) başlatılır"""
+
+    def __init__(self, parti_boyutu=PARTI_BOYUTU, toplama_suresi=TOPLAMA_SURESI):
+        self.parti_boyutu = parti_boyutu
+        self.toplama_suresi = toplama_suresi
+        self._kuyruk = queue.Queue()
+        self._kilit = threading.Lock()
+        self._pid = None
+        self.istatistik = {'is': 0, 'parti': 0}
+
+    def calistir(self, is_):
+        """İşi sıraya koyar, commit edilene kadar bekler; işin sonucunu döndürür veya hatasını yükseltir"""
+        self._baslat()
+        gelecek = concurrent.futures.Future()
+        self._kuyruk.put((is_, gelecek))
+        try:
+            return gelecek.result(timeout=SONUC_BEKLEME)
+        except concurrent.futures.TimeoutError:
+            # Başlamamış iş iptal edilir; başlamışsa sonucu (commit/rollback) beklenir
+            if gelecek.cancel():
+                raise
+            return gelecek.result()
+
+    def _baslat(self):
+        # Fork edilen süreçte ebeveynin thread'i ve kuyruğu yoktur; yenisi açılır
+        if self._pid == os.getpid():
+            return
+        with self._kilit:
+            if self._pid == os.getpid():
+                return
+            self._kuyruk = queue.Queue()
+            threading.Thread(target=self._dongu, name='group-commit', daemon=True).start()
+            self._pid = os.getpid()
+
+    def _dongu(self):
+        conn = database.connect()
+        # İşlemler açıkça yönetilir (BEGIN IMMEDIATE / SAVEPOINT / COMMIT)
+        conn.isolation_level = None
+        while True:
+            isler = [self._kuyruk.get()]
+            son = time.monotonic() + self.toplama_suresi
+            while len(isler) < self.parti_boyutu:
+                try:
+                    isler.append(self._kuyruk.get(timeout=max(0, son - time.monotonic())))
+                except queue.Empty:
+                    break
+            self._uygula(conn, isler)
+
+    def _uygula(self, conn, isler):
+        # İptal edilen (süresi dolan) işler atlanır, kalanlar artık iptal edilemez
+        isler = [(is_, gelecek) for is_, gelecek in isler if gelecek.set_running_or_notify_cancel()]
+        if not isler:
+            return
+        sonuclar = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for is_, gelecek in isler:
+                conn.execute('SAVEPOINT is_')
+                try:
+                    sonuc = is_(conn)
+                except Exception as e:
+                    conn.execute('ROLLBACK TO is_')
+                    conn.execute('RELEASE is_')
+                    sonuclar.append((gelecek, None, e))
+                else:
+                    conn.execute('RELEASE is_')
+                    sonuclar.append((gelecek, sonuc, None))
+            conn.execute('COMMIT')
+        except Exception as e:
+            # Kilit alınamadı veya commit başarısız: partideki hiçbir iş yazılmadı
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            for _, gelecek in isler:
+                gelecek.set_exception(e)
+            return
+
+        self.istatistik['is'] += len(isler)
+        self.istatistik['parti'] += 1
+        # Sonuçlar commit'ten sonra bildirilir; başarılı dönen iş kalıcıdır
+        for gelecek, sonuc, hata in sonuclar:
+            if hata is not None:
+                gelecek.set_exception(hata)
+            else:
+                gelecek.set_result(sonuc)
+
+
+kuyruk = YazmaKuyrugu()
+
+
+def yaz(is_):
+    """is_(conn) fonksiyonunu bir yazma işleminde çalıştırır ve sonucunu döndürür
+
+    Kuyruk açıksa iş yazıcı thread'in partisine katılır; kapalıysa isteğin
+    bağlantısında BEGIN IMMEDIATE ile çalışır. Hata her iki durumda da
+    çağırana yükseltilir ve işin yazdıkları geri alınmış olur.
+    """
+    if ETKIN:
+        return kuyruk.calistir(is_)
+    conn = database.get_db()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        sonuc = is_(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return sonuc